@@ -0,0 +1,122 @@
+# backend/batcher.py
+
+import time
+import queue
+import threading
+from collections import Counter
+from concurrent.futures import Future
+import numpy as np
+from logger import logger
+from metrics import EMBED_BATCH_TEXTS, EMBED_BATCH_REQUESTS, STAGE_LATENCY
+
+
+class EmbeddingBatcher:
+    """
+    Drop-in wrapper around a SentenceTransformer-style model that coalesces
+    concurrent encode() calls. The first waiting call opens a batch, and the batch
+    closes once max_batch texts are waiting or max_delay_ms has passed.
+    One forward pass runs per batch, and every caller gets its own rows back.
+    A single background thread owns the model, so calls never contend for it.
+    """
+
+    def __init__(self, model, max_batch: int = 64, max_delay_ms: float = 5.0, batch_size: int = 32):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000
+        self.batch_size = batch_size # Forward-pass size inside one batch
+
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self.batches = 0
+        self.requests = 0
+        self.texts = 0
+        self.batch_sizes = Counter() # requests per batch -> how many batches
+
+        self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._thread.start()
+
+    def encode(self, sentences, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.empty((0, self.model.get_sentence_embedding_dimension()), dtype="float32")
+
+        future = Future()
+        # Only calls with the same options can share a forward pass
+        options = tuple(sorted((k, v) for k, v in kwargs.items() if k != "batch_size"))
+        self._queue.put((texts, options, future))
+        vectors = future.result()
+        return vectors[0] if single else vectors
+
+    def _collect(self) -> list:
+        """Blocks for the first call, then gathers more until the batch is full or the delay expires."""
+        pending = [self._queue.get()]
+        size = len(pending[0][0])
+        deadline = time.perf_counter() + self.max_delay
+        while size < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            pending.append(item)
+            size += len(item[0])
+        return pending
+
+    def _run(self):
+        while True:
+            pending = self._collect()
+
+            # Group by options; normally there is a single group
+            groups = {}
+            for item in pending:
+                groups.setdefault(item[1], []).append(item)
+
+            for options, items in groups.items():
+                texts = [text for item in items for text in item[0]]
+                began = time.perf_counter()
+                try:
+                    vectors = np.asarray(
+                        self.model.encode(texts, batch_size=self.batch_size, **dict(options)), dtype="float32"
+                    )
+                except Exception as e:
+                    logger.error(f"Batched encode of {len(texts)} texts failed: {e}")
+                    for item in items:
+                        item[2].set_exception(e)
+                    continue
+
+                start = 0
+                for item in items:
+                    end = start + len(item[0])
+                    item[2].set_result(vectors[start:end])
+                    start = end
+
+                STAGE_LATENCY.labels("embed_batch").observe(time.perf_counter() - began)
+                EMBED_BATCH_TEXTS.observe(len(texts))
+                EMBED_BATCH_REQUESTS.observe(len(items))
+
+                with self._stats_lock:
+                    self.batches += 1
+                    self.requests += len(items)
+                    self.texts += len(texts)
+                    self.batch_sizes[len(items)] += 1
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "batches": self.batches,
+                "requests": self.requests,
+                "texts": self.texts,
+                "avg_requests_per_batch": round(self.requests / self.batches, 2) if self.batches else 0.0,
+                "avg_texts_per_batch": round(self.texts / self.batches, 2) if self.batches else 0.0,
+                "requests_per_batch": dict(sorted(self.batch_sizes.items())),
+                "queued": self._queue.qsize(),
+            }
+
+    def __getattr__(self, name):
+        # Anything else (get_sentence_embedding_dimension, ...) goes to the real model
+        if name == "model":
+            raise AttributeError(name)
+        return getattr(self.model, name)
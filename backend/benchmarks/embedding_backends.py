@@ -0,0 +1,96 @@
+# backend/benchmarks/embedding_backends.py
+#
+# Parity check + throughput benchmark for the embedding backends (EMBEDDING_BACKEND).
+# Every candidate backend is compared against torch fp32 on the same texts:
+#
+#   cd backend
+#   python -m benchmarks.embedding_backends
+#   python -m benchmarks.embedding_backends --backends onnx-int8 --min-cosine 0.98
+#
+# Exits with status 1 if any backend's worst-case cosine agreement falls below --min-cosine,
+# so it can run as a gate in CI or before flipping the backend in production.
+
+import os
+import sys
+import time
+import argparse
+import numpy as np
+from services import load_model
+from chunking import chunk_text, l2_normalize
+from benchmarks.synthetic import synthetic_resumes
+
+
+def encode(model, texts: list, batch_size: int) -> np.ndarray:
+    return l2_normalize(np.asarray(model.encode(texts, batch_size=batch_size), dtype="float32"))
+
+
+def throughput(model, chunks: list, n_resumes: int, batch_size: int, repeats: int) -> dict:
+    encode(model, chunks[:batch_size], batch_size) # Warm the kernels first
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        encode(model, chunks, batch_size)
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    return {
+        "seconds": round(best, 3),
+        "chunks_per_sec": round(len(chunks) / best, 1),
+        "resumes_per_sec": round(n_resumes / best, 1),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Embedding backend parity + throughput")
+    parser.add_argument("--backends", nargs="+", default=["onnx", "onnx-int8"], help="Backends to compare against torch")
+    parser.add_argument("--resumes", type=int, default=64)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--min-cosine", type=float, default=0.98, help="Fail if any text's cosine to torch falls below this")
+    parser.add_argument("--threads", type=int, default=None, help="Pin intra-op threads (per-core numbers)")
+    args = parser.parse_args()
+
+    if args.threads:
+        # Both runtimes read this on load; torch also takes it explicitly below
+        os.environ["OMP_NUM_THREADS"] = str(args.threads)
+
+    resumes = synthetic_resumes(args.resumes)
+    chunks = [chunk for text in resumes for chunk in chunk_text(text)]
+    print(f"{len(resumes)} resumes -> {len(chunks)} chunks, batch size {args.batch_size}")
+
+    import torch
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    cores = args.threads or torch.get_num_threads()
+
+    reference_model = load_model("torch")
+    reference = encode(reference_model, chunks, args.batch_size)
+    baseline = throughput(reference_model, chunks, len(resumes), args.batch_size, args.repeats)
+    del reference_model
+
+    print(f"\n{'backend':<12} {'resumes/s':>10} {'per core':>9} {'speedup':>8} {'cos mean':>9} {'cos min':>8}")
+    print(f"{'torch':<12} {baseline['resumes_per_sec']:>10} {baseline['resumes_per_sec'] / cores:>9.1f} "
+          f"{'1.00x':>8} {'-':>9} {'-':>8}")
+
+    failed = []
+    for backend in args.backends:
+        model = load_model(backend)
+        vectors = encode(model, chunks, args.batch_size)
+        cosines = np.sum(vectors * reference, axis=1) # Both sides are unit length
+        stats = throughput(model, chunks, len(resumes), args.batch_size, args.repeats)
+        del model
+
+        speedup = baseline["seconds"] / stats["seconds"]
+        print(f"{backend:<12} {stats['resumes_per_sec']:>10} {stats['resumes_per_sec'] / cores:>9.1f} "
+              f"{speedup:>7.2f}x {cosines.mean():>9.4f} {cosines.min():>8.4f}")
+        if cosines.min() < args.min_cosine:
+            failed.append(backend)
+
+    if failed:
+        print(f"\nFAIL: cosine agreement below {args.min_cosine} for: {', '.join(failed)}")
+        return 1
+    print(f"\nOK: every backend within cosine {args.min_cosine} of torch")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
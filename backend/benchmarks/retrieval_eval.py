@@ -0,0 +1,306 @@
+# backend/benchmarks/retrieval_eval.py
+#
+# Offline retrieval-quality harness for JD -> resume search: recall@k, MRR and nDCG on a
+# labeled dataset, plus embedding throughput, for several embedders and index settings in one run.
+#
+#   cd backend
+#   python -m benchmarks.retrieval_eval --dataset eval/labeled.jsonl
+#   python -m benchmarks.retrieval_eval --dataset eval/labeled.jsonl --embedders torch onnx-int8 \
+#       --scoring max topk --index exact hnsw --ef-search 32 128 --output eval/results.json
+#   python -m benchmarks.retrieval_eval --synthetic 2000 --embedders hashing   # smoke run, no model
+#
+# Dataset: JSON lines; resumes and JDs may share one file or be spread over several.
+#   {"type": "resume", "id": "r-17", "text": "..."}    or "path": "pdfs/r-17.pdf" (.pdf / .txt, relative to the file)
+#   {"type": "jd", "id": "jd-3", "text": "...", "relevant": ["r-17", "r-40"]}
+#   {"type": "jd", "id": "jd-4", "text": "...", "relevant": {"r-17": 2, "r-9": 1}}   graded, for nDCG
+#
+# Resumes are chunked and pooled exactly like production search. Every text is embedded once per
+# embedder through CachedEmbedder (on disk, so re-runs only pay for new texts), and scoring is one
+# matrix product per block of JDs rather than one search per JD.
+
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+from config import (
+    DATA_DIR, EMBEDDING_BACKEND, CHUNK_SCORING, CHUNK_TOP_K, EMBED_BATCH_SIZE,
+    MAX_CHUNKS_PER_RESUME, HNSW_M, HNSW_EF_CONSTRUCTION, HNSW_EF_SEARCH
+)
+from chunking import chunk_documents, encode_chunks, l2_normalize
+from embedding_cache import CachedEmbedder
+from benchmarks.synthetic import synthetic_resumes, synthetic_jd, HashingEmbedder
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+BLOCK_ELEMENTS = 2 ** 24 # Floats per scoring block (~64 MB); sets how many JDs are scored at once
+
+
+# --- DATASET ---
+def _read_document(path: str) -> str:
+    if path.lower().endswith(".pdf"):
+        from ingest import parse_pdf_bytes
+        with open(path, "rb") as f:
+            return parse_pdf_bytes(f.read())
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def load_dataset(paths: list) -> tuple:
+    """Returns (resume_texts, jd_texts, relevance); relevance[j] maps resume index -> grade."""
+    resumes, jds = {}, []
+    for path in paths:
+        folder = os.path.dirname(os.path.abspath(path))
+        with open(path, encoding="utf-8") as f:
+            for number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                text = record.get("text")
+                if text is None and record.get("path"):
+                    text = _read_document(os.path.join(folder, record["path"]))
+                if record.get("type") == "resume":
+                    resumes[str(record["id"])] = text or ""
+                elif record.get("type") == "jd":
+                    jds.append((text or "", record.get("relevant") or {}))
+                else:
+                    raise ValueError(f"{path}:{number}: \"type\" must be \"resume\" or \"jd\"")
+
+    position = {resume_id: i for i, resume_id in enumerate(resumes)}
+    relevance, unknown = [], 0
+    for _, relevant in jds:
+        grades = relevant if isinstance(relevant, dict) else {resume_id: 1 for resume_id in relevant}
+        unknown += sum(1 for resume_id in grades if str(resume_id) not in position)
+        relevance.append({position[str(r)]: float(g) for r, g in grades.items() if str(r) in position and g > 0})
+    if unknown:
+        print(f"warning: {unknown} labels point at resume ids that aren't in the dataset (ignored)")
+    return list(resumes.values()), [text for text, _ in jds], relevance
+
+
+def synthetic_dataset(n_resumes: int, n_jds: int) -> tuple:
+    """Synthetic resumes and JDs, graded by how many of the JD's skills the resume lists. Checks the plumbing, not a model."""
+    resumes = synthetic_resumes(n_resumes)
+    listed = [set(text.rsplit("Skills\n", 1)[1].split(", ")) for text in resumes]
+    jds, relevance = [], []
+    for seed in range(n_jds):
+        jd, skills = synthetic_jd(seed=seed)
+        overlap = np.array([len(owned & set(skills)) for owned in listed])
+        jds.append(jd)
+        # 7 or 8 shared skills: about 1 resume in 200, graded 1 and 2
+        relevance.append({int(i): float(overlap[i] - 6) for i in np.flatnonzero(overlap >= 7)})
+    return resumes, jds, relevance
+
+
+# --- EMBEDDING ---
+def load_embedder(spec: str) -> tuple:
+    """(model, cache namespace) for "hashing", a backend name, or any sentence-transformers model name."""
+    if spec == "hashing":
+        return HashingEmbedder(), "hashing"
+    from services import load_model, cache_namespace
+    if spec in BACKENDS:
+        return load_model(spec), cache_namespace(spec)
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(spec), spec
+
+
+def embed(model, namespace: str, chunks: list, jd_texts: list, cache_path: str, batch_size: int) -> tuple:
+    # The memory tier holds the whole run, so nothing is encoded twice even without the disk tier
+    embedder = CachedEmbedder(model, namespace, len(chunks) + len(jd_texts) + 1, cache_path)
+    start = time.perf_counter()
+    chunk_vectors = l2_normalize(encode_chunks(embedder, chunks, batch_size))
+    jd_vectors = l2_normalize(encode_chunks(embedder, jd_texts, batch_size))
+    stats = embedder.stats()
+    return chunk_vectors, jd_vectors, {
+        "seconds": round(time.perf_counter() - start, 3),
+        "encoded": stats["misses"],
+        "cache_hit_rate": stats["hit_rate"],
+    }
+
+
+def throughput(model, chunks: list, batch_size: int, sample: int) -> float:
+    """Cold chunks/s straight through the model (no cache), on an evenly spaced sample."""
+    picked = chunks[::max(1, len(chunks) // sample)][:sample]
+    encode_chunks(model, picked[:batch_size], batch_size) # Warm the kernels first
+    start = time.perf_counter()
+    encode_chunks(model, picked, batch_size)
+    return round(len(picked) / (time.perf_counter() - start), 1)
+
+
+# --- SCORING ---
+def exact_search(chunk_vectors: np.ndarray):
+    def search(queries):
+        return queries @ chunk_vectors.T # Unit vectors: inner product = cosine
+    return search
+
+
+def hnsw_search(index, n_chunks: int, fetch: int, ef: int):
+    """Same over-fetch as ResumeIndex.search; chunks the graph didn't return score -inf."""
+    def search(queries):
+        index.hnsw.efSearch = ef # Read at search time, so every setting can share one graph
+        distances, ids = index.search(queries, fetch)
+        sims = np.full((len(queries), n_chunks), -np.inf, dtype="float32")
+        rows = np.broadcast_to(np.arange(len(queries))[:, None], ids.shape)
+        hit = ids >= 0
+        sims[rows[hit], ids[hit]] = distances[hit]
+        return sims
+    return search
+
+
+def pool_matrix(sims: np.ndarray, starts: np.ndarray, counts: np.ndarray, mode: str, k: int) -> np.ndarray:
+    """
+    chunking.pool_scores for a block of queries at once: (queries, chunks) -> (queries, resumes).
+    Chunks must be grouped by resume, as chunk_documents returns them.
+    """
+    if mode == "max" or k <= 1:
+        return np.maximum.reduceat(sims, starts, axis=1)
+    # Pad every resume out to the longest one's chunk count; the padding scores -inf
+    width = int(counts.max())
+    offsets = np.arange(width)
+    slots = np.minimum(starts[:, None] + offsets, sims.shape[1] - 1)
+    padded = np.where(offsets < counts[:, None], sims[:, slots], -np.inf)
+    best = -np.sort(-padded, axis=2)[:, :, :k]
+    found = np.isfinite(best)
+    n = found.sum(axis=2)
+    totals = np.where(found, best, 0).sum(axis=2)
+    return np.where(n > 0, totals / np.maximum(n, 1), -np.inf).astype("float32")
+
+
+def rank_metrics(scores: np.ndarray, relevance: np.ndarray, ks: list) -> dict:
+    """Per-query recall@k, nDCG@k and reciprocal rank for one block; relevance holds (queries, resumes) grades."""
+    depth = max(ks)
+    top = np.argpartition(-scores, depth - 1, axis=1)[:, :depth]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1)
+    top = np.take_along_axis(top, order, axis=1)
+    found = np.isfinite(np.take_along_axis(top_scores, order, axis=1))
+    gains = np.where(found, np.take_along_axis(relevance, top, axis=1), 0)
+
+    ideal = -np.sort(-relevance, axis=1)[:, :depth]
+    discounts = 1 / np.log2(np.arange(2, depth + 2))
+    n_relevant = (relevance > 0).sum(axis=1)
+
+    metrics = {}
+    for k in ks:
+        metrics[f"recall@{k}"] = (gains[:, :k] > 0).sum(axis=1) / n_relevant
+    for k in ks:
+        dcg = ((2 ** gains[:, :k] - 1) * discounts[:k]).sum(axis=1)
+        metrics[f"ndcg@{k}"] = dcg / ((2 ** ideal[:, :k] - 1) * discounts[:k]).sum(axis=1)
+
+    # Over the full ranking: 1 / rank of the best-scored relevant resume (0 if it was never retrieved)
+    best_relevant = np.where(relevance > 0, scores, -np.inf).max(axis=1)
+    rank = (scores > best_relevant[:, None]).sum(axis=1) + 1
+    metrics["mrr"] = np.where(np.isfinite(best_relevant), 1 / rank, 0.0)
+    return metrics
+
+
+def evaluate(search, jd_vectors: np.ndarray, relevance: np.ndarray, owners: np.ndarray,
+             n_docs: int, mode: str, k_chunks: int, ks: list) -> dict:
+    starts = np.searchsorted(owners, np.arange(n_docs))
+    counts = np.bincount(owners, minlength=n_docs)
+    width = int(counts.max()) if mode == "topk" and k_chunks > 1 else 1
+    block = max(1, BLOCK_ELEMENTS // max(len(owners), n_docs * width))
+
+    per_query, search_seconds = {}, 0.0
+    for start in range(0, len(jd_vectors), block):
+        queries = jd_vectors[start:start + block]
+        began = time.perf_counter()
+        scores = pool_matrix(search(queries), starts, counts, mode, k_chunks)
+        search_seconds += time.perf_counter() - began
+        for name, values in rank_metrics(scores, relevance[start:start + block], ks).items():
+            per_query.setdefault(name, []).append(values)
+
+    result = {name: round(float(np.concatenate(values).mean()), 4) for name, values in per_query.items()}
+    result["ms_per_query"] = round(search_seconds / len(jd_vectors) * 1000, 3)
+    return result
+
+
+# --- REPORT ---
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Retrieval quality (recall@k / MRR / nDCG) + embedding throughput")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--dataset", nargs="+", help="JSONL files with resume and JD records")
+    source.add_argument("--synthetic", type=int, help="Generate this many synthetic resumes (and 1 JD per 20)")
+    parser.add_argument("--embedders", nargs="+", default=[EMBEDDING_BACKEND],
+                        help="torch, onnx, onnx-int8, hashing, or a sentence-transformers model name")
+    parser.add_argument("--scoring", nargs="+", default=[CHUNK_SCORING], choices=["max", "topk"])
+    parser.add_argument("--top-k-chunks", type=int, default=CHUNK_TOP_K, help="Chunks averaged by --scoring topk")
+    parser.add_argument("--index", nargs="+", default=["exact"], choices=["exact", "hnsw"])
+    parser.add_argument("--ef-search", nargs="+", type=int, default=[HNSW_EF_SEARCH])
+    parser.add_argument("--hnsw-m", type=int, default=HNSW_M)
+    parser.add_argument("--ks", nargs="+", type=int, default=[1, 5, 10])
+    parser.add_argument("--batch-size", type=int, default=EMBED_BATCH_SIZE)
+    parser.add_argument("--throughput-sample", type=int, default=512, help="Chunks timed through the bare model")
+    parser.add_argument("--cache", default=os.path.join(DATA_DIR, "retrieval_eval_embeddings.db"),
+                        help="SQLite embedding cache, kept apart from the app's own")
+    parser.add_argument("--no-cache", action="store_true", help="Memory only; every run re-embeds everything")
+    parser.add_argument("--output", help="Write the results as JSON")
+    args = parser.parse_args()
+
+    if args.dataset:
+        resumes, jd_texts, labels = load_dataset(args.dataset)
+    else:
+        resumes, jd_texts, labels = synthetic_dataset(args.synthetic, max(10, args.synthetic // 20))
+
+    # JDs without a relevant resume have no recall or MRR to speak of
+    kept = [i for i, grades in enumerate(labels) if grades]
+    jd_texts = [jd_texts[i] for i in kept]
+    relevance = np.zeros((len(kept), len(resumes)), dtype="float32")
+    for row, i in enumerate(kept):
+        relevance[row, list(labels[i])] = list(labels[i].values())
+    ks = sorted({k for k in args.ks if 0 < k <= len(resumes)})
+    if not kept or not ks:
+        print("Nothing to evaluate: no JD has a relevant resume in the dataset")
+        return 1
+
+    chunks, owners = chunk_documents(resumes)
+    print(f"{len(resumes)} resumes -> {len(chunks)} chunks, {len(kept)} labeled JDs "
+          f"({len(labels) - len(kept)} without relevant resumes skipped), "
+          f"{int((relevance > 0).sum())} relevant pairs")
+
+    cache_path = None if args.no_cache else args.cache
+    results = []
+    columns = [f"recall@{k}" for k in ks] + ["mrr", f"ndcg@{ks[-1]}", "ms_per_query"]
+    for spec in args.embedders:
+        model, namespace = load_embedder(spec)
+        chunk_vectors, jd_vectors, embedded = embed(model, namespace, chunks, jd_texts, cache_path, args.batch_size)
+        embedded["chunks_per_sec"] = throughput(model, chunks, args.batch_size, args.throughput_sample)
+        print(f"\n{spec}: embedded in {embedded['seconds']}s ({embedded['encoded']} texts encoded, "
+              f"cache hit rate {embedded['cache_hit_rate']:.0%}), {embedded['chunks_per_sec']} chunks/s cold")
+
+        searches = []
+        if "exact" in args.index:
+            searches.append(("exact", exact_search(chunk_vectors), None))
+        if "hnsw" in args.index:
+            import faiss # Only needed for the ANN comparison
+            index = faiss.IndexHNSWFlat(chunk_vectors.shape[1], args.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+            began = time.perf_counter()
+            index.add(chunk_vectors)
+            build_seconds = round(time.perf_counter() - began, 3)
+            fetch = min(ks[-1] * MAX_CHUNKS_PER_RESUME, len(chunks))
+            for ef in args.ef_search:
+                searches.append((f"hnsw(M={args.hnsw_m},ef={ef})", hnsw_search(index, len(chunks), fetch, ef), build_seconds))
+
+        print(f"{'scoring':<8} {'index':<22}" + "".join(f" {c:>12}" for c in columns))
+        for mode in args.scoring:
+            for index_name, search, build_seconds in searches:
+                metrics = evaluate(search, jd_vectors, relevance, owners, len(resumes), mode, args.top_k_chunks, ks)
+                print(f"{mode:<8} {index_name:<22}" + "".join(f" {metrics[c]:>12}" for c in columns))
+                results.append({
+                    "embedder": spec, "scoring": mode, "index": index_name,
+                    "index_build_seconds": build_seconds, **metrics, "embedding": embedded,
+                })
+        del model
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "resumes": len(resumes), "chunks": len(chunks), "jds": len(kept),
+                "relevant_pairs": int((relevance > 0).sum()), "results": results,
+            }, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
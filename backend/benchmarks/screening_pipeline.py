@@ -0,0 +1,193 @@
+# backend/benchmarks/screening_pipeline.py
+#
+# Stage-level benchmark of the /screen_resumes pipeline on synthetic PDFs.
+# Offline: no LLM calls (the JD's skills are generated with it), and
+# --embedder hashing skips the model entirely when it isn't downloaded.
+#
+#   cd backend
+#   python -m benchmarks.screening_pipeline --resumes 100 --save-baseline benchmarks/baseline.json
+#   python -m benchmarks.screening_pipeline --resumes 100 --baseline benchmarks/baseline.json --tolerance 0.2
+#
+# With --baseline, exits with status 1 if any stage's p50 or p95 got slower than the
+# baseline by more than --tolerance (and by at least --min-delta-ms).
+
+import sys
+import json
+import time
+import argparse
+import platform
+import numpy as np
+from ingest import parse_pdf_bytes
+from chunking import chunk_documents, encode_chunks, pool_scores
+from screening import build_result
+import skill_matcher
+from benchmarks.synthetic import synthetic_resumes, synthetic_jd, make_pdf, HashingEmbedder
+
+STAGES = ["parse", "chunk", "embed", "normalize", "index", "search", "gap"]
+
+
+def run_once(pdfs: list, jd_text: str, skills: list, embedder) -> tuple:
+    """One pass of the pipeline. Returns ({stage: seconds}, {stage: items})."""
+    import faiss
+
+    timings, items = {}, {}
+
+    def timed(stage, count, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        timings[stage] = time.perf_counter() - start
+        items[stage] = count
+        return result
+
+    texts = timed("parse", len(pdfs), lambda: [parse_pdf_bytes(data) for data in pdfs])
+    chunks, owners = timed("chunk", len(texts), chunk_documents, texts)
+
+    def embed():
+        vectors = encode_chunks(embedder, chunks)
+        return vectors, np.array(embedder.encode([jd_text]), dtype="float32")
+    chunk_vectors, jd_vector = timed("embed", len(chunks) + 1, embed)
+
+    def normalize():
+        faiss.normalize_L2(chunk_vectors)
+        faiss.normalize_L2(jd_vector)
+    timed("normalize", len(chunks) + 1, normalize)
+
+    def build_index():
+        index = faiss.IndexFlatIP(chunk_vectors.shape[1])
+        index.add(chunk_vectors)
+        return index
+    index = timed("index", len(chunks), build_index)
+
+    def search():
+        distances, indices = index.search(jd_vector, len(chunks))
+        return pool_scores(distances[0], owners[indices[0]], len(texts))
+    scores = timed("search", len(texts), search)
+
+    def gap():
+        # A new JD means a new skill set, so the matcher build is part of the cost
+        skill_matcher._cached_matcher.cache_clear()
+        ranking = np.argsort(-scores)
+        return [build_result(rank + 1, f"r{idx}.pdf", texts[idx], scores[idx], skills)
+                for rank, idx in enumerate(ranking)]
+    timed("gap", len(texts), gap)
+
+    return timings, items
+
+
+def summarize(runs: list, items: dict) -> dict:
+    report = {}
+    for stage in STAGES:
+        seconds = np.array([run[stage] for run in runs])
+        p50, p95, p99 = np.percentile(seconds, [50, 95, 99])
+        report[stage] = {
+            "items": items[stage],
+            "p50_ms": round(p50 * 1000, 3),
+            "p95_ms": round(p95 * 1000, 3),
+            "p99_ms": round(p99 * 1000, 3),
+            "items_per_sec": round(items[stage] / p50, 1) if p50 else None,
+        }
+    total = np.array([sum(run.values()) for run in runs])
+    report["total"] = {
+        "items": items["parse"],
+        "p50_ms": round(np.percentile(total, 50) * 1000, 3),
+        "p95_ms": round(np.percentile(total, 95) * 1000, 3),
+        "p99_ms": round(np.percentile(total, 99) * 1000, 3),
+        "items_per_sec": round(items["parse"] / np.percentile(total, 50), 1),
+    }
+    return report
+
+
+def compare(report: dict, baseline: dict, tolerance: float, min_delta_ms: float) -> list:
+    """Returns human-readable regressions (empty if none)."""
+    regressions = []
+    for stage, stats in report.items():
+        old = baseline.get(stage)
+        if old is None:
+            continue
+        for metric in ("p50_ms", "p95_ms"):
+            # Sub-millisecond stages jitter by more than any tolerance, so small absolute moves don't count
+            if old[metric] and stats[metric] > old[metric] * (1 + tolerance) \
+                    and stats[metric] - old[metric] >= min_delta_ms:
+                change = (stats[metric] / old[metric] - 1) * 100
+                regressions.append(f"{stage} {metric}: {old[metric]} -> {stats[metric]} (+{change:.0f}%)")
+    return regressions
+
+
+def print_report(report: dict, baseline: dict = None):
+    print(f"\n{'stage':<10} {'items':>6} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'items/s':>10} {'vs base':>8}")
+    for stage, stats in report.items():
+        delta = ""
+        if baseline and baseline.get(stage, {}).get("p50_ms"):
+            delta = f"{(stats['p50_ms'] / baseline[stage]['p50_ms'] - 1) * 100:+.0f}%"
+        print(f"{stage:<10} {stats['items']:>6} {stats['p50_ms']:>10} {stats['p95_ms']:>10} "
+              f"{stats['p99_ms']:>10} {stats['items_per_sec']:>10} {delta:>8}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Screening pipeline stage benchmark")
+    parser.add_argument("--resumes", type=int, default=50)
+    parser.add_argument("--resume-lines", type=int, default=24, help="Max experience lines per resume (~15 words each)")
+    parser.add_argument("--jd-skills", type=int, default=8)
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed passes first")
+    parser.add_argument("--embedder", choices=["model", "hashing"], default="model",
+                        help="'model' = EMBEDDING_MODEL on EMBEDDING_BACKEND, 'hashing' = no model needed")
+    parser.add_argument("--baseline", help="Baseline JSON to compare against")
+    parser.add_argument("--save-baseline", help="Write this run's results here")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown vs baseline (0.2 = 20%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="Ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    config = {
+        "resumes": args.resumes, "resume_lines": args.resume_lines, "jd_skills": args.jd_skills,
+        "repeats": args.repeats, "embedder": args.embedder, "python": platform.python_version(),
+    }
+
+    resumes = synthetic_resumes(args.resumes, lines=(max(1, args.resume_lines // 2), args.resume_lines))
+    pdfs = [make_pdf(text) for text in resumes]
+    jd_text, skills = synthetic_jd(args.jd_skills)
+    print(f"{len(pdfs)} PDFs ({sum(map(len, pdfs)) // 1024} KB), {args.repeats} runs, embedder={args.embedder}")
+
+    if args.embedder == "model":
+        from services import load_model
+        embedder = load_model()
+    else:
+        embedder = HashingEmbedder()
+
+    for _ in range(args.warmup):
+        run_once(pdfs, jd_text, skills, embedder)
+
+    runs = []
+    for _ in range(args.repeats):
+        timings, items = run_once(pdfs, jd_text, skills, embedder)
+        runs.append(timings)
+    report = summarize(runs, items)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            saved = json.load(f)
+        baseline = saved["stages"]
+        if saved.get("config") != config:
+            print(f"WARNING: baseline was recorded with a different setup: {saved.get('config')}")
+
+    print_report(report, baseline)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump({"config": config, "stages": report}, f, indent=2)
+        print(f"\nBaseline saved to {args.save_baseline}")
+
+    if baseline:
+        regressions = compare(report, baseline, args.tolerance, args.min_delta_ms)
+        if regressions:
+            print(f"\nFAIL: {len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nOK: no stage slower than baseline by more than {args.tolerance:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
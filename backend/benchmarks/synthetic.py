@@ -0,0 +1,103 @@
+# backend/benchmarks/synthetic.py
+#
+# Deterministic fake resumes, JDs and PDFs for the benchmarks (no network, no fixtures).
+
+import random
+import textwrap
+import zlib
+import numpy as np
+
+SKILLS = [
+    "python", "aws", "docker", "kubernetes", "postgresql", "react", "terraform", "kafka",
+    "machine learning", "fastapi", "spark", "airflow", "go", "typescript", "ci/cd", "redis",
+]
+ROLES = ["backend engineer", "data scientist", "platform engineer", "ml engineer", "full stack developer"]
+VERBS = ["built", "migrated", "designed", "scaled", "maintained", "automated", "led the rollout of"]
+
+
+def synthetic_resumes(count: int, lines: tuple = (12, 24), seed: int = 7) -> list:
+    """Resume-shaped texts; each experience line is ~15 words, so the defaults chunk into 2-3 windows."""
+    rng = random.Random(seed)
+    resumes = []
+    for _ in range(count):
+        parts = [f"Summary\n{rng.choice(ROLES)} with {rng.randint(2, 12)} years of experience."]
+        parts.append("Experience")
+        for _ in range(rng.randint(*lines)):
+            skills = ", ".join(rng.sample(SKILLS, 3))
+            parts.append(f"{rng.choice(VERBS).capitalize()} services using {skills} "
+                         f"serving {rng.randint(1, 900)}k requests per day.")
+        parts.append("Skills\n" + ", ".join(rng.sample(SKILLS, 8)))
+        resumes.append("\n".join(parts))
+    return resumes
+
+
+def synthetic_jd(n_skills: int = 8, seed: int = 11) -> tuple:
+    """Returns (jd_text, required_skills)."""
+    rng = random.Random(seed)
+    skills = rng.sample(SKILLS, n_skills)
+    jd = (f"We are hiring a senior {rng.choice(ROLES)}.\n"
+          f"Requirements: {', '.join(skills)}.\n"
+          "You will own services end to end, from design to on-call, and mentor other engineers.")
+    return jd, skills
+
+
+# --- MINIMAL PDF WRITER (text only, Helvetica, enough for PyPDF2 to extract) ---
+def _escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(text: str, lines_per_page: int = 50, width: int = 90) -> bytes:
+    lines = []
+    for paragraph in text.split("\n"):
+        lines.extend(textwrap.wrap(paragraph, width) or [""])
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+
+    # 1 = catalog, 2 = page tree, 3 = font, then a (page, content) pair per page
+    objects = [None, None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for page_lines in pages:
+        body = "BT /F1 10 Tf 12 TL 50 780 Td " + " ".join(f"({_escape(l)}) Tj T*" for l in page_lines) + " ET"
+        content = body.encode("latin-1", "replace")
+        objects.append(None) # page, filled below once the content id is known
+        page_ids.append(len(objects))
+        objects.append(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+        objects[page_ids[-1] - 1] = (
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (page_ids[-1] + 1)
+        )
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    kids = b" ".join(b"%d 0 R" % i for i in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % len(page_ids)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + obj + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % off for off in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+class HashingEmbedder:
+    """
+    Stand-in for the real model when it isn't downloaded: hashed bag of words.
+    Not semantic, but the same shape and dtype, so every downstream stage is exercised.
+    """
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def encode(self, sentences, batch_size: int = 32, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else sentences
+        vectors = np.zeros((len(texts), self.dim), dtype="float32")
+        for row, text in enumerate(texts):
+            for token in text.lower().split():
+                vectors[row, zlib.crc32(token.encode("utf-8")) % self.dim] += 1.0
+        return vectors[0] if single else vectors
@@ -0,0 +1,116 @@
+# backend/chunking.py
+
+import re
+import numpy as np
+from config import (
+    CHUNK_WORDS, CHUNK_OVERLAP, MAX_CHUNKS_PER_RESUME,
+    CHUNK_SCORING, CHUNK_TOP_K, EMBED_BATCH_SIZE
+)
+
+# Typical resume headings, alone on their line (optionally followed by a colon)
+SECTION_HEADING = re.compile(
+    r"^\s*(summary|profile|objective|experience|work experience|professional experience|employment|"
+    r"education|skills|technical skills|projects|certifications|achievements|publications|"
+    r"awards|languages|interests)\s*:?\s*$",
+    re.IGNORECASE | re.MULTILINE
+)
+
+
+def split_sections(text: str) -> list:
+    # Cut the resume at its headings so a chunk never straddles two sections
+    starts = [m.start() for m in SECTION_HEADING.finditer(text)]
+    if not starts or starts[0] != 0:
+        starts = [0] + starts
+    bounds = starts + [len(text)]
+    sections = []
+    carry = ""
+    for i in range(len(starts)):
+        section = carry + text[bounds[i]:bounds[i + 1]]
+        # Fold tiny sections (a name line, a bare heading) into the next one
+        if len(section.split()) < CHUNK_OVERLAP and i < len(starts) - 1:
+            carry = section
+            continue
+        carry = ""
+        if section.strip():
+            sections.append(section)
+    return sections
+
+
+def chunk_text(text: str, max_chunks: int = MAX_CHUNKS_PER_RESUME) -> list:
+    """Section-aware sliding word windows, capped at max_chunks per document."""
+    step = max(1, CHUNK_WORDS - CHUNK_OVERLAP)
+    chunks = []
+    for section in split_sections(text):
+        words = section.split()
+        for start in range(0, len(words), step):
+            chunks.append(" ".join(words[start:start + CHUNK_WORDS]))
+            if len(chunks) == max_chunks:
+                return chunks
+            if start + CHUNK_WORDS >= len(words):
+                break
+    return chunks or [" ".join(text.split())]
+
+
+def chunk_documents(texts: list) -> tuple:
+    """Returns (chunks, owners): owners[i] is the index of the document chunk i came from."""
+    chunks, owners = [], []
+    for doc_id, text in enumerate(texts):
+        doc_chunks = chunk_text(text)
+        chunks.extend(doc_chunks)
+        owners.extend([doc_id] * len(doc_chunks))
+    return chunks, np.array(owners, dtype="int64")
+
+
+def encode_chunks(embedder, chunks: list, batch_size: int = EMBED_BATCH_SIZE) -> np.ndarray:
+    """
+    Encodes chunks in length-sorted batches (similar lengths = minimal padding)
+    and returns the vectors in the original chunk order.
+    """
+    if not chunks:
+        return np.empty((0, embedder.get_sentence_embedding_dimension()), dtype="float32")
+
+    order = sorted(range(len(chunks)), key=lambda i: len(chunks[i]))
+    parts = []
+    for start in range(0, len(order), batch_size):
+        batch = [chunks[i] for i in order[start:start + batch_size]]
+        parts.append(np.asarray(embedder.encode(batch, batch_size=batch_size), dtype="float32"))
+
+    sorted_vectors = np.vstack(parts)
+    vectors = np.empty_like(sorted_vectors)
+    vectors[np.array(order)] = sorted_vectors
+    return vectors
+
+
+def l2_normalize(vectors) -> np.ndarray:
+    """Row-wise L2 normalization (same result as faiss.normalize_L2, without importing faiss)."""
+    vectors = np.asarray(vectors, dtype="float32")
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def pool_scores(sims, owners, n_docs: int, mode: str = CHUNK_SCORING, k: int = CHUNK_TOP_K) -> np.ndarray:
+    """
+    Collapses chunk similarities into one score per document:
+    "max" takes the best chunk, "topk" averages the best k chunks.
+    Documents without any chunk score -inf.
+    """
+    sims = np.asarray(sims, dtype="float32")
+    owners = np.asarray(owners, dtype="int64")
+    scores = np.full(n_docs, -np.inf, dtype="float32")
+
+    if mode == "max" or k <= 1:
+        np.maximum.at(scores, owners, sims)
+        return scores
+
+    # Sort by document, best chunk first, then keep each document's first k
+    order = np.lexsort((-sims, owners))
+    sorted_owners = owners[order]
+    sorted_sims = sims[order]
+    group_start = np.searchsorted(sorted_owners, sorted_owners, side="left")
+    keep = (np.arange(len(order)) - group_start) < k
+
+    totals = np.bincount(sorted_owners[keep], weights=sorted_sims[keep], minlength=n_docs)
+    counts = np.bincount(sorted_owners[keep], minlength=n_docs)
+    has_chunks = counts > 0
+    scores[has_chunks] = (totals[has_chunks] / counts[has_chunks]).astype("float32")
+    return scores
@@ -25,8 +25,186 @@ GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile") # Default if not
 
 # Local Embeddings (Fast & Free)
 EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+# Inference runtime: "torch" (PyTorch fp32), "onnx" (ONNX Runtime fp32) or "onnx-int8" (dynamically quantized)
+# The ONNX backends need: pip install "sentence-transformers[onnx]"
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+ONNX_INT8_FILE = os.getenv("ONNX_INT8_FILE", "onnx/model_qint8_avx2.onnx") # Pre-quantized export on the HF Hub
 
 
 # Ollama Settings (Optional fallback)
 OLLAMA_URL = "http://localhost:11434/api/generate"
-MODEL_NAME = "gemma3:1b"
\ No newline at end of file
+MODEL_NAME = "gemma3:1b"
+
+# Persistent Candidate Index (HNSW vectors + SQLite metadata on disk)
+DATA_DIR = os.getenv("DATA_DIR", "data")
+RESUME_INDEX_PATH = os.getenv("RESUME_INDEX_PATH", os.path.join(DATA_DIR, "resume_index.faiss"))
+RESUME_DB_PATH = os.getenv("RESUME_DB_PATH", os.path.join(DATA_DIR, "resumes.db"))
+HNSW_M = int(os.getenv("HNSW_M", 32))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", 200))
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", 128))
+# Rebuild the index once this fraction of its vectors belongs to deleted resumes
+INDEX_REBUILD_RATIO = float(os.getenv("INDEX_REBUILD_RATIO", 0.2))
+# Most candidates one /resumes/search call may ask for (each hit gets its own gap analysis)
+SEARCH_MAX_TOP_K = int(os.getenv("SEARCH_MAX_TOP_K", 100))
+
+
+# Embedding Cache (in-memory LRU in front of an on-disk SQLite tier)
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", 10000)) # Entries kept in memory
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", os.path.join(DATA_DIR, "embeddings.db"))
+
+
+# PDF Ingestion (parsed from upload bytes across a process pool)
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", os.cpu_count() or 1))
+PDF_PARSE_TIMEOUT = float(os.getenv("PDF_PARSE_TIMEOUT", 30)) # Seconds per file
+
+
+# LLM Client Pooling (shared async clients, one concurrency cap per provider)
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", 60)) # Seconds per call
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", 20)) # Pooled HTTP connections per client
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", 8))
+GROQ_MAX_CONCURRENCY = int(os.getenv("GROQ_MAX_CONCURRENCY", 8))
+OLLAMA_MAX_CONCURRENCY = int(os.getenv("OLLAMA_MAX_CONCURRENCY", 2)) # Local model, keep it small
+
+
+# LLM Response Cache (exact-match on provider + model + normalized prompt)
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(DATA_DIR, "llm_cache.db"))
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", 7 * 24 * 3600)) # Seconds
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 5000))
+LLM_CACHE_TOUCH_INTERVAL = int(os.getenv("LLM_CACHE_TOUCH_INTERVAL", 300)) # Seconds; a hit refreshes last_access at most this often
+
+
+# Resume Chunking (all-MiniLM-L6-v2 only reads the first 256 word pieces of each input)
+CHUNK_WORDS = int(os.getenv("CHUNK_WORDS", 160)) # ~200-230 word pieces, under the model's window
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", 30))
+MAX_CHUNKS_PER_RESUME = int(os.getenv("MAX_CHUNKS_PER_RESUME", 20)) # Bounds memory on very long CVs
+CHUNK_SCORING = os.getenv("CHUNK_SCORING", "max") # "max" or "topk" (mean of the best CHUNK_TOP_K chunks)
+CHUNK_TOP_K = int(os.getenv("CHUNK_TOP_K", 3))
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", 32))
+
+
+# Background Screening Jobs (durable SQLite queue shared by any number of worker processes)
+JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", os.path.join(DATA_DIR, "jobs.db"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 1)) # Local worker processes, started by one API process per host (0 = run worker.py yourself)
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", 300)) # A job whose worker goes silent this long is retried
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", 1.0)) # Seconds an idle worker waits between polls
+
+
+# Upload Limits (over-limit files get a per-file status instead of taking down the worker)
+MAX_FILE_BYTES = int(os.getenv("MAX_FILE_BYTES", 10 * 1024 * 1024)) # Per PDF
+MAX_REQUEST_BYTES = int(os.getenv("MAX_REQUEST_BYTES", 200 * 1024 * 1024)) # All files in one request
+MAX_PDF_PAGES = int(os.getenv("MAX_PDF_PAGES", 50))
+MAX_RESUME_CHARS = int(os.getenv("MAX_RESUME_CHARS", 100_000)) # Longer text is truncated
+UPLOAD_READ_CHUNK = 1024 * 1024
+UPLOAD_SPOOL_BYTES = int(os.getenv("UPLOAD_SPOOL_BYTES", 512 * 1024)) # An accepted file past this waits on disk, not in memory
+
+
+# Startup
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true" # Load + run the model once before /readyz passes
+
+
+# Embedding Server (one process owns the model; API and job workers become thin clients)
+EMBEDDING_MODE = os.getenv("EMBEDDING_MODE", "local") # "local" (model in every process) or "server"
+EMBEDDING_SOCKET = os.getenv("EMBEDDING_SOCKET", os.path.join(DATA_DIR, "embedder.sock"))
+EMBEDDING_SERVER_TIMEOUT = float(os.getenv("EMBEDDING_SERVER_TIMEOUT", 60)) # Seconds a client waits for one encode
+
+
+# Embedding Micro-Batching (concurrent encode() calls share one forward pass)
+EMBED_BATCHING_ENABLED = os.getenv("EMBED_BATCHING_ENABLED", "true").lower() == "true"
+EMBED_BATCH_MAX_SIZE = int(os.getenv("EMBED_BATCH_MAX_SIZE", 64)) # Texts per coalesced batch
+EMBED_BATCH_MAX_DELAY_MS = float(os.getenv("EMBED_BATCH_MAX_DELAY_MS", 5)) # How long the first call waits for company
+
+
+# CPU Work Pools (one bounded pool per endpoint class; a full pool answers 429 + Retry-After)
+SCREENING_POOL_WORKERS = int(os.getenv("SCREENING_POOL_WORKERS", 2)) # /screen_resumes, /resumes/ingest, deletes
+SCREENING_POOL_QUEUE = int(os.getenv("SCREENING_POOL_QUEUE", 8))
+SEARCH_POOL_WORKERS = int(os.getenv("SEARCH_POOL_WORKERS", 4)) # /resumes/search
+SEARCH_POOL_QUEUE = int(os.getenv("SEARCH_POOL_QUEUE", 32))
+EVALUATE_POOL_WORKERS = int(os.getenv("EVALUATE_POOL_WORKERS", 1)) # /evaluate_screener
+EVALUATE_POOL_QUEUE = int(os.getenv("EVALUATE_POOL_QUEUE", 4))
+EXECUTOR_POOLS = {
+    "screening": (SCREENING_POOL_WORKERS, SCREENING_POOL_QUEUE),
+    "search": (SEARCH_POOL_WORKERS, SEARCH_POOL_QUEUE),
+    "evaluate": (EVALUATE_POOL_WORKERS, EVALUATE_POOL_QUEUE),
+}
+PDF_QUEUE_FILES = int(os.getenv("PDF_QUEUE_FILES", 400)) # PDFs allowed to wait for the parsing process pool
+
+
+# LLM Mode: "live" (real providers), "mock" (local fake, no keys), "record" (live + save to cassette), "replay" (cassette only)
+LLM_MODE = os.getenv("LLM_MODE", "live")
+LLM_CASSETTE_PATH = os.getenv("LLM_CASSETTE_PATH", os.path.join(DATA_DIR, "llm_cassette.jsonl"))
+# Mock provider: latency to first token is lognormal around the median, then tokens arrive at a fixed rate
+MOCK_LATENCY_MEDIAN_MS = float(os.getenv("MOCK_LATENCY_MEDIAN_MS", 400))
+MOCK_LATENCY_SIGMA = float(os.getenv("MOCK_LATENCY_SIGMA", 0.5)) # 0 = constant latency; 1 = heavy tail
+MOCK_TOKENS_PER_SEC = float(os.getenv("MOCK_TOKENS_PER_SEC", 80)) # 0 = whole reply at once
+MOCK_RESPONSE_TOKENS = int(os.getenv("MOCK_RESPONSE_TOKENS", 150)) # Length of free-text replies
+MOCK_ERROR_RATE = float(os.getenv("MOCK_ERROR_RATE", 0.0)) # Fraction of calls that fail (429 / 500 / 503 / timeout)
+MOCK_SEED = int(os.getenv("MOCK_SEED", 42))
+
+
+# LLM Routing (per-endpoint provider preference, first = primary; override with e.g. LLM_ROUTE_JD=groq,gemini)
+def _route(endpoint: str, default: str) -> list:
+    return [p.strip() for p in os.getenv(f"LLM_ROUTE_{endpoint.upper()}", default).split(",") if p.strip()]
+
+LLM_ROUTES = {
+    "jd": _route("jd", "gemini,groq"),
+    "interview": _route("interview", "gemini,groq"),
+    "skills": _route("skills", "groq,gemini"),
+    "judge": _route("judge", "groq,gemini"),
+    "summary": _route("summary", "groq,gemini"), # Rolling interview summaries
+}
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 2)) # Per provider, on 429 / 5xx / timeout
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", 0.5)) # Seconds; full jitter, doubling per attempt
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", 4.0))
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "true").lower() == "true"
+LLM_HEDGE_DEFAULT_DELAY = float(os.getenv("LLM_HEDGE_DEFAULT_DELAY", 10.0)) # Until a provider has enough samples for a p95
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", 20))
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", 5)) # Consecutive failures that open a provider's circuit
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", 30.0)) # Seconds before a trial call is let through
+
+
+# Logging (JSON lines written by a background thread; the request path only enqueues)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FILE = os.getenv("LOG_FILE", "server_logs.log") # Empty = stdout only
+# "external": reopen the file when logrotate moves it (safe with any number of processes writing it).
+# "size": rotate in-process past LOG_MAX_BYTES; only for a single process (workers would race the renames).
+LOG_ROTATION = os.getenv("LOG_ROTATION", "external")
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", 10 * 1024 * 1024)) # Rotate the file past this size ("size" mode)
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", 5))
+LOG_CONSOLE_FORMAT = os.getenv("LOG_CONSOLE_FORMAT", "json") # "json" or "text" (human-readable, for development)
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", 1.0)) # Fraction of per-request lines kept; errors and slow requests always are
+LOG_SLOW_REQUEST_MS = float(os.getenv("LOG_SLOW_REQUEST_MS", 2000))
+
+
+# Request Tracing (span tree per request; the request ID doubles as the trace ID)
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+TRACE_FILE = os.getenv("TRACE_FILE", os.path.join(DATA_DIR, "traces.jsonl")) # Empty = don't export
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", 1.0)) # Fraction of traces exported; slow ones always are
+TRACE_SLOW_MS = float(os.getenv("TRACE_SLOW_MS", 5000)) # Past this, the whole span tree is also logged
+TRACE_MAX_SPANS = int(os.getenv("TRACE_MAX_SPANS", 2000)) # Per trace; a 1000-file batch still fits
+
+
+# Interview Sessions (server-side transcript: recent turns verbatim, older ones folded into a running summary)
+INTERVIEW_DB_PATH = os.getenv("INTERVIEW_DB_PATH", os.path.join(DATA_DIR, "interviews.db")) # Shared by the API workers on this host
+INTERVIEW_SESSION_TTL = int(os.getenv("INTERVIEW_SESSION_TTL", 3600)) # Seconds idle before a session expires
+INTERVIEW_MAX_SESSIONS = int(os.getenv("INTERVIEW_MAX_SESSIONS", 1000)) # Least recently used go first
+INTERVIEW_RECENT_TURNS = int(os.getenv("INTERVIEW_RECENT_TURNS", 6)) # Messages kept verbatim in the prompt
+INTERVIEW_SUMMARY_MAX_CHARS = int(os.getenv("INTERVIEW_SUMMARY_MAX_CHARS", 1500))
+INTERVIEW_JD_MAX_CHARS = int(os.getenv("INTERVIEW_JD_MAX_CHARS", 6000))
+INTERVIEW_TURN_LEASE = float(os.getenv("INTERVIEW_TURN_LEASE", 300)) # Seconds a turn holds its session; a dropped one frees it after this
+
+
+# Prompt Budgets (input tokens; a route's prompt must fit the smallest budget among its providers)
+# Counts use tiktoken when installed (pip install tiktoken), otherwise a ~4 chars/token estimate.
+PROMPT_BUDGETS = {
+    "gemini": int(os.getenv("PROMPT_BUDGET_GEMINI", 8000)),
+    "groq": int(os.getenv("PROMPT_BUDGET_GROQ", 6000)),
+    "ollama": int(os.getenv("PROMPT_BUDGET_OLLAMA", 3000)),
+}
+
+
+# Interview Audits (POST /evaluate_interview/batch; LLM-as-a-judge over stored transcripts)
+JUDGE_BATCH_CONCURRENCY = int(os.getenv("JUDGE_BATCH_CONCURRENCY", 8)) # Judge calls in flight per batch; clients may ask for fewer
+JUDGE_BATCH_MAX_ITEMS = int(os.getenv("JUDGE_BATCH_MAX_ITEMS", 500)) # Transcripts per request
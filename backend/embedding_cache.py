@@ -0,0 +1,157 @@
+# backend/embedding_cache.py
+
+import os
+import logging
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+from logger import logger
+from metrics import CACHE
+from tracing import span
+
+
+def normalize_text(text: str) -> str:
+    # Whitespace-only differences tokenize identically, so they share a cache entry
+    return " ".join(text.split())
+
+
+class CachedEmbedder:
+    """
+    Drop-in wrapper around a SentenceTransformer-style model.
+    Embeddings are keyed by sha256(model name + normalized text) and looked up
+    in a bounded in-memory LRU first, then in SQLite on disk. Only the misses
+    are sent through the model, in one batch.
+    """
+
+    def __init__(self, model, model_name: str, max_items: int, db_path: str = None):
+        self.model = model
+        self.model_name = model_name
+        self.max_items = max_items
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._db = None
+        if db_path:
+            folder = os.path.dirname(db_path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    vector BLOB NOT NULL
+                )
+            """)
+            self._db.commit()
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\x00{text}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, vector):
+        # Caller holds the lock
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+
+    def encode(self, sentences, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [normalize_text(t) for t in ([sentences] if single else sentences)]
+        keys = [self._key(t) for t in texts]
+        vectors = [None] * len(texts)
+        if not texts:
+            return np.empty((0, self.model.get_sentence_embedding_dimension()), dtype="float32")
+
+        memory_hits = disk_hits = 0
+        with self._lock:
+            # Tier 1: memory
+            for i, key in enumerate(keys):
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    vectors[i] = self._memory[key]
+                    self.hits += 1
+                    memory_hits += 1
+
+            # Tier 2: disk
+            wanted = list({keys[i] for i, v in enumerate(vectors) if v is None})
+            if wanted and self._db is not None:
+                found = {}
+                for start in range(0, len(wanted), 500): # Stay under SQLite's variable limit
+                    chunk = wanted[start:start + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    rows = self._db.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+                    ).fetchall()
+                    found.update({k: np.frombuffer(blob, dtype="float32") for k, blob in rows})
+
+                for i, key in enumerate(keys):
+                    if vectors[i] is None and key in found:
+                        vectors[i] = found[key]
+                        self._remember(key, found[key])
+                        self.hits += 1
+                        self.disk_hits += 1
+                        disk_hits += 1
+
+        # Tier 3: the model, once per distinct missing text
+        missing = {}
+        for i, key in enumerate(keys):
+            if vectors[i] is None:
+                missing.setdefault(key, texts[i])
+
+        CACHE.labels("embedding", "memory_hit").inc(memory_hits)
+        CACHE.labels("embedding", "disk_hit").inc(disk_hits)
+        CACHE.labels("embedding", "miss").inc(len(missing))
+
+        if missing:
+            miss_keys = list(missing)
+            with span("embed.model", texts=len(miss_keys), cache_hits=memory_hits + disk_hits):
+                encoded = np.asarray(self.model.encode([missing[k] for k in miss_keys], **kwargs), dtype="float32")
+            fresh = dict(zip(miss_keys, encoded))
+
+            with self._lock:
+                self.misses += len(miss_keys)
+                for key, vector in fresh.items():
+                    self._remember(key, vector)
+                if self._db is not None:
+                    self._db.executemany(
+                        "INSERT OR IGNORE INTO embeddings (key, model, vector) VALUES (?, ?, ?)",
+                        [(key, self.model_name, vector.tobytes()) for key, vector in fresh.items()]
+                    )
+                    self._db.commit()
+
+            for i, key in enumerate(keys):
+                if vectors[i] is None:
+                    vectors[i] = fresh[key]
+
+            if logger.isEnabledFor(logging.DEBUG): # Skip building the message (stats() takes the lock) when debug is off
+                logger.debug(f"Embedding cache: {len(miss_keys)} misses encoded, stats={self.stats()}")
+
+        # Copy out so callers can normalize in place without touching cached vectors
+        result = np.array(np.vstack(vectors), dtype="float32")
+        return result[0] if single else result
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "model": self.model_name,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "memory_items": len(self._memory),
+            }
+
+    def __getattr__(self, name):
+        # Anything we don't wrap (get_sentence_embedding_dimension, tokenizer, ...) goes to the model
+        if name == "model":
+            raise AttributeError(name)
+        return getattr(self.model, name)
@@ -0,0 +1,244 @@
+# backend/embedding_server.py
+#
+# Standalone embedding service: one process holds the model, every API worker and
+# screening worker on the box talks to it over a Unix socket (EMBEDDING_MODE=server).
+#
+#   cd backend
+#   python embedding_server.py
+#
+# Wire format: 4-byte big-endian length + JSON, both ways. Texts travel in the request,
+# vectors come back through a shared memory block the client allocates, so a batch of
+# chunk embeddings is never serialized.
+
+import os
+import json
+import contextlib
+import time
+import socket
+import struct
+import threading
+import socketserver
+from multiprocessing import shared_memory
+import numpy as np
+from config import (
+    EMBEDDING_MODEL, EMBEDDING_BACKEND, EMBEDDING_SOCKET, EMBEDDING_SERVER_TIMEOUT, EMBED_BATCHING_ENABLED
+)
+from logger import logger
+
+# NOTE: API processes import this module for the client, so no model imports up here.
+
+_HEADER = struct.Struct(">I")
+
+
+class EmbeddingServerError(Exception):
+    pass
+
+
+def _recv_exact(sock, size: int) -> bytes:
+    buffer = bytearray()
+    while len(buffer) < size:
+        chunk = sock.recv(size - len(buffer))
+        if not chunk:
+            raise ConnectionError("embedding server connection closed")
+        buffer.extend(chunk)
+    return bytes(buffer)
+
+
+def send_message(sock, message: dict):
+    payload = json.dumps(message).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(payload)) + payload)
+
+
+def recv_message(sock) -> dict:
+    (size,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    return json.loads(_recv_exact(sock, size))
+
+
+# --- CLIENT (used by get_embedder() when EMBEDDING_MODE=server) ---
+class EmbeddingClient:
+    """
+    Looks like a SentenceTransformer to the rest of the app (encode +
+    get_sentence_embedding_dimension), but the model lives in the embedding server.
+    Each thread keeps its own connection.
+    """
+
+    def __init__(self, socket_path: str = EMBEDDING_SOCKET, timeout: float = EMBEDDING_SERVER_TIMEOUT):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._info = None
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        return sock
+
+    def _request(self, message: dict) -> dict:
+        # One retry on a fresh connection covers a server restart between calls
+        for attempt in range(2):
+            sock = getattr(self._local, "sock", None)
+            try:
+                if sock is None:
+                    sock = self._local.sock = self._connect()
+                send_message(sock, message)
+                reply = recv_message(sock)
+                break
+            except (ConnectionError, FileNotFoundError, socket.timeout, OSError) as e:
+                if sock is not None:
+                    sock.close()
+                self._local.sock = None
+                if attempt == 1 or isinstance(e, socket.timeout):
+                    raise EmbeddingServerError(f"embedding server unavailable at {self.socket_path}: {e}") from e
+
+        if not reply.get("ok"):
+            raise EmbeddingServerError(reply.get("error", "unknown embedding server error"))
+        return reply
+
+    def info(self) -> dict:
+        if self._info is None:
+            self._info = self._request({"op": "info"})
+        return self._info
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.info()["dim"]
+
+    def encode(self, sentences, batch_size: int = None, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        dim = self.get_sentence_embedding_dimension()
+        if not texts:
+            return np.empty((0, dim), dtype="float32")
+
+        shm = shared_memory.SharedMemory(create=True, size=len(texts) * dim * 4)
+        try:
+            self._request({
+                "op": "encode",
+                "texts": texts,
+                "shm": shm.name,
+                "batch_size": batch_size,
+                "normalize_embeddings": bool(kwargs.get("normalize_embeddings", False)),
+            })
+            view = np.ndarray((len(texts), dim), dtype="float32", buffer=shm.buf)
+            vectors = view.copy()
+            del view # The block can't be closed while a view still points into it
+        finally:
+            shm.close()
+            shm.unlink()
+        return vectors[0] if single else vectors
+
+    def ping(self) -> bool:
+        try:
+            self._request({"op": "info"})
+            return True
+        except EmbeddingServerError:
+            return False
+
+
+# --- SERVER ---
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        # A client keeps its connection open and sends many requests on it
+        while True:
+            try:
+                message = recv_message(self.request)
+            except (ConnectionError, OSError, ValueError):
+                return
+            try:
+                reply = self.server.dispatch(message)
+            except Exception as e:
+                logger.error(f"Embedding server request failed: {e}")
+                reply = {"ok": False, "error": str(e)}
+            try:
+                send_message(self.request, reply)
+            except OSError:
+                return
+
+
+class EmbeddingServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    request_queue_size = 128 # Every API/job worker thread may connect at once
+
+    def __init__(self, model, socket_path: str = EMBEDDING_SOCKET, serialize: bool = True):
+        self.model = model
+        self.dim = model.get_sentence_embedding_dimension()
+        # A bare model takes one request at a time; a batcher already owns its model's thread
+        self._model_lock = threading.Lock() if serialize else contextlib.nullcontext()
+        self._stats_lock = threading.Lock()
+        self.requests = 0
+        self.texts = 0
+
+        folder = os.path.dirname(socket_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        if os.path.exists(socket_path):
+            if EmbeddingClient(socket_path, timeout=2).ping():
+                raise RuntimeError(f"An embedding server is already listening on {socket_path}")
+            os.remove(socket_path) # Left behind by a crashed server
+        super().__init__(socket_path, _Handler)
+
+    def dispatch(self, message: dict) -> dict:
+        op = message.get("op")
+        if op == "info":
+            reply = {
+                "ok": True, "dim": self.dim, "model": EMBEDDING_MODEL, "backend": EMBEDDING_BACKEND,
+                "requests": self.requests, "texts": self.texts,
+            }
+            if hasattr(self.model, "stats"):
+                reply["batching"] = self.model.stats()
+            return reply
+        if op == "encode":
+            return self._encode(message)
+        return {"ok": False, "error": f"unknown op '{op}'"}
+
+    def _encode(self, message: dict) -> dict:
+        texts = message["texts"]
+        kwargs = {"normalize_embeddings": message.get("normalize_embeddings", False)}
+        if message.get("batch_size"):
+            kwargs["batch_size"] = message["batch_size"]
+
+        # With a batcher in front, requests from different API workers share forward passes
+        with self._model_lock:
+            vectors = np.asarray(self.model.encode(texts, **kwargs), dtype="float32")
+        with self._stats_lock:
+            self.requests += 1
+            self.texts += len(texts)
+
+        # The client owns (and unlinks) the block, we only write into it
+        shm = shared_memory.SharedMemory(name=message["shm"], track=False)
+        try:
+            if shm.size < vectors.nbytes:
+                raise ValueError(f"shared memory block too small ({shm.size} < {vectors.nbytes} bytes)")
+            view = np.ndarray(vectors.shape, dtype="float32", buffer=shm.buf)
+            view[:] = vectors
+            del view
+        finally:
+            shm.close()
+        return {"ok": True, "rows": int(vectors.shape[0]), "dim": int(vectors.shape[1])}
+
+
+def serve(socket_path: str = EMBEDDING_SOCKET):
+    from services import load_model, make_batcher
+
+    logger.info(f"Embedding server loading {EMBEDDING_MODEL} ({EMBEDDING_BACKEND})...")
+    start = time.perf_counter()
+    model = load_model(EMBEDDING_BACKEND)
+    model.encode(["warmup: python developer with aws experience"])
+    logger.info(f"Embedding server ready in {time.perf_counter() - start:.2f}s on {socket_path}.")
+
+    if EMBED_BATCHING_ENABLED:
+        server = EmbeddingServer(make_batcher(model), socket_path, serialize=False)
+    else:
+        server = EmbeddingServer(model, socket_path)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+
+
+if __name__ == "__main__":
+    serve()
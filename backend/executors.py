@@ -0,0 +1,141 @@
+# backend/executors.py
+
+import math
+import time
+import asyncio
+import threading
+import functools
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from config import EXECUTOR_POOLS
+
+
+class PoolSaturated(Exception):
+    """A pool's queue is full. main.py turns this into 429 + Retry-After."""
+
+    def __init__(self, pool: str, retry_after: int):
+        super().__init__(pool, retry_after)
+        self.pool = pool
+        self.retry_after = retry_after
+
+
+class Admission:
+    """
+    Queue-depth admission control: at most `capacity` tasks in flight (running + waiting).
+    Work beyond that is refused straight away with an estimate of when to come back.
+    """
+
+    def __init__(self, name: str, capacity: int, workers: int):
+        self.name = name
+        self.capacity = capacity
+        self.workers = workers
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.rejected = 0
+        self.avg_seconds = 0.0 # Moving average of task time, for Retry-After
+
+    def retry_after(self) -> int:
+        # Time for the current backlog to drain at the observed task rate
+        return max(1, math.ceil(self.avg_seconds * self.pending / self.workers))
+
+    def admit(self, tasks: int = 1):
+        with self._lock:
+            # An idle gate takes any request, so one oversized batch can't be refused forever
+            if self.pending and self.pending + tasks > self.capacity:
+                self.rejected += 1
+                raise PoolSaturated(self.name, self.retry_after())
+            self.pending += tasks
+
+    def release(self, tasks: int = 1, seconds: float = None):
+        """`seconds` is the per-task time, when known."""
+        with self._lock:
+            self.pending -= tasks
+            if seconds is not None:
+                self.avg_seconds = seconds if not self.avg_seconds else 0.8 * self.avg_seconds + 0.2 * seconds
+
+    def release_when_done(self, future, start: float = None):
+        """
+        Frees one slot once `future` (a concurrent.futures.Future) settles. Its awaiter may be
+        cancelled long before that, but the work keeps its worker busy until it finishes.
+        """
+        def done(_):
+            elapsed = time.perf_counter() - start if start is not None and not future.cancelled() else None
+            self.release(seconds=elapsed)
+
+        future.add_done_callback(done)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "capacity": self.capacity,
+                "pending": self.pending,
+                "rejected": self.rejected,
+                "avg_seconds": round(self.avg_seconds, 3),
+            }
+
+
+class BoundedPool:
+    """Thread pool behind an Admission gate: `workers` tasks run, `max_queue` more may wait."""
+
+    def __init__(self, name: str, workers: int, max_queue: int):
+        self.name = name
+        self.admission = Admission(name, workers + max_queue, workers)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"{name}-pool")
+
+    async def run(self, fn, *args, **kwargs):
+        from tracing import span # Not at module level: the PDF worker processes import this module
+
+        self.admission.admit()
+        start = time.perf_counter()
+        with span(f"pool.{self.name}") as current:
+            def call():
+                if current is not None:
+                    current.set(queue_ms=round((time.perf_counter() - start) * 1000, 2))
+                return fn(*args, **kwargs)
+
+            # Carry the request's context (request id, tracing) into the worker thread
+            ctx = contextvars.copy_context()
+            try:
+                future = self._executor.submit(functools.partial(ctx.run, call))
+            except BaseException:
+                self.admission.release()
+                raise
+            # Cancelling the await drops a task that is still queued; a running one keeps its slot until it returns
+            self.admission.release_when_done(future, start)
+            return await asyncio.wrap_future(future)
+
+    def stats(self) -> dict:
+        return self.admission.stats()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+# One pool per endpoint class, so a heavy screening batch can't starve searches
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_pool(name: str) -> BoundedPool:
+    with _pools_lock:
+        if name not in _pools:
+            workers, max_queue = EXECUTOR_POOLS[name]
+            _pools[name] = BoundedPool(name, workers, max_queue)
+        return _pools[name]
+
+
+async def run_in_pool(name: str, fn, *args, **kwargs):
+    """Runs blocking CPU work on the named pool. Raises PoolSaturated when it is full."""
+    return await get_pool(name).run(fn, *args, **kwargs)
+
+
+def pool_stats() -> dict:
+    with _pools_lock:
+        return {name: pool.stats() for name, pool in _pools.items()}
+
+
+def shutdown_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown()
+        _pools.clear()
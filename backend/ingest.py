@@ -0,0 +1,283 @@
+# backend/ingest.py
+
+import io
+import time
+import tempfile
+import signal
+import asyncio
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from PyPDF2 import PdfReader
+from config import (
+    PDF_WORKERS, PDF_PARSE_TIMEOUT,
+    MAX_FILE_BYTES, MAX_REQUEST_BYTES, MAX_PDF_PAGES, MAX_RESUME_CHARS,
+    UPLOAD_READ_CHUNK, UPLOAD_SPOOL_BYTES, PDF_QUEUE_FILES
+)
+from executors import Admission
+
+# NOTE: This module is imported by the pool's worker processes,
+# so keep its imports light (no models, no LLM clients).
+
+
+class ParseTimeout(BaseException):
+    """Raised by SIGALRM mid-parse. Not an Exception, so a broad except inside PyPDF2 can't swallow it."""
+
+
+class UploadRejected(Exception):
+    """A file we refuse to process. `status` goes straight into the per-file report."""
+
+    def __init__(self, status: str, detail: str):
+        super().__init__(status, detail)
+        self.status = status
+        self.detail = detail
+
+
+def _on_alarm(signum, frame):
+    raise ParseTimeout()
+
+
+def parse_pdf_bytes(data: bytes, timeout: float = PDF_PARSE_TIMEOUT,
+                    max_pages: int = MAX_PDF_PAGES, max_chars: int = MAX_RESUME_CHARS) -> str:
+    """
+    Runs inside a pool worker: PDF bytes in, plain text out. Never touches disk.
+    Rejects PDFs over max_pages and stops extracting once max_chars is reached.
+    """
+    # A timer inside the worker frees the process itself, not just the waiting request
+    use_alarm = hasattr(signal, "setitimer")
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        reader = PdfReader(io.BytesIO(data))
+        page_count = len(reader.pages)
+        if page_count > max_pages:
+            raise UploadRejected("too_many_pages", f"{page_count} pages (limit {max_pages})")
+
+        parts = []
+        size = 0
+        for page in reader.pages:
+            text = page.extract_text() or ""
+            parts.append(text)
+            size += len(text)
+            if size >= max_chars:
+                break
+        return "".join(parts)[:max_chars]
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+async def read_upload(file, max_bytes: int = MAX_FILE_BYTES) -> tuple:
+    """
+    Copies an UploadFile in chunks into a spool (memory up to UPLOAD_SPOOL_BYTES, then disk),
+    giving up as soon as it passes max_bytes. Returns (spool, size) with the spool rewound.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_BYTES)
+    size = 0
+    try:
+        while True:
+            chunk = await file.read(UPLOAD_READ_CHUNK)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadRejected("too_large", f"over {max_bytes // (1024 * 1024)} MB per file")
+            if spool._rolled:
+                await asyncio.to_thread(spool.write, chunk) # On disk now: keep the write off the event loop
+            else:
+                spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool, size
+
+
+async def read_uploads(files, max_request_bytes: int = MAX_REQUEST_BYTES) -> tuple:
+    """
+    Reads a request's uploads one at a time under the per-file and per-request caps.
+    Returns (accepted, rejected): accepted is [(filename, spool)], rejected holds report entries.
+    The caller owns the spools and must close them (close_uploads).
+    """
+    accepted, rejected = [], []
+    total = 0
+    try:
+        for file in files:
+            try:
+                spool, size = await read_upload(file)
+            except UploadRejected as e:
+                rejected.append({"filename": file.filename, "status": e.status, "detail": e.detail})
+                continue
+            finally:
+                await file.close()
+            if total + size > max_request_bytes:
+                # The file itself is fine: it is the request's budget that ran out
+                spool.close()
+                rejected.append({
+                    "filename": file.filename, "status": "request_too_large",
+                    "detail": f"request over {max_request_bytes // (1024 * 1024)} MB"
+                })
+                continue
+            total += size
+            accepted.append((file.filename, spool))
+    except BaseException:
+        close_uploads(accepted)
+        raise
+    return accepted, rejected
+
+
+def close_uploads(uploads):
+    for _, spool in uploads:
+        spool.close()
+
+
+# Singleton Pattern: one process pool per API worker, started on first use
+_pdf_pool = None
+_pdf_pool_lock = threading.Lock()
+
+def get_pdf_pool() -> ProcessPoolExecutor:
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            _pdf_pool = ProcessPoolExecutor(max_workers=PDF_WORKERS)
+        return _pdf_pool
+
+
+def discard_pdf_pool(pool: ProcessPoolExecutor):
+    # A worker died (OOM, killed): every later submit would fail, so the next caller starts a fresh pool
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is pool:
+            _pdf_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+# Files parsing or waiting in this API worker; past the cap, requests get 429 instead of a longer queue
+pdf_admission = Admission("pdf", PDF_WORKERS + PDF_QUEUE_FILES, PDF_WORKERS)
+
+# Spooled files a request reads back into memory and hands to the pool at once
+PARSE_WINDOW = PDF_WORKERS * 2
+
+
+def shutdown_pdf_pool():
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is not None:
+            _pdf_pool.shutdown(wait=True, cancel_futures=True)
+            _pdf_pool = None
+
+
+async def parse_in_pool(data: bytes, submitted: list = None) -> str:
+    """
+    parse_pdf_bytes on the PDF process pool. If a pool worker dies, the pool is replaced
+    and BrokenProcessPool is raised for the file that was parsing.
+    The pool's future is appended to `submitted`, if given, so the caller can tell when the
+    worker is really done with the file (it keeps parsing if this coroutine is cancelled).
+    """
+    pool = get_pdf_pool()
+    try:
+        future = pool.submit(parse_pdf_bytes, data)
+    except BrokenProcessPool:
+        # Broke before this file reached it, so this file is not the culprit: retry once on a fresh pool
+        discard_pdf_pool(pool)
+        pool = get_pdf_pool()
+        future = pool.submit(parse_pdf_bytes, data)
+    if submitted is not None:
+        submitted.append(future)
+    try:
+        if hasattr(signal, "setitimer"):
+            return await asyncio.wrap_future(future)
+        # No in-worker timer on this platform, so give up on the result from the outside
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout=PDF_PARSE_TIMEOUT)
+    except BrokenProcessPool:
+        discard_pdf_pool(pool)
+        raise
+
+
+async def parse_upload(filename: str, data: bytes, submitted: list = None) -> tuple:
+    """One file through the pool. Returns (resume or None, report entry); never raises for a bad file."""
+    # Not at module level: the worker processes import this module
+    from tracing import span
+
+    with span("pdf_extract", file=filename, bytes=len(data)) as current:
+        resume, entry = await _parse_upload(filename, data, submitted)
+        if current is not None:
+            current.set(result=entry["status"])
+        return resume, entry
+
+
+async def _parse_upload(filename: str, data: bytes, submitted: list = None) -> tuple:
+    from metrics import STAGE_LATENCY
+
+    start = time.perf_counter()
+    try:
+        text = await parse_in_pool(data, submitted)
+    except UploadRejected as e:
+        return None, {"filename": filename, "status": e.status, "detail": e.detail}
+    except (ParseTimeout, asyncio.TimeoutError):
+        return None, {"filename": filename, "status": "timeout"}
+    except BrokenProcessPool:
+        return None, {"filename": filename, "status": "error", "error": "PDF worker crashed"}
+    except Exception as e:
+        return None, {"filename": filename, "status": "error", "error": str(e)}
+    finally:
+        STAGE_LATENCY.labels("pdf_extract").observe(time.perf_counter() - start)
+
+    elapsed = round(time.perf_counter() - start, 3)
+    if not text.strip():
+        return None, {"filename": filename, "status": "empty", "seconds": elapsed}
+    entry = {"filename": filename, "status": "ok", "seconds": elapsed}
+    if len(text) >= MAX_RESUME_CHARS:
+        entry["truncated"] = True
+    return {"filename": filename, "text": text}, entry
+
+
+async def extract_uploads(files) -> tuple:
+    """
+    Parses a request's uploads in parallel, straight from memory.
+    Returns (resume_data, report): resume_data holds {"filename", "text"} for every
+    readable file, report holds one {"filename", "status", ...} entry per upload.
+    """
+    get_pdf_pool() # Start the workers before reading, not after
+
+    # Refuse the whole request up front rather than letting it queue behind everyone else
+    pdf_admission.admit(len(files))
+    start = time.perf_counter()
+    submitted = [] # Pool futures, one per file that reached the workers
+    try:
+        return await _extract_admitted(files, submitted)
+    finally:
+        # Per-file worker time, which is what Retry-After estimates are built from
+        per_file = (time.perf_counter() - start) * min(PDF_WORKERS, len(files)) / len(files) if files else None
+        # A cancelled request's files may still be parsing: their slots stay taken until the workers finish
+        running = [future for future in submitted if not future.done()]
+        pdf_admission.release(len(files) - len(running), seconds=per_file)
+        for future in running:
+            pdf_admission.release_when_done(future)
+
+
+async def _extract_admitted(files, submitted: list) -> tuple:
+    from tracing import span
+
+    # Reading is sequential and capped, so one huge upload can't exhaust memory
+    with span("read_uploads", files=len(files)):
+        accepted, report = await read_uploads(files)
+
+    window = asyncio.Semaphore(PARSE_WINDOW)
+
+    async def parse_spooled(filename, spool):
+        # Only the files about to be parsed are back in memory, not the whole request
+        async with window:
+            data = await asyncio.to_thread(spool.read)
+            return await parse_upload(filename, data, submitted)
+
+    try:
+        with span("pdf_parse", files=len(accepted)):
+            parsed = await asyncio.gather(*(parse_spooled(name, spool) for name, spool in accepted))
+    finally:
+        close_uploads(accepted)
+
+    resume_data = [data for data, _ in parsed if data is not None]
+    report.extend(entry for _, entry in parsed)
+    return resume_data, report
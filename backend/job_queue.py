@@ -0,0 +1,206 @@
+# backend/job_queue.py
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from config import JOB_QUEUE_PATH, JOB_LEASE_SECONDS, JOB_MAX_ATTEMPTS
+
+
+class JobQueue:
+    """
+    Durable screening-job queue on SQLite.
+    Every API process and every worker on this host opens its own connection;
+    claims are serialized with BEGIN IMMEDIATE, and a claim is a lease, so a
+    crashed worker's job goes back to the queue once the lease runs out.
+    WAL needs shared memory, so the file must sit on a local disk: workers on
+    other hosts (over NFS or similar) are not supported.
+    """
+
+    def __init__(self, db_path: str = JOB_QUEUE_PATH):
+        folder = os.path.dirname(db_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA busy_timeout=30000")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                stage TEXT,
+                jd_text TEXT NOT NULL,
+                total_files INTEGER NOT NULL,
+                processed_files INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                error TEXT,
+                worker TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lease_until REAL,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            )
+        """)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS job_files (
+                job_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                filename TEXT,
+                data BLOB NOT NULL,
+                PRIMARY KEY (job_id, position)
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)")
+
+    # --- PRODUCER SIDE (API) ---
+    def submit(self, jd_text: str, files: list) -> str:
+        """files: [(filename, binary file)], read one at a time during the insert. Returns the new job_id."""
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.execute(
+                    "INSERT INTO jobs (job_id, status, stage, jd_text, total_files, created_at) VALUES (?, 'queued', 'queued', ?, ?, ?)",
+                    (job_id, jd_text, len(files), time.time())
+                )
+                self._db.executemany(
+                    "INSERT INTO job_files (job_id, position, filename, data) VALUES (?, ?, ?, ?)",
+                    ((job_id, i, name, f.read()) for i, (name, f) in enumerate(files))
+                )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return job_id
+
+    def get(self, job_id: str, with_result: bool = False):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT job_id, status, stage, total_files, processed_files, error, attempts, "
+                "created_at, started_at, finished_at, result FROM jobs WHERE job_id = ?",
+                (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+
+        job = {
+            "job_id": row[0],
+            "status": row[1],
+            "stage": row[2],
+            "total_files": row[3],
+            "processed_files": row[4],
+            "progress": round(row[4] / row[3], 4) if row[3] else 1.0,
+            "error": row[5],
+            "attempts": row[6],
+            "created_at": row[7],
+            "started_at": row[8],
+            "finished_at": row[9],
+        }
+        if with_result:
+            job["result"] = json.loads(row[10]) if row[10] else None
+        return job
+
+    # --- CONSUMER SIDE (workers) ---
+    def claim(self, worker_id: str):
+        """Leases the oldest runnable job to worker_id. Returns {"job_id", "jd_text"} or None."""
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                # Jobs whose lease expired too often are given up on
+                self._db.execute(
+                    "UPDATE jobs SET status = 'failed', stage = 'failed', error = 'Worker lost too many times', finished_at = ? "
+                    "WHERE status = 'running' AND lease_until < ? AND attempts >= ?",
+                    (now, now, JOB_MAX_ATTEMPTS)
+                )
+                row = self._db.execute(
+                    "SELECT job_id, jd_text FROM jobs "
+                    "WHERE status = 'queued' OR (status = 'running' AND lease_until < ?) "
+                    "ORDER BY created_at LIMIT 1",
+                    (now,)
+                ).fetchone()
+                if row is None:
+                    self._db.execute("COMMIT")
+                    return None
+
+                self._db.execute(
+                    "UPDATE jobs SET status = 'running', stage = 'starting', worker = ?, attempts = attempts + 1, "
+                    "processed_files = 0, lease_until = ?, started_at = ? WHERE job_id = ?",
+                    (worker_id, now + JOB_LEASE_SECONDS, now, row[0])
+                )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return {"job_id": row[0], "jd_text": row[1]}
+
+    def files(self, job_id: str):
+        """Yields (filename, pdf_bytes) one at a time so a big batch is never all in memory."""
+        with self._lock:
+            positions = [r[0] for r in self._db.execute(
+                "SELECT position FROM job_files WHERE job_id = ? ORDER BY position", (job_id,)
+            ).fetchall()]
+        for position in positions:
+            with self._lock:
+                row = self._db.execute(
+                    "SELECT filename, data FROM job_files WHERE job_id = ? AND position = ?", (job_id, position)
+                ).fetchone()
+            if row is not None:
+                yield row[0], row[1]
+
+    def heartbeat(self, job_id: str, worker_id: str, stage: str, processed_files: int = None) -> bool:
+        """Progress update + lease renewal in one write. False if the job is no longer this worker's."""
+        with self._lock:
+            if processed_files is None:
+                cur = self._db.execute(
+                    "UPDATE jobs SET stage = ?, lease_until = ? WHERE job_id = ? AND worker = ?",
+                    (stage, time.time() + JOB_LEASE_SECONDS, job_id, worker_id)
+                )
+            else:
+                cur = self._db.execute(
+                    "UPDATE jobs SET stage = ?, processed_files = ?, lease_until = ? WHERE job_id = ? AND worker = ?",
+                    (stage, processed_files, time.time() + JOB_LEASE_SECONDS, job_id, worker_id)
+                )
+            return cur.rowcount > 0
+
+    def complete(self, job_id: str, worker_id: str, result: dict) -> bool:
+        """False if the job was no longer this worker's (its lease ran out and another worker took it)."""
+        return self._finish(job_id, worker_id, "done", result=json.dumps(result))
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        return self._finish(job_id, worker_id, "failed", error=error)
+
+    def _finish(self, job_id: str, worker_id: str, status: str, result: str = None, error: str = None) -> bool:
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                cur = self._db.execute(
+                    "UPDATE jobs SET status = ?, stage = ?, result = ?, error = ?, finished_at = ?, lease_until = NULL "
+                    "WHERE job_id = ? AND worker = ? AND status = 'running'",
+                    (status, status, result, error, time.time(), job_id, worker_id)
+                )
+                # The uploads are only needed until the job is settled
+                if cur.rowcount:
+                    self._db.execute("DELETE FROM job_files WHERE job_id = ?", (job_id,))
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return cur.rowcount > 0
+
+
+# Singleton Pattern: one connection per process, opened on first use
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+def get_job_queue() -> JobQueue:
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = JobQueue()
+        return _job_queue
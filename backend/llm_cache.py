@@ -0,0 +1,123 @@
+# backend/llm_cache.py
+
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from config import (
+    LLM_CACHE_ENABLED, LLM_CACHE_PATH,
+    LLM_CACHE_TTL, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TOUCH_INTERVAL
+)
+
+
+def normalize_prompt(prompt: str) -> str:
+    # f-string templates differ only in indentation between call sites, so ignore whitespace
+    return " ".join(prompt.split())
+
+
+class LLMResponseCache:
+    """
+    Exact-match cache for LLM completions, stored in SQLite so it survives restarts.
+    Entries expire after `ttl` seconds; once the table grows 10% past `max_entries`
+    the least recently used ones are evicted back down to it. Recency is coarse:
+    a hit only rewrites last_access when it is older than `touch_interval`, so most
+    hits are read-only. Blocking calls: the router runs them through asyncio.to_thread.
+    """
+
+    def __init__(self, db_path: str, ttl: int, max_entries: int, touch_interval: int = LLM_CACHE_TOUCH_INTERVAL):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.touch_interval = touch_interval
+        self.evict_at = max_entries + max(1, max_entries // 10)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        folder = os.path.dirname(db_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                provider TEXT NOT NULL,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access)")
+        self._db.commit()
+        # Estimate only (other processes write too); recounted at every eviction
+        self._entries = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    @staticmethod
+    def make_key(provider: str, model: str, prompt: str) -> str:
+        raw = f"{provider}\x00{model}\x00{normalize_prompt(prompt)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, provider: str, model: str, prompt: str):
+        key = self.make_key(provider, model, prompt)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT response, created_at, last_access FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._db.commit()
+                self.misses += 1
+                return None
+
+            if now - row[2] > self.touch_interval:
+                self._db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+                self._db.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, provider: str, model: str, prompt: str, response: str):
+        key = self.make_key(provider, model, prompt)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, provider, model, response, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, provider, model, response, now, now)
+            )
+            self._entries += 1
+            if self._entries > self.evict_at:
+                self._entries = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+                if self._entries > self.evict_at:
+                    # LRU eviction: keep only the most recently used max_entries rows
+                    self._entries -= self._db.execute(
+                        "DELETE FROM responses WHERE key IN ("
+                        "SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                        (self.max_entries,)
+                    ).rowcount
+            self._db.commit()
+
+    def delete(self, provider: str, model: str, prompt: str):
+        key = self.make_key(provider, model, prompt)
+        with self._lock:
+            if self._db.execute("DELETE FROM responses WHERE key = ?", (key,)).rowcount:
+                self._entries -= 1
+            self._db.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": size,
+            }
+
+
+# Singleton Pattern: one cache shared by every provider
+llm_cache = LLMResponseCache(LLM_CACHE_PATH, LLM_CACHE_TTL, LLM_CACHE_MAX_ENTRIES) if LLM_CACHE_ENABLED else None
@@ -0,0 +1,73 @@
+# backend/llm_errors.py
+
+import asyncio
+import httpx
+
+
+class LLMError(Exception):
+    """A provider call failed. main.py maps it to `http_status`; nothing treats it as content."""
+
+    http_status = 502
+    retryable = False
+
+    def __init__(self, provider: str, message: str, status: int = None):
+        super().__init__(f"{provider}: {message}")
+        self.provider = provider
+        self.status = status
+
+
+class LLMRateLimited(LLMError):
+    retryable = True
+
+
+class LLMUnavailable(LLMError):
+    """5xx or the connection failed."""
+    retryable = True
+
+
+class LLMTimeout(LLMError):
+    retryable = True
+
+
+class LLMNotConfigured(LLMError):
+    """Missing API key or SDK. Retrying won't help, the next provider might."""
+
+
+class NoProviderAvailable(LLMError):
+    """Every provider on the route failed or has its circuit open."""
+
+    http_status = 503
+
+    def __init__(self, endpoint: str, message: str, retry_after: int = None):
+        super().__init__(endpoint, message)
+        self.retry_after = retry_after
+
+
+def _status_of(exc: Exception):
+    # Each SDK names it differently: groq `status_code`, google-genai `code`, httpx `response.status_code`
+    for attr in ("status_code", "status", "code"):
+        value = getattr(exc, attr, None)
+        if isinstance(value, int):
+            return value
+    return getattr(getattr(exc, "response", None), "status_code", None)
+
+
+def classify(provider: str, exc: Exception) -> LLMError:
+    """Turns whatever a provider SDK raised into a typed LLMError."""
+    if isinstance(exc, LLMError):
+        return exc
+    message = str(exc) or type(exc).__name__
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError, httpx.TimeoutException)):
+        return LLMTimeout(provider, message)
+
+    status = _status_of(exc)
+    if status == 429:
+        return LLMRateLimited(provider, message, status)
+    if status is not None and status >= 500:
+        return LLMUnavailable(provider, message, status)
+    if status is not None and status >= 400:
+        return LLMError(provider, message, status)
+
+    if isinstance(exc, (httpx.TransportError, ConnectionError)) or "connection" in type(exc).__name__.lower():
+        return LLMUnavailable(provider, message)
+    return LLMError(provider, message)
@@ -0,0 +1,165 @@
+# backend/llm_mock.py
+#
+# Offline stand-ins for the LLM providers (LLM_MODE in config.py):
+#   mock   - MockLLM fakes every provider with realistic latency, token rate and errors
+#   record - real calls, every successful response is appended to the cassette
+#   replay - responses come from the cassette only, no network
+
+import os
+import json
+import random
+import asyncio
+import hashlib
+import threading
+from config import (
+    LLM_MODE, LLM_CASSETTE_PATH,
+    MOCK_LATENCY_MEDIAN_MS, MOCK_LATENCY_SIGMA, MOCK_TOKENS_PER_SEC,
+    MOCK_RESPONSE_TOKENS, MOCK_ERROR_RATE, MOCK_SEED
+)
+from llm_cache import LLMResponseCache, normalize_prompt
+from logger import logger
+
+
+class MockLLMError(Exception):
+    """Injected failure. `status_code` mimics the provider's HTTP status."""
+
+    def __init__(self, provider: str, status_code: int):
+        super().__init__(f"mock {provider} returned HTTP {status_code}")
+        self.provider = provider
+        self.status_code = status_code
+
+
+class CassetteMiss(Exception):
+    pass
+
+
+_WORDS = (
+    "the candidate role team experience python cloud services design scale data pipeline "
+    "customers reliability ownership mentoring platform api testing delivery impact"
+).split()
+
+_MOCK_SKILLS = ["Python", "AWS", "Docker", "Kubernetes", "SQL", "FastAPI", "CI/CD", "Terraform"]
+
+_MOCK_EVALUATION = {
+    "feedback": "Mock evaluation: questions were relevant and the tone was professional.",
+}
+
+
+class MockLLM:
+    """
+    Fake provider. The reply text depends only on the prompt, so runs are repeatable.
+    Latency and injected errors come from a seeded RNG, so a run's sequence is repeatable too.
+    """
+
+    def __init__(self, median_ms: float = MOCK_LATENCY_MEDIAN_MS, sigma: float = MOCK_LATENCY_SIGMA,
+                 tokens_per_sec: float = MOCK_TOKENS_PER_SEC, response_tokens: int = MOCK_RESPONSE_TOKENS,
+                 error_rate: float = MOCK_ERROR_RATE, seed: int = MOCK_SEED):
+        self.median_ms = median_ms
+        self.sigma = sigma
+        self.tokens_per_sec = tokens_per_sec
+        self.response_tokens = response_tokens
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def response_for(self, prompt: str) -> str:
+        # Shape the reply like what each call site parses
+        seed = int(hashlib.sha256(normalize_prompt(prompt).encode("utf-8")).hexdigest()[:8], 16)
+        rng = random.Random(seed)
+        lowered = prompt.lower()
+        if "comma-separated" in lowered:
+            return ", ".join(rng.sample(_MOCK_SKILLS, rng.randint(5, len(_MOCK_SKILLS))))
+        if "json" in lowered:
+            # Scores vary by transcript, so batch audits get a real distribution
+            scores = {key: rng.randint(5, 10) for key in ("relevance_score", "professionalism_score", "flow_score")}
+            return json.dumps({**_MOCK_EVALUATION, **scores})
+        return " ".join(rng.choice(_WORDS) for _ in range(self.response_tokens)).capitalize() + "."
+
+    def _draw(self, provider: str) -> float:
+        """Seconds to first token; raises MockLLMError (or a timeout) for an injected failure."""
+        with self._lock:
+            latency = self.median_ms / 1000 * self._rng.lognormvariate(0, self.sigma)
+            failed = self._rng.random() < self.error_rate
+            status = self._rng.choice([429, 500, 503, None])
+        if failed:
+            if status is None:
+                raise asyncio.TimeoutError(f"mock {provider} timed out")
+            raise MockLLMError(provider, status)
+        return latency
+
+    async def complete(self, provider: str, prompt: str) -> str:
+        latency = self._draw(provider)
+        text = self.response_for(prompt)
+        generation = len(text.split()) / self.tokens_per_sec if self.tokens_per_sec else 0
+        await asyncio.sleep(latency + generation)
+        return text
+
+    async def stream(self, provider: str, prompt: str):
+        await asyncio.sleep(self._draw(provider))
+        words = self.response_for(prompt).split(" ")
+        delay = 1 / self.tokens_per_sec if self.tokens_per_sec else 0
+        for i, word in enumerate(words):
+            if delay:
+                await asyncio.sleep(delay)
+            yield word if i == 0 else " " + word
+
+
+class Cassette:
+    """
+    JSONL file of recorded responses, one {"key", "provider", "model", "prompt", "response", "chunks"} per line.
+    Replay matches on provider + model + normalized prompt, then falls back to the prompt alone
+    (so a cassette recorded against one provider still serves another).
+    """
+
+    def __init__(self, path: str = LLM_CASSETTE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._by_key = {}
+        self._by_prompt = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        self._index(json.loads(line))
+            logger.info(f"Loaded {len(self._by_key)} recorded LLM responses from {path}.")
+
+    def _index(self, entry: dict):
+        # Later recordings of the same prompt win
+        self._by_key[entry["key"]] = entry
+        self._by_prompt[normalize_prompt(entry["prompt"])] = entry
+
+    def record(self, provider: str, model: str, prompt: str, response: str, chunks: list = None):
+        entry = {
+            "key": LLMResponseCache.make_key(provider, model, prompt),
+            "provider": provider, "model": model, "prompt": prompt, "response": response,
+        }
+        if chunks is not None:
+            entry["chunks"] = chunks
+        with self._lock:
+            folder = os.path.dirname(self.path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+            self._index(entry)
+
+    def lookup(self, provider: str, model: str, prompt: str) -> dict:
+        with self._lock:
+            entry = self._by_key.get(LLMResponseCache.make_key(provider, model, prompt))
+            if entry is None:
+                entry = self._by_prompt.get(normalize_prompt(prompt))
+        if entry is None:
+            raise CassetteMiss(f"no recorded response for this {provider} prompt in {self.path}")
+        return entry
+
+    def replay(self, provider: str, model: str, prompt: str) -> str:
+        return self.lookup(provider, model, prompt)["response"]
+
+    def replay_chunks(self, provider: str, model: str, prompt: str) -> list:
+        entry = self.lookup(provider, model, prompt)
+        return entry.get("chunks") or [entry["response"]]
+
+
+# Singletons, only built for the mode that needs them
+mock_llm = MockLLM() if LLM_MODE == "mock" else None
+cassette = Cassette() if LLM_MODE in ("record", "replay") else None
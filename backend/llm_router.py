@@ -0,0 +1,349 @@
+# backend/llm_router.py
+
+import time
+import random
+import asyncio
+from collections import deque
+from config import (
+    LLM_ROUTES, LLM_MODE, LLM_TIMEOUT,
+    GEMINI_MODEL, GROQ_MODEL, MODEL_NAME,
+    LLM_MAX_RETRIES, LLM_RETRY_BASE_DELAY, LLM_RETRY_MAX_DELAY,
+    LLM_HEDGE_ENABLED, LLM_HEDGE_DEFAULT_DELAY, LLM_HEDGE_MIN_SAMPLES,
+    LLM_BREAKER_FAILURES, LLM_BREAKER_COOLDOWN
+)
+from llm_cache import llm_cache
+from llm_errors import LLMError, LLMTimeout, LLMNotConfigured, NoProviderAvailable
+from logger import logger
+from metrics import LLM_LATENCY, LLM_ERRORS, LLM_TOKENS, CACHE
+from prompts import count_tokens
+from tracing import span
+from utils import (
+    provider_limits,
+    query_gemini, query_groq, query_ollama,
+    stream_gemini, stream_groq, stream_ollama
+)
+
+# name -> (complete, stream, model)
+PROVIDERS = {
+    "gemini": (query_gemini, stream_gemini, GEMINI_MODEL),
+    "groq": (query_groq, stream_groq, GROQ_MODEL),
+    "ollama": (query_ollama, stream_ollama, MODEL_NAME),
+}
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `failures` consecutive failures; open -> half-open after
+    `cooldown` seconds, when a single trial call is let through; its result closes
+    or re-opens the circuit. acquire() checks and claims in one step (no await in
+    between), so two calls can never both become the trial.
+    """
+
+    def __init__(self, provider: str, failures: int = LLM_BREAKER_FAILURES, cooldown: float = LLM_BREAKER_COOLDOWN):
+        self.provider = provider
+        self.failures = failures
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.consecutive = 0
+        self.opened_at = 0.0
+        self._trial = False
+
+    def available(self) -> bool:
+        # Advisory only (route ordering, retry decisions); acquire() is what admits a call
+        if self.state == "closed":
+            return True
+        if self.state == "open":
+            return time.monotonic() - self.opened_at >= self.cooldown
+        return not self._trial # half-open
+
+    def acquire(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.cooldown:
+                return False
+            self.state = "half_open"
+        if self._trial:
+            return False # Another call is already the trial
+        self._trial = True
+        return True
+
+    def success(self):
+        if self.state != "closed":
+            logger.info(f"Circuit for {self.provider} closed.")
+        self.state = "closed"
+        self.consecutive = 0
+        self._trial = False
+
+    def failure(self):
+        self.consecutive += 1
+        self._trial = False
+        if self.state == "half_open" or self.consecutive >= self.failures:
+            if self.state != "open":
+                logger.warning(f"Circuit for {self.provider} opened after {self.consecutive} failures.")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def release(self):
+        # The call ended without telling us anything about the provider (cancelled, or our own bad request)
+        self._trial = False
+
+    def retry_after(self) -> int:
+        if self.state != "open":
+            return 1
+        return max(1, int(self.cooldown - (time.monotonic() - self.opened_at)) + 1)
+
+
+class LatencyTracker:
+    """Recent successful call latencies for one provider; p95 drives the hedge timer."""
+
+    def __init__(self, size: int = 200):
+        self.samples = deque(maxlen=size)
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+
+    def p95(self):
+        if len(self.samples) < LLM_HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+def _counts_against(error: LLMError) -> bool:
+    # 429 / 5xx / timeouts / missing keys say the provider is unusable; a 4xx is about our request
+    return error.retryable or isinstance(error, LLMNotConfigured)
+
+
+class LLMRouter:
+    """
+    Sends each call to the first healthy provider on the endpoint's route.
+    Retryable failures are retried with jittered exponential backoff, then the
+    next provider is tried. If the primary runs past its own p95 latency, a hedge
+    request goes to the next provider and whichever answers first wins.
+    """
+
+    def __init__(self, routes: dict):
+        self.routes = {}
+        for endpoint, providers in routes.items():
+            unknown = [p for p in providers if p not in PROVIDERS]
+            if unknown:
+                logger.warning(f"LLM route '{endpoint}': ignoring unknown providers {unknown}")
+            self.routes[endpoint] = [p for p in providers if p in PROVIDERS]
+        self.breakers = {name: CircuitBreaker(name) for name in PROVIDERS}
+        self.latency = {name: LatencyTracker() for name in PROVIDERS}
+        self.hedges = 0
+
+    def _candidates(self, endpoint: str) -> list:
+        providers = [p for p in self.routes[endpoint] if self.breakers[p].available()]
+        if not providers:
+            retry_after = min((self.breakers[p].retry_after() for p in self.routes[endpoint]), default=1)
+            raise NoProviderAvailable(endpoint, "every provider's circuit is open", retry_after)
+        return providers
+
+    def hedge_delay(self, provider: str) -> float:
+        p95 = self.latency[provider].p95()
+        return p95 if p95 is not None else LLM_HEDGE_DEFAULT_DELAY
+
+    # --- ONE PROVIDER ---
+    async def _attempt(self, provider: str, prompt: str) -> str:
+        complete, _, _ = PROVIDERS[provider]
+        breaker = self.breakers[provider]
+        if not breaker.acquire():
+            raise NoProviderAvailable(provider, "circuit open", breaker.retry_after())
+        start = time.perf_counter()
+        try:
+            # Waiting for a local slot is our own back-pressure, not the provider being slow:
+            # the timeout (and the latency that drives hedging) only start once the slot is held
+            async with provider_limits[provider]:
+                start = time.perf_counter()
+                text = await asyncio.wait_for(complete(prompt), timeout=LLM_TIMEOUT)
+        except asyncio.TimeoutError:
+            breaker.failure()
+            self._observe(provider, start, "error", "LLMTimeout")
+            raise LLMTimeout(provider, f"no response in {LLM_TIMEOUT}s")
+        except LLMError as e:
+            breaker.failure() if _counts_against(e) else breaker.release()
+            self._observe(provider, start, "error", type(e).__name__)
+            raise
+        except asyncio.CancelledError:
+            breaker.release() # Lost a hedge race, or the client went away
+            self._observe(provider, start, "cancelled")
+            raise
+        breaker.success()
+        self.latency[provider].record(self._observe(provider, start))
+        return text
+
+    @staticmethod
+    def _observe(provider: str, start: float, outcome: str = "ok", error: str = None) -> float:
+        elapsed = time.perf_counter() - start
+        LLM_LATENCY.labels(provider, outcome).observe(elapsed)
+        if error:
+            LLM_ERRORS.labels(provider, error).inc()
+        return elapsed
+
+    async def _with_retries(self, provider: str, prompt: str) -> str:
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            try:
+                return await self._attempt(provider, prompt)
+            except LLMError as e:
+                if not e.retryable or attempt == LLM_MAX_RETRIES or not self.breakers[provider].available():
+                    raise
+                delay = random.uniform(0, min(LLM_RETRY_MAX_DELAY, LLM_RETRY_BASE_DELAY * 2 ** attempt))
+                logger.warning(f"{e} (retry {attempt + 1}/{LLM_MAX_RETRIES} in {delay:.2f}s)")
+                await asyncio.sleep(delay)
+
+    # --- PUBLIC API ---
+    async def complete(self, endpoint: str, prompt: str, use_cache: bool = True, refresh: bool = False) -> str:
+        """refresh=True skips the cached reply but still caches the new one (the cached one was unusable)."""
+        with span(f"llm:{endpoint}") as current:
+            return await self._complete(endpoint, prompt, use_cache, refresh, current)
+
+    async def _complete(self, endpoint: str, prompt: str, use_cache: bool, refresh: bool, current) -> str:
+        use_cache = use_cache and llm_cache is not None and LLM_MODE == "live"
+        if use_cache and refresh:
+            def evict():
+                # Every provider's copy: lookups take the first hit on the route, whoever answers now
+                for provider in self.routes[endpoint]:
+                    llm_cache.delete(provider, PROVIDERS[provider][2], prompt)
+
+            await asyncio.to_thread(evict)
+        elif use_cache:
+            def lookup():
+                # Any provider's answer to the same prompt is good enough
+                for provider in self.routes[endpoint]:
+                    cached = llm_cache.get(provider, PROVIDERS[provider][2], prompt)
+                    if cached is not None:
+                        return provider, cached
+                return None
+
+            hit = await asyncio.to_thread(lookup)
+            if hit is not None:
+                CACHE.labels("llm", "hit").inc()
+                if current is not None:
+                    current.set(cache="hit", provider=hit[0])
+                return hit[1]
+            CACHE.labels("llm", "miss").inc()
+
+        pending = self._candidates(endpoint)
+        running = {} # task -> (provider, started)
+        errors = []
+
+        def launch():
+            provider = pending.pop(0)
+            task = asyncio.create_task(self._with_retries(provider, prompt))
+            running[task] = (provider, time.monotonic())
+
+        launch()
+        hedged = False
+        try:
+            while running:
+                timeout = None
+                if LLM_HEDGE_ENABLED and not hedged and pending and len(running) == 1:
+                    primary, started = next(iter(running.values()))
+                    timeout = max(0.0, self.hedge_delay(primary) - (time.monotonic() - started))
+
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # The primary is slower than it usually is: race the next provider
+                    hedged = True
+                    self.hedges += 1
+                    logger.info(f"Hedging '{endpoint}': {primary} past its p95, also asking {pending[0]}.")
+                    launch()
+                    continue
+
+                for task in done:
+                    provider, _ = running.pop(task)
+                    try:
+                        text = task.result()
+                    except LLMError as e:
+                        errors.append(e)
+                        continue
+                    if use_cache:
+                        await asyncio.to_thread(llm_cache.put, provider, PROVIDERS[provider][2], prompt, text)
+                    if current is not None:
+                        current.set(provider=provider, hedged=hedged, failed_attempts=len(errors))
+                    LLM_TOKENS.labels(endpoint, "completion").observe(count_tokens(text))
+                    return text
+
+                if not running and pending:
+                    logger.warning(f"'{endpoint}': {errors[-1]}. Falling back to {pending[0]}.")
+                    launch()
+        finally:
+            for task in running:
+                task.cancel()
+
+        if len(errors) == 1:
+            raise errors[0]
+        raise LLMError(endpoint, "all providers failed: " + "; ".join(str(e) for e in errors))
+
+    def stream(self, endpoint: str, prompt: str):
+        """
+        Streams from the first healthy provider. Retries and fallbacks only happen
+        before the first token: once text has gone out, a failure is final.
+        Raises NoProviderAvailable right away, before any response has started.
+        """
+        return self._stream(endpoint, self._candidates(endpoint), prompt)
+
+    async def _stream(self, endpoint: str, providers: list, prompt: str):
+        with span(f"llm:{endpoint}", stream=True):
+            parts = []
+            async for token in self._stream_providers(endpoint, providers, prompt):
+                parts.append(token)
+                yield token
+            LLM_TOKENS.labels(endpoint, "completion").observe(count_tokens("".join(parts)))
+
+    async def _stream_providers(self, endpoint: str, providers: list, prompt: str):
+        errors = []
+        for provider in providers:
+            _, stream, _ = PROVIDERS[provider]
+            breaker = self.breakers[provider]
+            for attempt in range(LLM_MAX_RETRIES + 1):
+                if not breaker.acquire():
+                    errors.append(NoProviderAvailable(provider, "circuit open", breaker.retry_after()))
+                    break
+                started = False
+                start = time.perf_counter()
+                try:
+                    async for token in stream(prompt):
+                        started = True
+                        yield token
+                    breaker.success()
+                    self._observe(provider, start)
+                    return
+                except LLMError as e:
+                    breaker.failure() if _counts_against(e) else breaker.release()
+                    self._observe(provider, start, "error", type(e).__name__)
+                    if started:
+                        raise
+                    errors.append(e)
+                    if not e.retryable or attempt == LLM_MAX_RETRIES:
+                        break
+                    await asyncio.sleep(random.uniform(0, min(LLM_RETRY_MAX_DELAY, LLM_RETRY_BASE_DELAY * 2 ** attempt)))
+                except (asyncio.CancelledError, GeneratorExit):
+                    breaker.release()
+                    self._observe(provider, start, "cancelled")
+                    raise
+
+        if len(errors) == 1:
+            raise errors[0]
+        raise LLMError(endpoint, "all providers failed: " + "; ".join(str(e) for e in errors))
+
+    def stats(self) -> dict:
+        return {
+            "routes": self.routes,
+            "hedges": self.hedges,
+            "providers": {
+                name: {
+                    "circuit": self.breakers[name].state,
+                    "consecutive_failures": self.breakers[name].consecutive,
+                    "p95_seconds": round(self.latency[name].p95(), 3) if self.latency[name].p95() is not None else None,
+                    "samples": len(self.latency[name].samples),
+                }
+                for name in PROVIDERS
+            },
+        }
+
+
+# Singleton Pattern: breaker state and latency history are shared by every request in the worker
+llm_router = LLMRouter(LLM_ROUTES)
@@ -1,27 +1,100 @@
 # backend/logger.py
 
-import logging
 import sys
+import copy
+import json
+import queue
+import atexit
+import logging
+import contextvars
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, WatchedFileHandler
+from config import LOG_LEVEL, LOG_FILE, LOG_ROTATION, LOG_MAX_BYTES, LOG_BACKUP_COUNT, LOG_CONSOLE_FORMAT
+
+# Set per request by main.log_middleware; the CPU pools copy it into their threads
+request_id_var = contextvars.ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else came in through `extra=` and is logged as a field
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "request_id"}
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg, request_id, then any `extra=` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED:
+                entry[key] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class ContextQueueHandler(QueueHandler):
+    """
+    Runs on the caller's thread, so it only does what can't be deferred:
+    read the request ID (a contextvar, invisible to the listener thread), resolve
+    the message and render any traceback. Formatting and I/O happen on the listener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.request_id = getattr(record, "request_id", None) or request_id_var.get()
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def file_handler(path: str) -> logging.Handler:
+    """
+    Handler for a file that every process (uvicorn workers, job workers, the embedding
+    server) appends to. Only "external" rotation is safe then: each process reopens the
+    file once logrotate has moved it, instead of racing the others to rename it.
+    """
+    # utf-8 to handle special chars/emojis in AI text
+    if LOG_ROTATION == "size":
+        return RotatingFileHandler(path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8")
+    return WatchedFileHandler(path, encoding="utf-8")
+
 
-# Configure the Logging System
 def setup_logging():
-    # format: Time [Level] Filename: Message
-    log_format = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
-    
-    logging.basicConfig(
-        level=logging.INFO,
-        format=log_format,
-        handlers=[
-            # Write to file (with utf-8 to handle special chars/emojis in AI text)
-            logging.FileHandler("server_logs.log", encoding='utf-8'),
-            # Print to Console
-            logging.StreamHandler(sys.stdout)
-        ]
+    root = logging.getLogger()
+    if any(isinstance(h, ContextQueueHandler) for h in root.handlers):
+        return logging.getLogger("TalentflowAI") # Already set up (module re-imported under reload)
+
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(
+        logging.Formatter("%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+        if LOG_CONSOLE_FORMAT == "text" else JSONFormatter()
     )
-    
+    handlers = [console]
+    if LOG_FILE:
+        log_file = file_handler(LOG_FILE)
+        log_file.setFormatter(JSONFormatter())
+        handlers.append(log_file)
+
+    # Unbounded queue: a burst costs memory, never a blocked request
+    log_queue = queue.Queue(-1)
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop) # Flushes whatever is still queued
+
+    root.setLevel(LOG_LEVEL)
+    root.addHandler(ContextQueueHandler(log_queue))
+
     # Create a specific logger for our app
-    logger = logging.getLogger("TalentflowAI")
-    return logger
+    return logging.getLogger("TalentflowAI")
 
 # Initialize one instance to be imported elsewhere
-logger = setup_logging()
\ No newline at end of file
+logger = setup_logging()
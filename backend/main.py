@@ -1,37 +1,154 @@
 # backend/main.py
 
+import time
+import uuid
+import random
+import asyncio
+import logging
 import uvicorn
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
-from config import HOST, PORT
-from routers import jobs, resumes, interview, evaluate
-from logger import logger
+from fastapi.responses import JSONResponse
+from config import HOST, PORT, MAX_REQUEST_BYTES, WARMUP_ON_STARTUP, LOG_SAMPLE_RATE, LOG_SLOW_REQUEST_MS, JOB_WORKERS
+from routers import jobs, resumes, interview, evaluate, screen_jobs, health
+from logger import logger, request_id_var
+import tracing
+from metrics import REQUEST_LATENCY, REQUESTS, IN_FLIGHT, REJECTED
+from ingest import shutdown_pdf_pool
+from executors import PoolSaturated, shutdown_pools
+from llm_errors import LLMError, NoProviderAvailable
+from utils import close_clients
+from worker import start_local_workers, stop_local_workers, owns_local_workers
+from services import warmup
 
-app = FastAPI(title="Recruiter AI Backend")
+
+# --- LIFECYCLE ---
+async def warm_up():
+    # Runs off the event loop, so /healthz answers while the model loads; /readyz flips once it's done
+    try:
+        await asyncio.to_thread(warmup)
+    except Exception as e:
+        logger.error(f"Warmup failed: {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warmup_task = asyncio.create_task(warm_up()) if WARMUP_ON_STARTUP else None
+    # Background screening workers share the durable job queue with any external ones.
+    # Only one API process per host starts them, however many uvicorn workers there are.
+    workers = start_local_workers() if JOB_WORKERS and owns_local_workers() else []
+    yield
+    if warmup_task:
+        warmup_task.cancel()
+    stop_local_workers(workers)
+    # Stop the PDF parsing workers and CPU pools, and release pooled LLM connections with the server
+    shutdown_pdf_pool()
+    shutdown_pools()
+    await close_clients()
+
+app = FastAPI(title="Recruiter AI Backend", lifespan=lifespan)
 
 # --- MIDDLEWARE (The Magic Part) ---
+@app.middleware("http")
+async def limit_request_size(request: Request, call_next):
+    # Refuse oversized uploads before the multipart body is read at all.
+    # Per-file and per-request caps are enforced again while reading (see ingest.read_uploads).
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_REQUEST_BYTES:
+        return JSONResponse(
+            status_code=413,
+            content={"detail": f"Request body over {MAX_REQUEST_BYTES // (1024 * 1024)} MB"}
+        )
+    return await call_next(request)
+
+@app.middleware("http")
+async def trace_middleware(request: Request, call_next):
+    # Root span of the request's trace; the request ID (set by log_middleware, which wraps this) is the trace ID
+    with tracing.trace(f"{request.method} {request.url.path}", trace_id=request_id_var.get(), finish=False) as trace:
+        response = await call_next(request)
+    if trace is None:
+        return response
+    route = request.scope.get("route")
+    trace.root.set(route=getattr(route, "path", None), status=response.status_code)
+    # Streamed bodies (SSE) keep producing spans after the headers go out
+    response.body_iterator = tracing.finish_after(response.body_iterator, trace)
+    return response
+
 @app.middleware("http")
 async def log_middleware(request: Request, call_next):
-    # 1. Log the incoming request
-    logger.info(f"RECEIVED: {request.method} {request.url.path}")
-    
-    # 2. Process the request
+    # One line per request, after it finishes. Every log call made while serving it carries the request ID.
+    request_id = request.headers.get("x-request-id") or uuid.uuid4().hex[:16]
+    token = request_id_var.set(request_id)
+    start = time.perf_counter()
     try:
         response = await call_next(request)
-        
-        # 3. Log the response status
-        logger.info(f"SENT: Status {response.status_code}")
-        return response
     except Exception as e:
-        # 4. Log Crashes
-        logger.error(f"CRITICAL ERROR: {str(e)}")
-        raise e
+        # Log Crashes
+        logger.exception(
+            f"CRITICAL ERROR: {request.method} {request.url.path}: {e}",
+            extra={"method": request.method, "path": request.url.path,
+                   "duration_ms": round((time.perf_counter() - start) * 1000, 1)}
+        )
+        raise
+    finally:
+        request_id_var.reset(token)
+
+    duration_ms = round((time.perf_counter() - start) * 1000, 1)
+    # Sampling only thins out the routine lines; errors and slow requests are always kept
+    if response.status_code >= 500 or duration_ms >= LOG_SLOW_REQUEST_MS or random.random() < LOG_SAMPLE_RATE:
+        logger.log(
+            logging.WARNING if response.status_code >= 500 else logging.INFO,
+            f"{request.method} {request.url.path} {response.status_code} {duration_ms}ms",
+            extra={"request_id": request_id, "method": request.method, "path": request.url.path,
+                   "status": response.status_code, "duration_ms": duration_ms}
+        )
+    response.headers["X-Request-ID"] = request_id
+    return response
+
+@app.middleware("http")
+async def metrics_middleware(request: Request, call_next):
+    # Outermost, so 413s and 429s are counted too. For SSE this is time to first byte.
+    IN_FLIGHT.inc()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        IN_FLIGHT.dec()
+        # The route template ("/resumes/{resume_id}"), never the raw path, keeps label cardinality bounded
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        REQUEST_LATENCY.labels(request.method, route).observe(time.perf_counter() - start)
+        REQUESTS.labels(request.method, route, str(status)).inc()
+
+# --- BACKPRESSURE ---
+@app.exception_handler(PoolSaturated)
+async def pool_saturated_handler(request: Request, exc: PoolSaturated):
+    # Shed load instead of queueing without bound; clients back off for Retry-After seconds
+    logger.warning(f"Rejected {request.url.path}: {exc.pool} pool saturated (retry in {exc.retry_after}s)")
+    REJECTED.labels(exc.pool).inc()
+    return JSONResponse(
+        status_code=429,
+        content={"detail": f"Server busy ({exc.pool}). Retry in {exc.retry_after}s."},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+@app.exception_handler(LLMError)
+async def llm_error_handler(request: Request, exc: LLMError):
+    # 502 = the provider(s) failed, 503 = every circuit is open; never a 200 with error text inside
+    logger.error(f"LLM call failed on {request.url.path}: {exc}")
+    headers = {"Retry-After": str(exc.retry_after)} if isinstance(exc, NoProviderAvailable) and exc.retry_after else None
+    return JSONResponse(status_code=exc.http_status, content={"detail": str(exc)}, headers=headers)
 
 # Include Routers
 app.include_router(jobs.router)
 app.include_router(resumes.router)
 app.include_router(interview.router)
 app.include_router(evaluate.router)
+app.include_router(screen_jobs.router)
+app.include_router(health.router)
 
 if __name__ == "__main__":
     logger.info("System Starting up...")
-    uvicorn.run("main:app", host=HOST, port=PORT, reload=True)
\ No newline at end of file
+    # log_middleware already writes one line per request, so uvicorn's own access log is off
+    uvicorn.run("main:app", host=HOST, port=PORT, reload=True, access_log=False)
\ No newline at end of file
@@ -0,0 +1,74 @@
+# backend/metrics.py
+#
+# Prometheus metrics, scraped from GET /metrics.
+# With several uvicorn workers, point PROMETHEUS_MULTIPROC_DIR at an empty directory
+# so every worker's numbers are merged into one scrape.
+
+import os
+import time
+from contextlib import contextmanager
+from prometheus_client import (
+    Counter, Histogram, Gauge, CollectorRegistry,
+    generate_latest, CONTENT_TYPE_LATEST, multiprocess
+)
+from tracing import span
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# --- HTTP ---
+REQUEST_LATENCY = Histogram(
+    "talentflow_http_request_duration_seconds", "HTTP request latency", ["method", "route"],
+    buckets=LATENCY_BUCKETS
+)
+REQUESTS = Counter("talentflow_http_requests_total", "HTTP requests served", ["method", "route", "status"])
+IN_FLIGHT = Gauge("talentflow_http_requests_in_flight", "HTTP requests being served", multiprocess_mode="livesum")
+REJECTED = Counter("talentflow_requests_rejected_total", "Work refused because a pool was saturated", ["pool"])
+
+# --- PIPELINE STAGES (pdf_extract, chunk, embed, faiss_search, index_add, gap_analysis, ...) ---
+STAGE_LATENCY = Histogram(
+    "talentflow_stage_duration_seconds", "Time spent in one pipeline stage", ["stage"],
+    buckets=LATENCY_BUCKETS
+)
+EMBED_BATCH_TEXTS = Histogram(
+    "talentflow_embed_batch_texts", "Texts per model forward pass",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+)
+EMBED_BATCH_REQUESTS = Histogram(
+    "talentflow_embed_batch_requests", "encode() calls coalesced into one forward pass",
+    buckets=(1, 2, 3, 4, 6, 8, 12, 16, 32, 64)
+)
+
+# --- LLM PROVIDERS ---
+LLM_LATENCY = Histogram(
+    "talentflow_llm_request_duration_seconds", "LLM provider call latency (one attempt)", ["provider", "outcome"],
+    buckets=LATENCY_BUCKETS
+)
+LLM_ERRORS = Counter("talentflow_llm_errors_total", "Failed LLM provider calls", ["provider", "error"])
+LLM_TOKENS = Histogram(
+    "talentflow_llm_tokens", "Tokens per LLM call, by route and direction (prompt / completion)", ["endpoint", "direction"],
+    buckets=(16, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+)
+PROMPT_TRUNCATED = Counter("talentflow_prompt_truncated_total", "Prompt inputs trimmed to fit the token budget", ["endpoint", "part"])
+
+# --- CACHES ---
+CACHE = Counter("talentflow_cache_requests_total", "Cache lookups", ["cache", "result"])
+
+
+@contextmanager
+def timed(stage: str, **attributes):
+    """Observes the stage histogram, and records the stage as a span of the current trace."""
+    start = time.perf_counter()
+    try:
+        with span(stage, **attributes) as current:
+            yield current
+    finally:
+        STAGE_LATENCY.labels(stage).observe(time.perf_counter() - start)
+
+
+def render() -> tuple:
+    """(body, content_type) for the /metrics response."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
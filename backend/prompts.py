@@ -0,0 +1,170 @@
+# backend/prompts.py
+#
+# Shared prompt builder. Templates lose their source indentation, inputs are whitespace-
+# normalized (and optionally de-duplicated), and if the result is over the route's token
+# budget, inputs are trimmed lowest priority first. Token counts go to metrics and the trace.
+#
+#   prompt = build_prompt("judge", JUDGE_TEMPLATE,
+#                         jd=Part(jd_text, priority=1, max_tokens=1500, dedupe=True),
+#                         history=Part(transcript, priority=0, keep="ends"))
+
+import re
+from functools import lru_cache
+from config import PROMPT_BUDGETS, LLM_ROUTES
+from logger import logger
+from metrics import LLM_TOKENS, PROMPT_TRUNCATED
+from tracing import span
+
+ELLIPSIS = "\n[...]\n"
+_ELLIPSIS_COST = 4 # Its tokens in cl100k_base, rounded up
+_SPACES = re.compile(r"[ \t\u00a0]+") # Includes the non-breaking spaces PDFs are full of
+
+
+# --- TOKEN COUNTING ---
+@lru_cache(maxsize=1)
+def _encoding():
+    # tiktoken is optional and fetches its BPE file on first use; any failure means the estimate
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.info(f"tiktoken unavailable ({type(e).__name__}), estimating prompt tokens from length.")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+def truncate_tokens(text: str, max_tokens: int, keep: str = "head") -> str:
+    """
+    Cuts text to about max_tokens. keep="head" keeps the start (documents), "tail" the end
+    (recent chat), "ends" a third from the start and the rest from the end (whole transcripts).
+    """
+    if max_tokens <= 0:
+        return ""
+    encoding = _encoding()
+    if encoding is not None:
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        cut = lambda a, b: encoding.decode(tokens[a:b])
+        total = len(tokens)
+    else:
+        if count_tokens(text) <= max_tokens:
+            return text
+        cut = lambda a, b: text[a:b]
+        total, max_tokens = len(text), max_tokens * 4
+    max_tokens = max(0, max_tokens - _ELLIPSIS_COST * (4 if encoding is None else 1)) # The marker counts too
+
+    if keep == "tail":
+        return ELLIPSIS.lstrip() + cut(total - max_tokens, total)
+    if keep == "ends":
+        head = max_tokens // 3
+        return cut(0, head) + ELLIPSIS + cut(total - (max_tokens - head), total)
+    return cut(0, max_tokens) + ELLIPSIS.rstrip()
+
+
+def prompt_budget(endpoint: str) -> int:
+    # The prompt is built before the router picks a provider, so it has to fit any fallback too
+    return min((PROMPT_BUDGETS.get(p, min(PROMPT_BUDGETS.values())) for p in LLM_ROUTES[endpoint]),
+               default=min(PROMPT_BUDGETS.values()))
+
+
+# --- TEXT CLEANUP ---
+@lru_cache(maxsize=64)
+def compact_template(template: str) -> str:
+    """Drops the indentation that triple-quoted templates carry and collapses blank-line runs."""
+    lines = [line.strip() for line in template.strip().splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines))
+
+
+def normalize_text(text: str, dedupe: bool = False) -> str:
+    """
+    Collapses runs of spaces and blank lines. With dedupe, repeated lines (page headers,
+    footers, pasted boilerplate) are kept only the first time they appear.
+    """
+    seen = set()
+    lines = []
+    for line in text.splitlines():
+        line = _SPACES.sub(" ", line).strip()
+        if dedupe and line:
+            key = line.lower()
+            if key in seen:
+                continue
+            seen.add(key)
+        lines.append(line)
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+# --- BUILDER ---
+class Part:
+    """
+    One input slotted into a template. Over budget, the lowest `priority` is trimmed first,
+    down to `min_tokens`; parts without a priority are never trimmed. `max_tokens` caps a part
+    regardless of budget.
+    """
+
+    __slots__ = ("text", "priority", "keep", "max_tokens", "min_tokens", "dedupe")
+
+    def __init__(self, text: str, priority: int = None, keep: str = "head",
+                 max_tokens: int = None, min_tokens: int = 64, dedupe: bool = False):
+        self.text = text or ""
+        self.priority = priority
+        self.keep = keep
+        self.max_tokens = max_tokens
+        self.min_tokens = min_tokens
+        self.dedupe = dedupe
+
+
+def build_prompt(endpoint: str, template: str, **parts) -> str:
+    """Fills `template` (str.format placeholders) so the result fits the route's token budget."""
+    with span("prompt", endpoint=endpoint) as current:
+        prompt, tokens, budget, trimmed = _fit(endpoint, compact_template(template), parts)
+        if current is not None:
+            current.set(tokens=tokens, budget=budget, trimmed=",".join(trimmed) or None)
+
+    LLM_TOKENS.labels(endpoint, "prompt").observe(tokens)
+    for name in trimmed:
+        PROMPT_TRUNCATED.labels(endpoint, name).inc()
+    if tokens > budget:
+        logger.warning(f"Prompt for '{endpoint}' is {tokens} tokens after trimming (budget {budget}).")
+    return prompt
+
+
+def _fit(endpoint: str, template: str, parts: dict) -> tuple:
+    budget = prompt_budget(endpoint)
+    parts = {name: part if isinstance(part, Part) else Part(str(part)) for name, part in parts.items()}
+    values, counts, trimmed = {}, {}, []
+
+    for name, part in parts.items():
+        text = normalize_text(part.text, part.dedupe)
+        if part.max_tokens is not None:
+            capped = truncate_tokens(text, part.max_tokens, part.keep)
+            if capped != text:
+                trimmed.append(name)
+            text = capped
+        values[name] = text
+        counts[name] = count_tokens(text)
+
+    overhead = count_tokens(template.format(**{name: "" for name in values}))
+    total = overhead + sum(counts.values())
+
+    # Trim lowest priority first, each part only as far as needed
+    trimmable = sorted((name for name, part in parts.items() if part.priority is not None), key=lambda n: parts[n].priority)
+    for name in trimmable:
+        if total <= budget:
+            break
+        target = max(parts[name].min_tokens, counts[name] - (total - budget))
+        if target < counts[name]:
+            values[name] = truncate_tokens(values[name], target, parts[name].keep)
+            new_count = count_tokens(values[name])
+            total -= counts[name] - new_count
+            counts[name] = new_count
+            if name not in trimmed:
+                trimmed.append(name)
+
+    return template.format(**values), total, budget, trimmed
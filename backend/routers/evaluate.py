@@ -1,16 +1,24 @@
 # backend/routers/evaluate.py
 
+import asyncio
 from fastapi import APIRouter
-from pydantic import BaseModel
-from typing import List
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
+from typing import List, Optional
 import numpy as np
-import faiss
+from config import JUDGE_BATCH_CONCURRENCY, JUDGE_BATCH_MAX_ITEMS
 from services import get_embedder
-from utils import query_gemini, query_ollama, query_groq
+from executors import run_in_pool
+from llm_router import llm_router
+from llm_errors import LLMError
+from logger import logger
+from prompts import build_prompt, Part
+from tracing import current_trace
+from utils import sse_event
+from skill_matcher import get_matcher
 
 
 router = APIRouter()
-embedder = get_embedder()
 
 
 class JDEvalRequest(BaseModel):
@@ -25,22 +33,31 @@ class InterviewEvalRequest(BaseModel):
     history: str
     jd_context: str
 
+class InterviewBatchItem(InterviewEvalRequest):
+    id: Optional[str] = None # Echoed back, so results can be matched to stored transcripts
+
+class InterviewBatchRequest(BaseModel):
+    items: List[InterviewBatchItem] = Field(min_length=1, max_length=JUDGE_BATCH_MAX_ITEMS)
+    concurrency: int = Field(JUDGE_BATCH_CONCURRENCY, ge=1) # Capped at JUDGE_BATCH_CONCURRENCY
+    use_cache: bool = True
+
+SCORE_FIELDS = ("relevance_score", "professionalism_score", "flow_score")
+
+class InterviewScores(BaseModel):
+    relevance_score: int = Field(ge=1, le=10)
+    professionalism_score: int = Field(ge=1, le=10)
+    flow_score: int = Field(ge=1, le=10)
+    feedback: str = ""
+
 
 # 1. Evaluate JD Generator (Keyword Recall)
 @router.post("/evaluate_jd")
 async def evaluate_jd(req: JDEvalRequest):
     # Logic: Check how many requested skills are actually present in the generated JD
-    skills_list = [s.strip().lower() for s in req.required_skills.split(",")]
-    jd_lower = req.jd_text.lower()
+    skills_list = [s.strip().lower() for s in req.required_skills.split(",") if s.strip()]
     
-    found = []
-    missing = []
-    
-    for skill in skills_list:
-        if skill in jd_lower:
-            found.append(skill)
-        else:
-            missing.append(skill)
+    # Single pass over the JD with word boundaries and aliases ("k8s" counts as "kubernetes")
+    found, missing = get_matcher(skills_list).split(req.jd_text)
             
     score = (len(found) / len(skills_list)) * 100 if skills_list else 0
     
@@ -53,6 +70,27 @@ async def evaluate_jd(req: JDEvalRequest):
 
 
 # 2. Evaluate Screener (The 'Golden Resume' Test)
+def golden_search(texts: list) -> tuple:
+    # CPU-bound half of the test: embed + exact search. Runs on the evaluate pool.
+    import faiss # Loaded on first use, not at startup
+
+    embedder = get_embedder()
+
+    # The Golden Resume *is* the JD, so its row doubles as the query vector
+    embeddings = np.ascontiguousarray(embedder.encode(texts), dtype="float32")
+
+    # Normalize for Cosine Similarity (in place, so it has to be the array we search with)
+    faiss.normalize_L2(embeddings)
+    jd_embedding = embeddings[-1:].copy()
+    
+    d = embeddings.shape[1]
+    index = faiss.IndexFlatIP(d)
+    index.add(embeddings)
+    
+    # Search
+    return index.search(jd_embedding, len(texts))
+
+
 @router.post("/evaluate_screener")
 async def evaluate_screener(req: ScreenerEvalRequest):
     # Logic: Inject the JD text itself as a "Golden Resume". 
@@ -60,20 +98,8 @@ async def evaluate_screener(req: ScreenerEvalRequest):
     
     texts = req.resume_texts.copy()
     texts.append(req.jd_text) # Inject Golden Resume at the end
-    
-    embeddings = embedder.encode(texts)
-    jd_embedding = embedder.encode([req.jd_text])
-    
-    # Normalize for Cosine Similarity
-    faiss.normalize_L2(np.array(embeddings))
-    faiss.normalize_L2(np.array(jd_embedding))
-    
-    d = embeddings.shape[1]
-    index = faiss.IndexFlatIP(d)
-    index.add(np.array(embeddings))
-    
-    # Search
-    D, I = index.search(np.array(jd_embedding), len(texts))
+
+    D, I = await run_in_pool("evaluate", golden_search, texts)
     
     # Find where the Golden Resume (last index) landed
     golden_index = len(texts) - 1
@@ -95,16 +121,13 @@ async def evaluate_screener(req: ScreenerEvalRequest):
 
 
 # 3. Evaluate Interviewer (LLM-as-a-Judge)
-@router.post("/evaluate_interview")
-async def evaluate_interview(req: InterviewEvalRequest):
-    # Logic: Ask Gemini to grade the chat history
-    prompt = f"""
+JUDGE_TEMPLATE = """
     You are a Senior Hiring Manager auditing an AI Recruiter.
     
-    Job Description: {req.jd_context}
+    Job Description: {jd}
     
     Interview Transcript:
-    {req.history}
+    {history}
     
     Task: Evaluate the AI Interviewer's performance.
     1. Relevance (1-10): Did the AI ask questions relevant to the JD?
@@ -119,13 +142,102 @@ async def evaluate_interview(req: InterviewEvalRequest):
         "feedback": "Short summary of feedback"
     }}
     """
-    
+
+async def judge_interview(jd_context: str, history: str, use_cache: bool = True) -> tuple:
+    """
+    Returns (report, scores, error). A reply that doesn't parse is asked for once more,
+    replacing the cached copy it may have come from; if that fails too, scores is None and error says why.
+    """
+    # Over budget, the middle of the transcript goes first; its opening and latest turns stay
+    prompt = build_prompt(
+        "judge", JUDGE_TEMPLATE,
+        jd=Part(jd_context, priority=1, max_tokens=1500, min_tokens=256, dedupe=True),
+        history=Part(history, priority=0, keep="ends", min_tokens=256)
+    )
+    for attempt in range(2):
+        # Provider failures raise LLMError, which main.py turns into a 502/503
+        report = await llm_router.complete("judge", prompt, use_cache=use_cache, refresh=attempt > 0)
+        try:
+            return report, parse_judge_report(report), None
+        except ValueError as e:
+            error = str(e)
+            logger.warning(f"Judge reply did not parse (attempt {attempt + 1}): {error}")
+    return report, None, error
+
+
+def parse_judge_report(text: str) -> InterviewScores:
+    # Models wrap the JSON in code fences or chatter; take the outermost object and validate it
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end < start:
+        raise ValueError("no JSON object in the reply")
     try:
-        # feedback = query_ollama(prompt)
-        # feedback = query_gemini(prompt)
-        feedback = query_groq(prompt)
-        feedback = feedback.replace("```json", "").replace("```", "")
-        return {"report": feedback}
-    
-    except Exception as e:
-        return {"error": str(e)}
\ No newline at end of file
+        return InterviewScores.model_validate_json(text[start:end + 1])
+    except ValidationError as e:
+        raise ValueError("; ".join(f"{'.'.join(map(str, err['loc'])) or 'json'}: {err['msg']}" for err in e.errors()))
+
+
+def aggregate_scores(results: list) -> dict:
+    graded = [r["scores"] for r in results if r["scores"] is not None]
+    summary = {"total": len(results), "graded": len(graded), "failed": len(results) - len(graded)}
+    for field in SCORE_FIELDS:
+        values = np.array([scores[field] for scores in graded])
+        summary[field] = {
+            "mean": round(float(values.mean()), 2) if graded else None,
+            "std": round(float(values.std()), 2) if graded else None,
+            "median": float(np.median(values)) if graded else None,
+            "distribution": {str(score): int((values == score).sum()) for score in range(1, 11)},
+        }
+    return summary
+
+
+@router.post("/evaluate_interview")
+async def evaluate_interview(req: InterviewEvalRequest):
+    report, scores, error = await judge_interview(req.jd_context, req.history)
+    return {
+        "report": report.replace("```json", "").replace("```", ""),
+        "scores": scores.model_dump() if scores else None,
+        "error": error,
+    }
+
+
+@router.post("/evaluate_interview/batch")
+async def evaluate_interview_batch(req: InterviewBatchRequest):
+    """
+    Grades many transcripts concurrently. Streams a "result" event per transcript as it finishes
+    (completion order; "index" and "id" say which one), then a "done" event with the aggregates.
+    """
+    current = current_trace()
+    if current is not None:
+        current.slow_ms = None # Slow by design; don't dump its span tree to the log
+
+    return StreamingResponse(
+        _judge_batch(req),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def _judge_batch(req: InterviewBatchRequest):
+    # The provider semaphores are shared with live traffic; this cap keeps one batch from taking them all
+    limit = asyncio.Semaphore(min(req.concurrency, JUDGE_BATCH_CONCURRENCY))
+
+    async def grade(index: int, item: InterviewBatchItem) -> dict:
+        async with limit:
+            try:
+                _, scores, error = await judge_interview(item.jd_context, item.history, req.use_cache)
+            except LLMError as e:
+                scores, error = None, str(e)
+        return {"index": index, "id": item.id, "scores": scores.model_dump() if scores else None, "error": error}
+
+    tasks = [asyncio.create_task(grade(index, item)) for index, item in enumerate(req.items)]
+    results = []
+    try:
+        for finished in asyncio.as_completed(tasks):
+            result = await finished
+            results.append(result)
+            yield sse_event(result, event="result")
+    finally:
+        # No-op once all are done; if the client disconnected, stop spending tokens on the rest
+        for task in tasks:
+            task.cancel()
+    yield sse_event(aggregate_scores(results), event="done")
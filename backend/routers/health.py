@@ -0,0 +1,52 @@
+# backend/routers/health.py
+
+import time
+import asyncio
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse, Response
+from config import WARMUP_ON_STARTUP
+from services import embedder_status, check_ready
+from executors import pool_stats
+from ingest import pdf_admission
+from llm_router import llm_router
+from sessions import interview_sessions
+import metrics
+
+router = APIRouter()
+STARTED_AT = time.time()
+
+# Orchestrator probes:
+# /healthz = the process is alive, /readyz = it can serve traffic at full speed.
+# /metrics = Prometheus scrape target.
+
+@router.get("/healthz")
+async def healthz():
+    return {"status": "ok", "uptime_seconds": round(time.time() - STARTED_AT, 1)}
+
+
+@router.get("/readyz")
+async def readyz():
+    # A live check, not a startup flag: an embedding server that comes up (or goes away) later is noticed here
+    ready = await asyncio.to_thread(check_ready)
+    model = embedder_status()
+    # SQLite behind a busy timeout: never on the event loop
+    sessions = await asyncio.to_thread(interview_sessions.stats)
+
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "ready": ready,
+            "uptime_seconds": round(time.time() - STARTED_AT, 1),
+            "warmup_on_startup": WARMUP_ON_STARTUP,
+            "embedding_model": model,
+            "pools": {**pool_stats(), "pdf": pdf_admission.stats()},
+            "llm": llm_router.stats(),
+            "interview_sessions": sessions,
+        }
+    )
+
+
+@router.get("/metrics")
+async def prometheus_metrics():
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
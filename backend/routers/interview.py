@@ -1,21 +1,24 @@
 # backend/routers/interview.py
 
-from fastapi import APIRouter
-from schemas import ChatRequest
-from utils import query_ollama, query_gemini, query_groq
+import asyncio
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from schemas import ChatRequest, InterviewSessionRequest, InterviewTurnRequest
+from utils import sse_stream
+from llm_router import llm_router
+from prompts import build_prompt, Part
+from sessions import interview_sessions, record_turn, release_turn
 
 router = APIRouter()
 
-@router.post("/interview_bot")
-async def interview_bot(req: ChatRequest):
-    system_instruction = f"""
+INTERVIEW_TEMPLATE = """
         ### ROLE
         You are a Technical Recruiter conducting a screening interview. Your goal is to assess the candidate's skills based strictly on the Job Description (JD).
 
         ### INPUT DATA
-        - JD: {req.context}
-        - Chat History: {req.history}
-        - Candidate Input: "{req.message}"
+        - JD: {context}
+        - Chat History: {history}
+        - Candidate Input: "{message}"
 
         ### STRICT INTERVIEW LOGIC (Follow Step-by-Step)
         1. **IF Input == "START_INTERVIEW"**:
@@ -44,11 +47,112 @@ async def interview_bot(req: ChatRequest):
         You must strictly output ONLY the response in this format:
         Interviewer Question: [Your text here]
     """
-    # Use Ollama
-    # response = query_ollama(system_instruction)
-    # Use Gemini
-    response = query_gemini(system_instruction)
-    # Use Groq
-    # response = query_groq(system_instruction)
+
+def build_interview_prompt(context: str, history: str, message: str) -> str:
+    # Over budget, the oldest chat goes first, then the tail of the JD; the new message is never cut
+    return build_prompt(
+        "interview", INTERVIEW_TEMPLATE,
+        context=Part(context, priority=1, min_tokens=256, dedupe=True),
+        history=Part(history, priority=0, keep="tail", min_tokens=128),
+        message=Part(message, max_tokens=1000)
+    )
+
+# --- STATELESS (the client sends the whole transcript every turn) ---
+@router.post("/interview_bot")
+async def interview_bot(req: ChatRequest):
+    system_instruction = build_interview_prompt(req.context, req.history, req.message)
+
+    # Conversation turns are never served from the response cache
+    response = await llm_router.complete("interview", system_instruction, use_cache=False)
     
     return {"reply": response}
+
+@router.post("/interview_bot/stream")
+async def interview_bot_stream(req: ChatRequest):
+    # Time-to-first-token is what the candidate feels, so stream the reply as SSE
+    system_instruction = build_interview_prompt(req.context, req.history, req.message)
+
+    tokens = llm_router.stream("interview", system_instruction)
+
+    return StreamingResponse(
+        sse_stream(tokens, final_key="reply"),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+# --- SESSIONS (the server keeps the transcript; each turn only sends the new message) ---
+@router.post("/interview/sessions")
+async def create_interview_session(req: InterviewSessionRequest):
+    session = await asyncio.to_thread(interview_sessions.create, req.jd_text)
+    return {"session_id": session.session_id, "ttl_seconds": interview_sessions.ttl}
+
+
+async def _open_turn(session_id: str, message: str) -> tuple:
+    # The caller releases the claim once the turn is over
+    session, claim = await asyncio.to_thread(interview_sessions.claim, session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Interview session not found or expired")
+    if claim is None:
+        raise HTTPException(status_code=409, detail="A reply is already being generated for this session")
+    try:
+        return claim, build_interview_prompt(session.jd, session.history(), message)
+    except Exception:
+        await release_turn(session_id, claim)
+        raise
+
+
+@router.post("/interview/sessions/{session_id}/turn")
+async def interview_turn(session_id: str, req: InterviewTurnRequest):
+    claim, system_instruction = await _open_turn(session_id, req.message)
+    try:
+        reply = await llm_router.complete("interview", system_instruction, use_cache=False)
+        # Recorded before the claim is released, so the next turn sees this one
+        turn = await record_turn(session_id, req.message, reply)
+    finally:
+        await release_turn(session_id, claim)
+
+    return {"reply": reply, "turn": turn}
+
+
+@router.post("/interview/sessions/{session_id}/turn/stream")
+async def interview_turn_stream(session_id: str, req: InterviewTurnRequest):
+    claim, system_instruction = await _open_turn(session_id, req.message)
+    try:
+        tokens = llm_router.stream("interview", system_instruction)
+    except Exception:
+        await release_turn(session_id, claim)
+        raise
+
+    # If the client leaves before the body starts, recorded() never runs and the lease lapses instead
+    async def recorded():
+        # The turn only joins the transcript once the whole reply made it out
+        parts = []
+        try:
+            async for token in tokens:
+                parts.append(token)
+                yield token
+            await record_turn(session_id, req.message, "".join(parts))
+        finally:
+            await release_turn(session_id, claim)
+
+    return StreamingResponse(
+        sse_stream(recorded(), final_key="reply"),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/interview/sessions/{session_id}")
+async def get_interview_session(session_id: str):
+    session = await asyncio.to_thread(interview_sessions.get, session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Interview session not found or expired")
+    return session.to_dict()
+
+
+@router.delete("/interview/sessions/{session_id}")
+async def delete_interview_session(session_id: str):
+    if not await asyncio.to_thread(interview_sessions.delete, session_id):
+        raise HTTPException(status_code=404, detail="Interview session not found or expired")
+    return {"deleted": session_id}
@@ -1,15 +1,16 @@
 # backend/routers/jobs.py
 
 from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
 from schemas import JDRequest
-from utils import query_ollama, query_gemini, query_groq
+from utils import sse_stream
+from llm_router import llm_router
+from prompts import build_prompt, Part
 
 router = APIRouter()
 
-@router.post("/generate_jd")
-async def generate_jd(req: JDRequest):
-    prompt = f"""
-        Generate a concise and professional Job Description for the role of {req.role}.
+JD_TEMPLATE = """
+        Generate a concise and professional Job Description for the role of {role}.
 
         Follow this exact format:
 
@@ -21,15 +22,36 @@ async def generate_jd(req: JDRequest):
         - Bullet points only
 
         Requirements:
-        - Required skills: {req.skills}
-        - Experience: {req.experience}+ years
+        - Required skills: {skills}
+        - Experience: {experience}+ years
     """
+
+def build_jd_prompt(req: JDRequest) -> str:
+    return build_prompt(
+        "jd", JD_TEMPLATE,
+        role=Part(req.role, max_tokens=50),
+        skills=Part(req.skills, max_tokens=300),
+        experience=Part(req.experience, max_tokens=10)
+    )
+
+@router.post("/generate_jd")
+async def generate_jd(req: JDRequest):
+    prompt = build_jd_prompt(req)
     
-    # Use Ollama
-    # jd_text = query_ollama(prompt)
-    # Use Gemini
-    jd_text = query_gemini(prompt)
-    # Use Groq
-    # jd_text = query_groq(prompt)
+    # Provider order comes from LLM_ROUTES["jd"] (Gemini, then Groq)
+    jd_text = await llm_router.complete("jd", prompt, use_cache=req.use_cache)
 
     return {"jd": jd_text}
+
+@router.post("/generate_jd/stream")
+async def generate_jd_stream(req: JDRequest):
+    # Same prompt as /generate_jd, but tokens go out as Server-Sent Events as they arrive
+    prompt = build_jd_prompt(req)
+
+    tokens = llm_router.stream("jd", prompt)
+
+    return StreamingResponse(
+        sse_stream(tokens, final_key="jd"),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,17 +1,21 @@
 # backend/routers/resumes.py
 
-import os
-import shutil
-import faiss
-import numpy as np
+import asyncio
 from typing import List
 from logger import logger
-from fastapi import APIRouter, UploadFile, File, Form
-from utils import extract_text_from_pdf, query_groq
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from ingest import extract_uploads
+from executors import run_in_pool
+from metrics import timed
 from services import get_embedder
+from chunking import chunk_documents, encode_chunks, l2_normalize
+from schemas import ResumeSearchRequest
+from screening import extract_required_skills, build_result, rank_resumes
 
 router = APIRouter()
-embedder = get_embedder()
+
+# NOTE: The embedder and the FAISS-backed vector_store are resolved inside the
+# handlers, so importing this router stays cheap (fast start, fast reload).
 
 @router.post("/screen_resumes")
 async def screen_resumes(
@@ -20,98 +24,114 @@ async def screen_resumes(
 ):
     logger.info(f"Resume Screening Started. Received {len(files)} files.")
 
-    # --- STEP 1: Smart Keyword Extraction (New Feature) ---
-    # We ask Groq to extract key technical skills from the JD to check for gaps later.
-    try:
-        skill_prompt = f"""
-        Extract the top 5-10 essential technical skills from this Job Description. 
-        Output strictly as a comma-separated list (e.g., Python, AWS, Docker). 
-        No other text.
-        
-        JD: {jd_text[:2000]}
-        """
-        # We use Groq for speed
-        extracted_skills_str = query_groq(skill_prompt)
-        # Clean up list
-        required_skills = [s.strip().lower() for s in extracted_skills_str.split(',') if s.strip()]
-        logger.info(f"Extracted Skills for Gap Analysis: {required_skills}")
-    except Exception as e:
-        logger.error(f"Skill extraction failed: {e}")
-        required_skills = []
-
-    # --- STEP 2: Process Resumes & Embed ---
-    resume_data = [] # Store text and filename
-    
-    temp_dir = "temp_uploads"
-    os.makedirs(temp_dir, exist_ok=True)
-    
-    for file in files:
-        file_path = os.path.join(temp_dir, file.filename)
-        with open(file_path, "wb") as f:
-            shutil.copyfileobj(file.file, f)
-            
-        try:
-            text = extract_text_from_pdf(file_path)
-            if text.strip():
-                resume_data.append({"filename": file.filename, "text": text})
-        except:
-            continue
-            
-    # Cleanup early
-    if os.path.exists(temp_dir):
-        shutil.rmtree(temp_dir)
+    # --- STEP 1 & 2: Smart Keyword Extraction + Process Resumes ---
+    # The LLM call and the PDF parsing don't depend on each other, so they overlap.
+    # PDFs are parsed in memory across the PDF process pool, so concurrent requests never share files.
+    required_skills, (resume_data, file_report) = await asyncio.gather(
+        extract_required_skills(jd_text),
+        extract_uploads(files)
+    )
 
     if not resume_data:
-        return {"results": []}
-
-    # --- STEP 3: Vector Search (The Math) ---
-    # Batch encode
-    resume_texts = [r["text"] for r in resume_data]
-    resume_embeddings = embedder.encode(resume_texts)
-    jd_embedding = embedder.encode([jd_text])
-
-    # Normalize
-    faiss.normalize_L2(np.array(jd_embedding))
-    faiss.normalize_L2(np.array(resume_embeddings))
-
-    # Index
-    d = resume_embeddings.shape[1]
-    index = faiss.IndexFlatIP(d)
-    index.add(np.array(resume_embeddings))
-    
-    # Search
-    distances, indices = index.search(np.array(jd_embedding), len(resume_data))
-    
-    # --- STEP 4: Compile Results with Gap Analysis ---
-    results = []
-    
-    for rank, idx in enumerate(indices[0]):
-        similarity = distances[0][rank]
-        score = float(similarity * 100)
-        
-        # New Feature: Identify Missing Skills
-        resume_text_lower = resume_texts[idx].lower()
-        missing = [skill for skill in required_skills if skill not in resume_text_lower]
-        
-        # Create a "Match Reason" summary
-        if len(missing) == 0:
-            feedback = "Perfect Skill Match!"
-        elif len(missing) > 3:
-            feedback = f"Missing key skills: {', '.join(missing[:3])}, etc."
-        else:
-            feedback = f"Missing: {', '.join(missing)}"
-
-        results.append({
-            "rank": rank + 1,
-            "filename": resume_data[idx]["filename"],
-            "score": round(score, 2),
-            "score_formatted": f"{round(score, 2)}%",  # Explicit percentage string
-            "missing_skills": missing,
-            "feedback": feedback,
-            "summary": resume_texts[idx][:200] + "..." # Preview
-        })
-
-    # Sort by score desc (Just to be safe, though FAISS returns sorted)
-    results.sort(key=lambda x: x['score'], reverse=True)
+        return {"results": [], "files": file_report}
+
+    # --- STEP 3 & 4: Vector Search + Gap Analysis ---
+    # Embedding, FAISS and gap analysis run on the screening pool, so the event loop stays free
+    # for every other endpoint (and concurrent requests' encode calls can share a batch).
+    # The embedder is resolved there too: on a cold start, loading it would otherwise block the loop.
+    def rank():
+        return rank_resumes(get_embedder(), jd_text, resume_data, required_skills)
+
+    results = await run_in_pool("screening", rank)
     
-    return {"results": results}
\ No newline at end of file
+    return {"results": results, "files": file_report}
+
+
+# --- PERSISTENT CANDIDATE POOL ---
+def _index_new(resume_data: list, report: list) -> tuple:
+    """
+    Runs on the screening pool: opening the index reads SQLite + FAISS (maybe a rebuild),
+    and its lock can be held by another request's add. Returns (new resumes, pool size).
+    """
+    from vector_store import get_resume_index, make_resume_id
+
+    resume_index = get_resume_index()
+    pending, entries = {}, []
+    for resume in resume_data:
+        text = resume["text"]
+        resume_id = make_resume_id(text)
+        entry = {"filename": resume["filename"], "resume_id": resume_id, "status": "duplicate"}
+        entries.append(entry)
+        # Only a shortcut to skip embedding known resumes; add() makes the real check
+        if resume_id not in pending and not resume_index.contains(resume_id):
+            pending[resume_id] = {"resume_id": resume_id, "filename": resume["filename"], "text": text}
+
+    added = []
+    if pending:
+        items = list(pending.values())
+        with timed("chunk", resumes=len(items)):
+            chunks, owners = chunk_documents([p["text"] for p in items])
+        with timed("embed", chunks=len(chunks)):
+            vectors = l2_normalize(encode_chunks(get_embedder(), chunks))
+        for i, item in enumerate(items):
+            item["vectors"] = vectors[owners == i]
+        with timed("index_add", resumes=len(items)):
+            added = resume_index.add(items)
+
+    # Another request (in this process or another) may have indexed the same resume meanwhile
+    unclaimed = set(added)
+    for entry in entries:
+        if entry["resume_id"] in unclaimed:
+            entry["status"] = "indexed"
+            unclaimed.discard(entry["resume_id"])
+    report.extend(entries)
+    return len(added), resume_index.count()
+
+
+@router.post("/resumes/ingest")
+async def ingest_resumes(files: List[UploadFile] = File(...)):
+    # Parse once, embed only resumes the index has never seen, then persist.
+    resume_data, file_report = await extract_uploads(files)
+    report = [entry for entry in file_report if entry["status"] != "ok"]
+
+    indexed, pool_size = await run_in_pool("screening", _index_new, resume_data, report)
+
+    logger.info(f"Ingested {indexed} new resumes ({len(files) - indexed} skipped).")
+    return {"files": report, "pool_size": pool_size}
+
+
+@router.post("/resumes/search")
+async def search_resumes(req: ResumeSearchRequest):
+    # One JD embedding + one ANN lookup, no matter how big the pool is.
+    from vector_store import get_resume_index
+
+    required_skills = await extract_required_skills(req.jd_text) if req.gap_analysis else []
+
+    def search():
+        with timed("embed"):
+            jd_embedding = l2_normalize(get_embedder().encode([req.jd_text]))
+        with timed("faiss_search", top_k=req.top_k):
+            hits = get_resume_index().search(jd_embedding[0], req.top_k)
+
+        results = []
+        with timed("gap_analysis", resumes=len(hits), skills=len(required_skills)):
+            for rank, hit in enumerate(hits):
+                result = build_result(rank + 1, hit["filename"], hit["text"], hit["score"], required_skills)
+                result["resume_id"] = hit["resume_id"]
+                results.append(result)
+        return results
+
+    return {"results": await run_in_pool("search", search)}
+
+
+@router.delete("/resumes/{resume_id}")
+async def delete_resume(resume_id: str):
+    from vector_store import get_resume_index
+
+    # A delete can trigger a full index rebuild; opening the index happens on the pool too
+    def delete():
+        return get_resume_index().delete(resume_id)
+
+    if not await run_in_pool("screening", delete):
+        raise HTTPException(status_code=404, detail=f"Resume {resume_id} not found")
+    return {"deleted": resume_id}
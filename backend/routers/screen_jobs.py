@@ -0,0 +1,51 @@
+# backend/routers/screen_jobs.py
+
+import asyncio
+from typing import List
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from job_queue import get_job_queue
+from ingest import read_uploads, close_uploads
+from logger import logger
+
+router = APIRouter()
+
+# Asynchronous version of /screen_resumes for big batches:
+# submit -> poll progress -> fetch result. The work happens in worker.py processes.
+
+@router.post("/screen_jobs")
+async def submit_screen_job(
+    jd_text: str = Form(...),
+    files: List[UploadFile] = File(...)
+):
+    # Same size caps as /screen_resumes; rejected files never reach the queue
+    uploads, rejected = await read_uploads(files)
+    try:
+        if not uploads:
+            raise HTTPException(status_code=413, detail={"message": "No file within upload limits", "files": rejected})
+
+        # The insert reads every spooled file and may wait on busy_timeout, so keep it off the event loop
+        job_id = await asyncio.to_thread(get_job_queue().submit, jd_text, uploads)
+    finally:
+        close_uploads(uploads)
+    logger.info(f"Screening job {job_id} queued with {len(uploads)} files ({len(rejected)} rejected).")
+    return {"job_id": job_id, "status": "queued", "total_files": len(uploads), "rejected": rejected}
+
+
+@router.get("/screen_jobs/{job_id}")
+async def get_screen_job(job_id: str):
+    job = await asyncio.to_thread(get_job_queue().get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+
+@router.get("/screen_jobs/{job_id}/result")
+async def get_screen_job_result(job_id: str):
+    job = await asyncio.to_thread(get_job_queue().get, job_id, True)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    if job["status"] == "failed":
+        raise HTTPException(status_code=500, detail=job["error"])
+    if job["status"] != "done":
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is {job['status']} ({job['stage']})")
+    return job["result"]
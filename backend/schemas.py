@@ -1,13 +1,26 @@
 # backend/schemas.py
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from config import SEARCH_MAX_TOP_K
 
 class JDRequest(BaseModel):
     role: str
     skills: str
     experience: str
+    use_cache: bool = True # Set False to force a fresh draft
 
 class ChatRequest(BaseModel):
     history: str
     message: str
     context: str
+
+class InterviewSessionRequest(BaseModel):
+    jd_text: str
+
+class InterviewTurnRequest(BaseModel):
+    message: str
+
+class ResumeSearchRequest(BaseModel):
+    jd_text: str
+    top_k: int = Field(10, ge=1, le=SEARCH_MAX_TOP_K)
+    gap_analysis: bool = True
@@ -0,0 +1,102 @@
+# backend/screening.py
+
+import numpy as np
+from logger import logger
+from metrics import timed
+from llm_router import llm_router
+from prompts import build_prompt, Part
+from skill_matcher import get_matcher
+from chunking import chunk_documents, encode_chunks, pool_scores
+
+
+# --- STEP 1: Smart Keyword Extraction ---
+SKILLS_TEMPLATE = """
+        Extract the top 5-10 essential technical skills from this Job Description.
+        Output strictly as a comma-separated list (e.g., Python, AWS, Docker).
+        No other text.
+
+        JD: {jd}
+        """
+
+async def extract_required_skills(jd_text: str) -> list:
+    # We ask Groq to extract key technical skills from the JD to check for gaps later.
+    try:
+        # The skills are near the top of a JD, so ~500 tokens of it is plenty
+        skill_prompt = build_prompt("skills", SKILLS_TEMPLATE, jd=Part(jd_text, max_tokens=500, dedupe=True))
+        # Groq first for speed (LLM_ROUTES["skills"]); failures raise instead of returning text
+        extracted_skills_str = await llm_router.complete("skills", skill_prompt)
+        # Clean up list
+        required_skills = [s.strip().lower() for s in extracted_skills_str.split(',') if s.strip()]
+        logger.debug(f"Extracted {len(required_skills)} skills for gap analysis: {required_skills}")
+        return required_skills
+    except Exception as e:
+        logger.error(f"Skill extraction failed: {e}")
+        return []
+
+
+# --- STEP 4: Compile Results with Gap Analysis ---
+def build_result(rank: int, filename: str, text: str, similarity: float, required_skills: list) -> dict:
+    score = float(similarity * 100)
+
+    # Identify Missing Skills (one pass over the resume, whatever the number of skills)
+    _, missing = get_matcher(required_skills).split(text)
+
+    # Create a "Match Reason" summary
+    if len(missing) == 0:
+        feedback = "Perfect Skill Match!"
+    elif len(missing) > 3:
+        feedback = f"Missing key skills: {', '.join(missing[:3])}, etc."
+    else:
+        feedback = f"Missing: {', '.join(missing)}"
+
+    return {
+        "rank": rank,
+        "filename": filename,
+        "score": round(score, 2),
+        "score_formatted": f"{round(score, 2)}%",  # Explicit percentage string
+        "missing_skills": missing,
+        "feedback": feedback,
+        "summary": text[:200] + "..." # Preview
+    }
+
+
+# --- STEP 3 & 4: Vector Search + Gap Analysis ---
+def rank_resumes(embedder, jd_text: str, resume_data: list, required_skills: list) -> list:
+    """resume_data: [{"filename", "text"}]. Returns result dicts, best match first."""
+    if not resume_data:
+        return []
+
+    import faiss # Loaded on first use, not at startup
+
+    # Chunk every resume so pages past the model's 256-token window still count
+    resume_texts = [r["text"] for r in resume_data]
+    with timed("chunk", resumes=len(resume_texts)):
+        chunks, owners = chunk_documents(resume_texts)
+
+    # Batch encode, length-sorted
+    with timed("embed", chunks=len(chunks)):
+        chunk_embeddings = encode_chunks(embedder, chunks)
+        jd_embedding = np.array(embedder.encode([jd_text]), dtype="float32")
+
+    # Normalize
+    faiss.normalize_L2(jd_embedding)
+    faiss.normalize_L2(chunk_embeddings)
+
+    # Index + search every chunk, then score each resume by its best chunk(s)
+    with timed("faiss_search", vectors=len(chunks)):
+        d = chunk_embeddings.shape[1]
+        index = faiss.IndexFlatIP(d)
+        index.add(chunk_embeddings)
+        distances, indices = index.search(jd_embedding, len(chunks))
+    scores = pool_scores(distances[0], owners[indices[0]], len(resume_data))
+    ranking = np.argsort(-scores)
+
+    with timed("gap_analysis", resumes=len(ranking), skills=len(required_skills)):
+        results = [
+            build_result(rank + 1, resume_data[idx]["filename"], resume_texts[idx], scores[idx], required_skills)
+            for rank, idx in enumerate(ranking)
+        ]
+
+    # Sort by score desc (Just to be safe, ranking is already sorted)
+    results.sort(key=lambda x: x['score'], reverse=True)
+    return results
@@ -1,13 +1,160 @@
 # backend/services.py
 
-from sentence_transformers import SentenceTransformer
-from config import EMBEDDING_MODEL
+import time
+import threading
+from config import (
+    EMBEDDING_MODEL, EMBEDDING_BACKEND, ONNX_INT8_FILE,
+    EMBEDDING_CACHE_ENABLED, EMBEDDING_CACHE_SIZE, EMBEDDING_CACHE_PATH,
+    EMBEDDING_MODE, EMBEDDING_SOCKET, EMBED_BATCH_SIZE,
+    EMBED_BATCHING_ENABLED, EMBED_BATCH_MAX_SIZE, EMBED_BATCH_MAX_DELAY_MS,
+    WARMUP_ON_STARTUP
+)
 from logger import logger
+from tracing import span
 
-# Singleton Pattern: Load model only once when the app starts
-logger.info("Loading Embedding Model...")
-embedder = SentenceTransformer(EMBEDDING_MODEL)
-logger.info("Model Loaded.")
+# Singleton Pattern: the model is loaded once, on first use (or by warmup()),
+# so importing this module costs nothing and `reload=True` restarts stay fast.
+_embedder = None
+_batcher = None
+_cache = None
+_client = None # EmbeddingClient, in EMBEDDING_MODE=server
+_embedder_lock = threading.Lock()
+_warmup_lock = threading.Lock()
+_status = {
+    "model": EMBEDDING_MODEL,
+    "backend": EMBEDDING_BACKEND,
+    "mode": EMBEDDING_MODE,
+    "loaded": False,
+    "load_seconds": None,
+    "warm": False,
+    "warmup_seconds": None,
+    "error": None,
+}
 
-def get_embedder():
+
+def load_model(backend: str = EMBEDDING_BACKEND):
+    """Raw SentenceTransformer on the requested runtime (no cache)."""
+    # torch + sentence-transformers are the slowest imports in the app
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "torch":
+        return SentenceTransformer(EMBEDDING_MODEL)
+    if backend == "onnx":
+        return SentenceTransformer(EMBEDDING_MODEL, backend="onnx")
+    if backend == "onnx-int8":
+        return SentenceTransformer(EMBEDDING_MODEL, backend="onnx", model_kwargs={"file_name": ONNX_INT8_FILE})
+    raise ValueError(f"Unknown EMBEDDING_BACKEND '{backend}' (expected torch, onnx or onnx-int8)")
+
+
+def cache_namespace(backend: str = EMBEDDING_BACKEND) -> str:
+    # Quantized vectors differ slightly, so they never share cache entries with fp32 ones
+    return EMBEDDING_MODEL if backend == "torch" else f"{EMBEDDING_MODEL}@{backend}"
+
+
+def make_batcher(model):
+    from batcher import EmbeddingBatcher
+    return EmbeddingBatcher(model, EMBED_BATCH_MAX_SIZE, EMBED_BATCH_MAX_DELAY_MS, EMBED_BATCH_SIZE)
+
+
+def _load_embedder():
+    global _batcher, _cache, _client
+    from embedding_cache import CachedEmbedder
+
+    start = time.perf_counter()
+    if EMBEDDING_MODE == "server":
+        # The model lives in embedding_server.py; this process only holds a socket
+        from embedding_server import EmbeddingClient
+        embedder = _client = EmbeddingClient(EMBEDDING_SOCKET)
+        embedder.info() # Fail now (and retry on next use) if the server isn't up
+        logger.info(f"Using embedding server at {EMBEDDING_SOCKET}.")
+    else:
+        logger.info(f"Loading Embedding Model ({EMBEDDING_BACKEND})...")
+        embedder = load_model(EMBEDDING_BACKEND)
+        logger.info(f"Model Loaded in {round(time.perf_counter() - start, 3)}s.")
+        # Concurrent requests share forward passes (the embedding server batches on its side)
+        if EMBED_BATCHING_ENABLED:
+            embedder = _batcher = make_batcher(embedder)
+    _status["load_seconds"] = round(time.perf_counter() - start, 3)
+
+    # Only cache misses go through the model
+    if EMBEDDING_CACHE_ENABLED:
+        embedder = _cache = CachedEmbedder(embedder, cache_namespace(), EMBEDDING_CACHE_SIZE, EMBEDDING_CACHE_PATH)
     return embedder
+
+
+def get_embedder():
+    global _embedder
+    if _embedder is None:
+        with _embedder_lock:
+            if _embedder is None:
+                try:
+                    # Shows up in the trace of whichever request paid for the load
+                    with span("embedder.load", mode=EMBEDDING_MODE, backend=EMBEDDING_BACKEND):
+                        _embedder = _load_embedder()
+                    _status["loaded"] = True
+                    _status["error"] = None # An earlier attempt may have failed (e.g. the server wasn't up yet)
+                    if not WARMUP_ON_STARTUP:
+                        _status["warm"] = True # Nothing more to wait for
+                except Exception as e:
+                    _status["error"] = str(e)
+                    raise
+    return _embedder
+
+
+def warmup():
+    """Loads the model and runs one dummy encode so the first real request doesn't pay for it."""
+    with _warmup_lock:
+        if not _status["warm"]:
+            _warmup()
+
+
+def _warmup():
+    import faiss # Pull the vector math library in now as well
+
+    embedder = get_embedder()
+    start = time.perf_counter()
+    try:
+        # Bypass the cache wrapper: a cached vector wouldn't exercise the kernels
+        getattr(embedder, "model", embedder).encode(["warmup: python developer with aws experience"])
+    except Exception as e:
+        _status["error"] = str(e)
+        raise
+    _status["warmup_seconds"] = round(time.perf_counter() - start, 3)
+    _status["warm"] = True
+    logger.info(f"Embedding model warm in {_status['warmup_seconds']}s.")
+
+
+def check_ready() -> bool:
+    """
+    Live readiness for /readyz (blocking). Retries a warmup that failed at startup, and
+    in server mode pings the embedding server on every call, so readiness follows it both ways.
+    """
+    try:
+        if WARMUP_ON_STARTUP and not _status["warm"]:
+            if not _warmup_lock.acquire(blocking=False):
+                return False # The startup warmup is still running
+            try:
+                if not _status["warm"]:
+                    _warmup()
+            finally:
+                _warmup_lock.release()
+        elif EMBEDDING_MODE == "server":
+            get_embedder() # Just a socket client; connects (and fails) fast
+    except Exception as e:
+        _status["error"] = str(e)
+        return False
+
+    if _client is not None and not _client.ping():
+        _status["error"] = f"embedding server unavailable at {EMBEDDING_SOCKET}"
+        return False
+    _status["error"] = None
+    return True
+
+
+def embedder_status() -> dict:
+    status = dict(_status)
+    if _cache is not None:
+        status["cache"] = _cache.stats()
+    if _batcher is not None:
+        status["batching"] = _batcher.stats()
+    return status
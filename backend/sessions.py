@@ -0,0 +1,316 @@
+# backend/sessions.py
+
+import os
+import json
+import time
+import asyncio
+import secrets
+import sqlite3
+import threading
+from contextlib import contextmanager
+from config import (
+    INTERVIEW_DB_PATH, INTERVIEW_SESSION_TTL, INTERVIEW_MAX_SESSIONS, INTERVIEW_RECENT_TURNS,
+    INTERVIEW_SUMMARY_MAX_CHARS, INTERVIEW_JD_MAX_CHARS, INTERVIEW_TURN_LEASE
+)
+from llm_router import llm_router
+from prompts import build_prompt, Part
+from logger import logger
+
+# Hidden triggers from the UI; they steer the interviewer but are not part of the transcript
+CONTROL_MESSAGES = ("START_INTERVIEW", "END_INTERVIEW")
+
+
+SUMMARY_TEMPLATE = """
+        You keep notes on a technical screening interview.
+        Update the running summary with the new messages below.
+        Keep: topics already covered, how the candidate did on each, the difficulty level reached.
+        Write at most 120 words of plain text. No preamble.
+
+        Current summary: {summary}
+        New messages:
+        {transcript}
+    """
+
+
+async def summarize(summary: str, turns: list) -> str:
+    transcript = "\n".join(f"{role}: {content}" for role, content in turns)
+    prompt = build_prompt(
+        "summary", SUMMARY_TEMPLATE,
+        summary=summary or "(none yet)",
+        transcript=Part(transcript, priority=0, keep="tail")
+    )
+    return (await llm_router.complete("summary", prompt, use_cache=False)).strip()
+
+
+def _fallback_summary(summary: str, turns: list) -> str:
+    # The summarizer is down: keep a clipped transcript so the prompt still stays bounded
+    clipped = " | ".join(f"{role}: {content[:150]}" for role, content in turns)
+    return f"{summary} | {clipped}" if summary else clipped
+
+
+def _clip_summary(summary: str, limit: int = INTERVIEW_SUMMARY_MAX_CHARS) -> str:
+    # Newest notes are at the end (the fallback appends), so over the cap the oldest go first
+    if len(summary) <= limit:
+        return summary
+    tail = summary[-limit:]
+    cut = tail.find(" | ")
+    return tail[cut + 3:] if cut != -1 else tail
+
+
+class InterviewSession:
+    """
+    Snapshot of one candidate's interview, as read from the store. The prompt only ever carries
+    the JD, the running summary and the last INTERVIEW_RECENT_TURNS messages, so its size stays
+    flat however long the interview runs.
+    """
+
+    def __init__(self, session_id: str, jd: str, summary: str, turns: list, turn_count: int):
+        self.session_id = session_id
+        self.jd = jd
+        self.summary = summary
+        self.turns = turns # [(role, content)], oldest first, not yet summarized
+        self.turn_count = turn_count
+
+    def history(self) -> str:
+        recent = "\n".join(f"{role}: {content}" for role, content in self.turns)
+        if not self.summary:
+            return recent
+        return f"Summary of the earlier interview: {self.summary}\n\nMost recent messages:\n{recent}"
+
+    def to_dict(self) -> dict:
+        return {
+            "session_id": self.session_id,
+            "turn_count": self.turn_count,
+            "summary": self.summary,
+            "recent_turns": [{"role": role, "content": content} for role, content in self.turns],
+        }
+
+
+class SessionStore:
+    """
+    Interview sessions on SQLite, shared by every API worker on this host, so a follow-up
+    turn can land on any of them. Sessions idle for `ttl` seconds expire; past `max_sessions`
+    the least recently used go. Blocking calls: the router runs them through asyncio.to_thread.
+
+    One turn at a time per session: claim() takes a lease that lapses after INTERVIEW_TURN_LEASE,
+    so a turn that never releases it (a stream whose client left before it started) can't wedge
+    the session. Folding old turns into the summary holds a lease of its own.
+    """
+
+    def __init__(self, db_path: str = INTERVIEW_DB_PATH, max_sessions: int = INTERVIEW_MAX_SESSIONS,
+                 ttl: float = INTERVIEW_SESSION_TTL):
+        folder = os.path.dirname(db_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.expired = 0 # Counted by this worker
+        self.evicted = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA busy_timeout=30000")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS interview_sessions (
+                session_id TEXT PRIMARY KEY,
+                jd TEXT NOT NULL,
+                summary TEXT NOT NULL DEFAULT '',
+                turns TEXT NOT NULL DEFAULT '[]',
+                turn_count INTEGER NOT NULL DEFAULT 0,
+                last_access REAL NOT NULL,
+                claimed_at REAL,
+                compacting_at REAL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_interview_access ON interview_sessions (last_access)")
+
+    @contextmanager
+    def _transaction(self):
+        # BEGIN IMMEDIATE: the read and the write that depends on it see no other worker in between
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._db
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def _load(self, db, session_id: str, now: float):
+        """The session's row as an InterviewSession (touching it), or None if missing or expired."""
+        row = db.execute(
+            "SELECT jd, summary, turns, turn_count, last_access FROM interview_sessions WHERE session_id = ?",
+            (session_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        if now - row[4] > self.ttl:
+            db.execute("DELETE FROM interview_sessions WHERE session_id = ?", (session_id,))
+            self.expired += 1
+            return None
+        db.execute("UPDATE interview_sessions SET last_access = ? WHERE session_id = ?", (now, session_id))
+        return InterviewSession(session_id, row[0], row[1], [tuple(t) for t in json.loads(row[2])], row[3])
+
+    def create(self, jd_text: str) -> InterviewSession:
+        session = InterviewSession(secrets.token_urlsafe(16), jd_text[:INTERVIEW_JD_MAX_CHARS], "", [], 0)
+        now = time.time()
+        with self._transaction() as db:
+            self.expired += db.execute(
+                "DELETE FROM interview_sessions WHERE last_access < ?", (now - self.ttl,)
+            ).rowcount
+            db.execute(
+                "INSERT INTO interview_sessions (session_id, jd, last_access) VALUES (?, ?, ?)",
+                (session.session_id, session.jd, now)
+            )
+            over = db.execute("SELECT COUNT(*) FROM interview_sessions").fetchone()[0] - self.max_sessions
+            if over > 0:
+                self.evicted += db.execute(
+                    "DELETE FROM interview_sessions WHERE session_id IN "
+                    "(SELECT session_id FROM interview_sessions ORDER BY last_access LIMIT ?)",
+                    (over,)
+                ).rowcount
+        return session
+
+    def get(self, session_id: str):
+        with self._transaction() as db:
+            return self._load(db, session_id, time.time())
+
+    def claim(self, session_id: str) -> tuple:
+        """
+        Opens a turn. Returns (session, claim): session is None if it doesn't exist,
+        claim is None if another turn holds it. Pass the claim to release() when the turn is over.
+        """
+        now = time.time()
+        with self._transaction() as db:
+            session = self._load(db, session_id, now)
+            if session is None:
+                return None, None
+            claimed = db.execute(
+                "UPDATE interview_sessions SET claimed_at = ? WHERE session_id = ? "
+                "AND (claimed_at IS NULL OR claimed_at < ?)",
+                (now, session_id, now - INTERVIEW_TURN_LEASE)
+            ).rowcount
+        return session, (now if claimed else None)
+
+    def release(self, session_id: str, claim: float):
+        # A turn whose lease lapsed must not free the claim of the turn that took over
+        with self._lock:
+            self._db.execute(
+                "UPDATE interview_sessions SET claimed_at = NULL WHERE session_id = ? AND claimed_at = ?",
+                (session_id, claim)
+            )
+
+    def append(self, session_id: str, turns: list) -> tuple:
+        """Adds one finished turn's messages. Returns (turn_count, messages not yet summarized)."""
+        with self._transaction() as db:
+            row = db.execute(
+                "SELECT turns, turn_count FROM interview_sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if row is None:
+                return 0, 0 # Deleted (or expired) while the reply was generated
+            stored = json.loads(row[0]) + [list(t) for t in turns]
+            db.execute(
+                "UPDATE interview_sessions SET turns = ?, turn_count = ? WHERE session_id = ?",
+                (json.dumps(stored), row[1] + 1, session_id)
+            )
+        return row[1] + 1, len(stored)
+
+    def start_compaction(self, session_id: str):
+        """Leases the summary update. Returns (lease, summary, turns to fold) or None if there's nothing to do."""
+        now = time.time()
+        with self._transaction() as db:
+            row = db.execute(
+                "SELECT summary, turns FROM interview_sessions WHERE session_id = ? "
+                "AND (compacting_at IS NULL OR compacting_at < ?)",
+                (session_id, now - INTERVIEW_TURN_LEASE)
+            ).fetchone()
+            if row is None:
+                return None
+            folded = [tuple(t) for t in json.loads(row[1])[:-INTERVIEW_RECENT_TURNS]]
+            if not folded:
+                return None
+            db.execute("UPDATE interview_sessions SET compacting_at = ? WHERE session_id = ?", (now, session_id))
+        return now, row[0], folded
+
+    def finish_compaction(self, session_id: str, lease: float, folded: int, summary: str):
+        with self._transaction() as db:
+            row = db.execute(
+                "SELECT turns FROM interview_sessions WHERE session_id = ? AND compacting_at = ?",
+                (session_id, lease)
+            ).fetchone()
+            if row is None:
+                return # Lease lapsed and another worker took over, or the session is gone
+            # Turns are only ever appended, so the folded ones are still at the front
+            db.execute(
+                "UPDATE interview_sessions SET summary = ?, turns = ?, compacting_at = NULL WHERE session_id = ?",
+                (_clip_summary(summary), json.dumps(json.loads(row[0])[folded:]), session_id)
+            )
+
+    def abandon_compaction(self, session_id: str, lease: float):
+        # Failed or cancelled: the next turn retries instead of waiting out the lease
+        with self._lock:
+            self._db.execute(
+                "UPDATE interview_sessions SET compacting_at = NULL WHERE session_id = ? AND compacting_at = ?",
+                (session_id, lease)
+            )
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._db.execute(
+                "DELETE FROM interview_sessions WHERE session_id = ?", (session_id,)
+            ).rowcount > 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            active = self._db.execute(
+                "SELECT COUNT(*) FROM interview_sessions WHERE last_access >= ?", (time.time() - self.ttl,)
+            ).fetchone()[0]
+        return {
+            "active": active,
+            "max_sessions": self.max_sessions,
+            "ttl_seconds": self.ttl,
+            "expired": self.expired,
+            "evicted": self.evicted,
+        }
+
+
+# Singleton Pattern: one connection per API worker, one database per host
+interview_sessions = SessionStore()
+
+# Summary tasks run off the reply path; asyncio only keeps weak references to tasks
+_compactions = set()
+
+
+async def record_turn(session_id: str, message: str, reply: str) -> int:
+    """Stores a finished turn, then folds older turns into the summary in the background. Returns the turn count."""
+    turns = ([] if message in CONTROL_MESSAGES else [("user", message)]) + [("assistant", reply)]
+    turn_count, pending = await asyncio.to_thread(interview_sessions.append, session_id, turns)
+    if pending > INTERVIEW_RECENT_TURNS:
+        # Off the reply path: the candidate never waits for the summary
+        task = asyncio.create_task(_compact(session_id))
+        _compactions.add(task)
+        task.add_done_callback(_compactions.discard)
+    return turn_count
+
+
+async def release_turn(session_id: str, claim: float):
+    # Shielded: a cancelled request still gets its claim released, just off the event loop
+    await asyncio.shield(asyncio.to_thread(interview_sessions.release, session_id, claim))
+
+
+async def _compact(session_id: str):
+    work = await asyncio.to_thread(interview_sessions.start_compaction, session_id)
+    if work is None:
+        return # Nothing to fold, or another worker is already on it
+    lease, summary, folded = work
+    try:
+        try:
+            summary = await summarize(summary, folded)
+        except Exception as e:
+            logger.warning(f"Interview summary failed for session {session_id}: {e}")
+            summary = _fallback_summary(summary, folded)
+        await asyncio.to_thread(interview_sessions.finish_compaction, session_id, lease, len(folded), summary)
+    finally:
+        # No-op after finish_compaction; on cancellation (shutdown) it frees the lease right away
+        await asyncio.shield(asyncio.to_thread(interview_sessions.abandon_compaction, session_id, lease))
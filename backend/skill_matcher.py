@@ -0,0 +1,158 @@
+# backend/skill_matcher.py
+
+from collections import deque
+from functools import lru_cache
+
+# Canonical skill -> other ways resumes and JDs write it.
+# Lookups are case-insensitive and go both ways ("k8s" in a JD matches "Kubernetes" in a CV).
+# No aliases that are ordinary words ("node", "go") or common abbreviations ("ts"): they match prose.
+SKILL_ALIASES = {
+    "kubernetes": ["k8s"],
+    "javascript": ["js", "ecmascript"],
+    "node.js": ["nodejs", "node js"],
+    "react": ["react.js", "reactjs"],
+    "vue": ["vue.js", "vuejs"],
+    "angular": ["angularjs", "angular.js"],
+    "c#": ["csharp", "c sharp"],
+    "c++": ["cpp"],
+    "postgresql": ["postgres", "psql"],
+    "mongodb": ["mongo"],
+    "aws": ["amazon web services"],
+    "gcp": ["google cloud", "google cloud platform"],
+    "azure": ["microsoft azure"],
+    "ci/cd": ["cicd", "ci cd", "continuous integration"],
+    "machine learning": ["ml"],
+    "natural language processing": ["nlp"],
+    "large language models": ["llm", "llms"],
+    "scikit-learn": ["sklearn", "scikit learn"],
+    "rest api": ["rest apis", "restful", "restful api", "restful apis"],
+    "sql": ["structured query language"],
+}
+
+# Surface form -> canonical name
+_CANONICAL = {}
+for _canonical, _aliases in SKILL_ALIASES.items():
+    for _form in [_canonical] + _aliases:
+        _CANONICAL[_form] = _canonical
+
+
+def normalize(text: str) -> str:
+    # PDF text breaks lines mid-phrase, so "machine\nlearning" must still match
+    return " ".join(text.lower().split())
+
+
+def surface_forms(skill: str) -> list:
+    """Every spelling that counts as `skill` (the skill itself plus its alias group)."""
+    skill = normalize(skill)
+    canonical = _CANONICAL.get(skill)
+    if canonical is None:
+        return [skill]
+    return [canonical] + SKILL_ALIASES[canonical]
+
+
+# Characters that belong to a skill's name, so "c" doesn't match inside "c++", "c#" or "ci/cd"
+_NAME_CHARS = "+#/"
+
+
+def _joins(text: str, j: int) -> bool:
+    """Whether text[j] is part of the same token as the characters around it."""
+    ch = text[j]
+    if ch.isalnum() or ch in _NAME_CHARS:
+        return True
+    # A full stop ends a sentence, but a dot before a letter is part of the name ("node.js", ".net")
+    return ch == "." and j + 1 < len(text) and text[j + 1].isalnum()
+
+
+class SkillMatcher:
+    """
+    Aho-Corasick automaton over every surface form of a skill set.
+    find() walks a document once, whatever the number of skills, and only
+    accepts hits on token boundaries (so "go" does not match "google", nor "c" match "c++").
+    """
+
+    def __init__(self, skills):
+        self.skills = list(skills)
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]] # per state: [(pattern_length, skill_index)]
+
+        for skill_idx, skill in enumerate(self.skills):
+            for form in surface_forms(skill):
+                if form:
+                    self._insert(form, skill_idx)
+        self._build_failure_links()
+
+    def _insert(self, pattern: str, skill_idx: int):
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(pattern), skill_idx))
+
+    def _build_failure_links(self):
+        # BFS from the root's children (whose failure link is the root itself)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(ch, 0)
+                # Inherit the matches of the longest proper suffix
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text: str) -> set:
+        """
+        Indices (into self.skills) of every skill present in `text`.
+
+        >>> SkillMatcher(["c", "c++", "c#"]).find("C++ and C#")
+        {1, 2}
+        >>> SkillMatcher(["javascript", "node.js"]).find("Built APIs in Node.js.")
+        {1}
+        >>> SkillMatcher(["net", ".net"]).find("Five years of .NET")
+        {1}
+        """
+        text = normalize(text)
+        n = len(text)
+        found = set()
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            for length, skill_idx in self._out[state]:
+                if skill_idx in found:
+                    continue
+                start = i - length + 1
+                before_ok = start == 0 or not _joins(text, start - 1)
+                after_ok = i + 1 == n or not _joins(text, i + 1)
+                if before_ok and after_ok:
+                    found.add(skill_idx)
+            if len(found) == len(self.skills):
+                break
+        return found
+
+    def split(self, text: str) -> tuple:
+        """Returns (found, missing) skill lists, both in the original skill order."""
+        hits = self.find(text)
+        found = [s for i, s in enumerate(self.skills) if i in hits]
+        missing = [s for i, s in enumerate(self.skills) if i not in hits]
+        return found, missing
+
+
+@lru_cache(maxsize=256)
+def _cached_matcher(skills: tuple) -> SkillMatcher:
+    return SkillMatcher(skills)
+
+
+def get_matcher(skills) -> SkillMatcher:
+    # Built once per distinct skill set, then reused for every document
+    return _cached_matcher(tuple(skills))
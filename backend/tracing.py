@@ -0,0 +1,249 @@
+# backend/tracing.py
+#
+# In-process request tracing. A trace is the tree of timed spans for one request
+# (or one background job). Its ID is the request ID, so traces and log lines join on it.
+#
+#   with span("pdf_extract", file=filename):   # child of whichever span is current
+#       ...
+#
+# The current span lives in a contextvar: asyncio tasks and the CPU pools inherit it.
+# Finished traces are serialized and written to TRACE_FILE (JSONL) by a background thread.
+
+import os
+import json
+import queue
+import random
+import asyncio
+import atexit
+import logging
+import secrets
+import threading
+import contextvars
+from time import time, perf_counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from config import (
+    TRACING_ENABLED, TRACE_FILE, TRACE_SAMPLE_RATE, TRACE_SLOW_MS, TRACE_MAX_SPANS
+)
+from logger import logger, file_handler
+
+_current = contextvars.ContextVar("current_span", default=None)
+
+
+def _iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat(timespec="microseconds")
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "attributes", "start", "_t0", "duration_ms", "status")
+
+    def __init__(self, trace, name: str, parent_id: str, attributes: dict):
+        self.trace = trace
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.start = time()
+        self._t0 = perf_counter()
+        self.duration_ms = None
+        self.status = "ok"
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def fail(self, exc: BaseException):
+        if isinstance(exc, (asyncio.CancelledError, GeneratorExit)):
+            self.status = "cancelled" # Lost a hedge race, or the client went away
+            return
+        self.status = "error"
+        self.attributes["error"] = f"{type(exc).__name__}: {exc}"
+
+    def elapsed_ms(self) -> float:
+        return round((perf_counter() - self._t0) * 1000, 2)
+
+    def end(self):
+        if self.duration_ms is None:
+            self.duration_ms = self.elapsed_ms()
+
+    def to_dict(self) -> dict:
+        # Field names follow OTLP's span model, so a collector shim can forward them as-is
+        return {
+            "trace_id": self.trace.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "name": self.name,
+            "start_time": _iso(self.start),
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class Trace:
+    def __init__(self, name: str, trace_id: str = None, attributes: dict = None, slow_ms: float = TRACE_SLOW_MS):
+        self.trace_id = trace_id or secrets.token_hex(8)
+        self.slow_ms = slow_ms
+        self.spans = []
+        self.dropped = 0
+        self.finished = False
+        self._lock = threading.Lock() # Spans are opened from pool threads too
+        self.root = self.new_span(name, None, attributes or {})
+
+    def new_span(self, name: str, parent_id: str, attributes: dict) -> Span:
+        span = Span(self, name, parent_id, attributes)
+        with self._lock:
+            if len(self.spans) < TRACE_MAX_SPANS:
+                self.spans.append(span)
+            else:
+                self.dropped += 1
+        return span
+
+    def finish(self):
+        if self.finished:
+            return
+        self.finished = True
+        self.root.end()
+        _export(self)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            spans = [span.to_dict() for span in self.spans]
+        return {
+            "trace_id": self.trace_id,
+            "name": self.root.name,
+            "start_time": _iso(self.root.start),
+            "duration_ms": self.root.duration_ms,
+            "status": self.root.status,
+            "dropped_spans": self.dropped,
+            "spans": spans,
+        }
+
+    def __str__(self) -> str:
+        # Indented span tree, children in start order; spans still running show as "..."
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s._t0)
+        children = {}
+        for span in spans:
+            children.setdefault(span.parent_id, []).append(span)
+
+        lines = [f"trace {self.trace_id}" + (f" ({self.dropped} spans dropped)" if self.dropped else "")]
+        def walk(span, depth):
+            took = f"{span.duration_ms:.1f}ms" if span.duration_ms is not None else "..."
+            attrs = " ".join(f"{k}={v}" for k, v in span.attributes.items())
+            flag = f" [{span.status.upper()}]" if span.status != "ok" else ""
+            lines.append(f"{'  ' * depth}{span.name} {took}{flag} {attrs}".rstrip())
+            for child in children.get(span.span_id, []):
+                walk(child, depth + 1)
+        walk(self.root, 1)
+        return "\n".join(lines)
+
+
+# --- PUBLIC API ---
+@contextmanager
+def trace(name: str, trace_id: str = None, finish: bool = True, slow_ms: float = TRACE_SLOW_MS, **attributes):
+    """
+    Starts a trace whose root span is current inside the block. With finish=False the
+    caller ends it later with trace.finish() (streaming responses); it still ends here on error.
+    A trace running past slow_ms (None = never) gets its span tree logged. Yields None when tracing is off.
+    """
+    if not TRACING_ENABLED:
+        yield None
+        return
+    current = Trace(name, trace_id, attributes, slow_ms)
+    token = _current.set(current.root)
+    try:
+        yield current
+    except BaseException as e:
+        current.root.fail(e)
+        current.finish()
+        raise
+    finally:
+        _current.reset(token)
+    if finish:
+        current.finish()
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Child of the current span. Outside a trace (startup, scripts) it does nothing and yields None."""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    current = parent.trace.new_span(name, parent.span_id, attributes)
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.fail(e)
+        raise
+    finally:
+        current.end()
+        try:
+            _current.reset(token)
+        except ValueError:
+            pass # An async generator closed from another context; its span is still recorded
+
+
+def current_trace():
+    """The trace the caller is running in, or None."""
+    parent = _current.get()
+    return parent.trace if parent is not None else None
+
+
+async def finish_after(body, current: Trace):
+    """Wraps a response body so the trace ends once the last byte is sent, not at the headers."""
+    try:
+        async for chunk in body:
+            yield chunk
+    except BaseException as e:
+        current.root.fail(e)
+        raise
+    finally:
+        current.finish()
+
+
+# --- EXPORT ---
+class _TraceQueueHandler(QueueHandler):
+    def prepare(self, record):
+        return record # The Trace object itself goes on the queue; it is serialized on the listener thread
+
+
+class _TraceFormatter(logging.Formatter):
+    def format(self, record):
+        return json.dumps(record.msg.to_dict(), ensure_ascii=False, default=str)
+
+
+def _build_exporter():
+    if not (TRACING_ENABLED and TRACE_FILE):
+        return None
+    folder = os.path.dirname(TRACE_FILE)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    trace_file = file_handler(TRACE_FILE) # Same rotation rules as the log: every process writes here
+    trace_file.setFormatter(_TraceFormatter())
+
+    trace_queue = queue.Queue(-1)
+    listener = QueueListener(trace_queue, trace_file)
+    listener.start()
+    atexit.register(listener.stop)
+
+    exporter = logging.getLogger("TalentflowAI.traces")
+    exporter.propagate = False # Traces only go to TRACE_FILE, never to the log stream
+    exporter.setLevel(logging.INFO)
+    exporter.handlers = [_TraceQueueHandler(trace_queue)]
+    return exporter
+
+_exporter = _build_exporter()
+
+
+def _export(current: Trace):
+    slow = current.slow_ms is not None and current.root.duration_ms >= current.slow_ms
+    if slow:
+        logger.warning(
+            "Slow request: %s took %.0fms\n%s", current.root.name, current.root.duration_ms, current,
+            extra={"request_id": current.trace_id}
+        )
+    if _exporter is not None and (slow or random.random() < TRACE_SAMPLE_RATE):
+        _exporter.info(current)
@@ -1,53 +1,152 @@
 # backend/utils.py
 
-import requests
-from PyPDF2 import PdfReader
-from google import genai
-from groq import Groq
+import json
+import asyncio
+import httpx
 from config import (
     GEMINI_API_KEY, GEMINI_MODEL,
     OLLAMA_URL, MODEL_NAME, 
-    GROQ_API_KEY, GROQ_MODEL
+    GROQ_API_KEY, GROQ_MODEL,
+    LLM_TIMEOUT, LLM_MAX_CONNECTIONS,
+    GEMINI_MAX_CONCURRENCY, GROQ_MAX_CONCURRENCY, OLLAMA_MAX_CONCURRENCY,
+    LLM_MODE
 )
+from llm_mock import mock_llm, cassette
+from llm_errors import LLMError, LLMNotConfigured, classify
+from tracing import span
+from logger import logger
 
+# Shared connection pool settings for every provider
+http_limits = httpx.Limits(
+    max_connections=LLM_MAX_CONNECTIONS,
+    max_keepalive_connections=LLM_MAX_CONNECTIONS
+)
+
+
+# --- CLIENTS (created on first use: the SDK imports alone take seconds) ---
+_clients = {}
 
 # --- 1. GEMINI CLIENT ---
-try:
-    gemini_client = genai.Client(api_key=GEMINI_API_KEY)
-except Exception as e:
-    print(f"Gemini Init Error: {e}")
-    gemini_client = None
+def get_gemini_client():
+    if "gemini" not in _clients:
+        try:
+            from google import genai
+            from google.genai import types
+            _clients["gemini"] = genai.Client(
+                api_key=GEMINI_API_KEY,
+                http_options=types.HttpOptions(timeout=int(LLM_TIMEOUT * 1000)) # Milliseconds
+            )
+        except Exception as e:
+            logger.error(f"Gemini Init Error: {e}")
+            _clients["gemini"] = None
+    return _clients["gemini"]
 
 # --- 2. GROQ CLIENT ---
-try:
-    groq_client = Groq(api_key=GROQ_API_KEY)
-except Exception as e:
-    print(f"Groq Init Error: {e}")
-    groq_client = None
+def get_groq_client():
+    if "groq" not in _clients:
+        try:
+            from groq import AsyncGroq
+            _clients["groq"] = AsyncGroq(
+                api_key=GROQ_API_KEY,
+                timeout=LLM_TIMEOUT,
+                http_client=httpx.AsyncClient(limits=http_limits, timeout=LLM_TIMEOUT)
+            )
+        except Exception as e:
+            logger.error(f"Groq Init Error: {e}")
+            _clients["groq"] = None
+    return _clients["groq"]
+
+# --- 3. OLLAMA CLIENT ---
+def get_ollama_client():
+    if "ollama" not in _clients:
+        _clients["ollama"] = httpx.AsyncClient(limits=http_limits, timeout=LLM_TIMEOUT)
+    return _clients["ollama"]
+
+# One slow provider can only tie up its own slots, never the event loop.
+# Completions take their slot in llm_router (so LLM_TIMEOUT starts once the slot is held); streams take it here.
+provider_limits = {
+    "gemini": asyncio.Semaphore(GEMINI_MAX_CONCURRENCY),
+    "groq": asyncio.Semaphore(GROQ_MAX_CONCURRENCY),
+    "ollama": asyncio.Semaphore(OLLAMA_MAX_CONCURRENCY),
+}
+
+
+# --- LLM MODE (live / mock / record / replay) ---
+# These are the raw provider calls: one attempt, typed LLMError on failure.
+# Routing, retries, hedging and the response cache live in llm_router.py.
+async def _complete(provider: str, model: str, prompt: str, call):
+    with span(f"llm.{provider}", model=model, mode=LLM_MODE, prompt_chars=len(prompt)) as current:
+        try:
+            if LLM_MODE == "mock":
+                text = await mock_llm.complete(provider, prompt)
+            elif LLM_MODE == "replay":
+                text = cassette.replay(provider, model, prompt)
+            else:
+                text = await call()
+                if not text:
+                    raise LLMError(provider, "empty response")
+                if LLM_MODE == "record":
+                    cassette.record(provider, model, prompt, text)
+        except Exception as e:
+            raise classify(provider, e) from e
+        if current is not None:
+            current.set(response_chars=len(text))
+        return text
+
+
+async def _stream(provider: str, model: str, prompt: str, live):
+    with span(f"llm.{provider}.stream", model=model, mode=LLM_MODE, prompt_chars=len(prompt)) as current:
+        chunks = []
+        try:
+            if LLM_MODE == "mock":
+                tokens = mock_llm.stream(provider, prompt)
+            elif LLM_MODE == "replay":
+                tokens = _iterate(cassette.replay_chunks(provider, model, prompt))
+            else:
+                tokens = live()
+
+            async for token in tokens:
+                if not chunks and current is not None:
+                    current.set(first_token_ms=current.elapsed_ms())
+                chunks.append(token)
+                yield token
+            if LLM_MODE == "record" and chunks:
+                cassette.record(provider, model, prompt, "".join(chunks), chunks)
+        except Exception as e:
+            raise classify(provider, e) from e
+        finally:
+            if current is not None:
+                current.set(chunks=len(chunks))
+
+
+async def _iterate(items):
+    for item in items:
+        yield item
 
 
 # --- FUNCTIONS ---
-def query_gemini(prompt: str):
-    if not gemini_client:
-        return "Gemini Client Error"
-    try:
-        response = gemini_client.models.generate_content(
+async def query_gemini(prompt: str) -> str:
+    async def call():
+        gemini_client = get_gemini_client()
+        if not gemini_client:
+            raise LLMNotConfigured("gemini", "Gemini Client Error")
+        response = await gemini_client.aio.models.generate_content(
             model=GEMINI_MODEL, contents=prompt
         )
         return response.text
-    except Exception as e:
-        return f"Gemini Error: {str(e)}"
+
+    return await _complete("gemini", GEMINI_MODEL, prompt, call)
     
 
-def query_groq(prompt: str):
+async def query_groq(prompt: str) -> str:
     """
     Queries the Groq API for ultra-fast inference.
     """
-    if not groq_client:
-        return "Groq Client Error: Check API Key"
-    
-    try:
-        chat_completion = groq_client.chat.completions.create(
+    async def call():
+        groq_client = get_groq_client()
+        if not groq_client:
+            raise LLMNotConfigured("groq", "Groq Client Error: Check API Key")
+        chat_completion = await groq_client.chat.completions.create(
             messages=[
                 {
                     "role": "user",
@@ -57,27 +156,121 @@ def query_groq(prompt: str):
             model=GROQ_MODEL,
         )
         return chat_completion.choices[0].message.content
-    except Exception as e:
-        return f"Groq API Error: {str(e)}"
+
+    return await _complete("groq", GROQ_MODEL, prompt, call)
     
 
-def query_ollama(prompt: str):
+async def query_ollama(prompt: str) -> str:
     payload = {
         "model": MODEL_NAME,
         "prompt": prompt,
         "stream": False
     }
-    try:
-        response = requests.post(OLLAMA_URL, json=payload)
-        return response.json().get('response', "Error from Ollama")
-    except Exception as e:
-        return f"Ollama Connection Error: {str(e)}"
 
+    async def call():
+        response = await get_ollama_client().post(OLLAMA_URL, json=payload)
+        response.raise_for_status()
+        data = response.json()
+        if "response" not in data:
+            raise LLMError("ollama", "Error from Ollama")
+        return data["response"]
+
+    return await _complete("ollama", MODEL_NAME, prompt, call)
+
+
+# --- STREAMING FUNCTIONS (yield text chunks as the provider produces them) ---
+async def stream_gemini(prompt: str):
+    async def live():
+        gemini_client = get_gemini_client()
+        if not gemini_client:
+            raise LLMNotConfigured("gemini", "Gemini Client Error")
+        async with provider_limits["gemini"]:
+            stream = await gemini_client.aio.models.generate_content_stream(
+                model=GEMINI_MODEL, contents=prompt
+            )
+            async for chunk in stream:
+                if chunk.text:
+                    yield chunk.text
+
+    async for token in _stream("gemini", GEMINI_MODEL, prompt, live):
+        yield token
+
+
+async def stream_groq(prompt: str):
+    async def live():
+        groq_client = get_groq_client()
+        if not groq_client:
+            raise LLMNotConfigured("groq", "Groq Client Error: Check API Key")
+        async with provider_limits["groq"]:
+            stream = await groq_client.chat.completions.create(
+                messages=[{"role": "user", "content": prompt}],
+                model=GROQ_MODEL,
+                stream=True,
+            )
+            async for chunk in stream:
+                token = chunk.choices[0].delta.content
+                if token:
+                    yield token
+
+    async for token in _stream("groq", GROQ_MODEL, prompt, live):
+        yield token
+
+
+async def stream_ollama(prompt: str):
+    payload = {
+        "model": MODEL_NAME,
+        "prompt": prompt,
+        "stream": True
+    }
+
+    async def live():
+        async with provider_limits["ollama"]:
+            async with get_ollama_client().stream("POST", OLLAMA_URL, json=payload) as response:
+                response.raise_for_status()
+                # Ollama streams one JSON object per line
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get("response"):
+                        yield chunk["response"]
+                    if chunk.get("done"):
+                        break
+
+    async for token in _stream("ollama", MODEL_NAME, prompt, live):
+        yield token
+
+
+def sse_event(data: dict, event: str = None) -> str:
+    # One Server-Sent Event frame
+    frame = f"event: {event}\n" if event else ""
+    return frame + f"data: {json.dumps(data)}\n\n"
+
+
+async def sse_stream(tokens, final_key: str):
+    """
+    Wraps a token generator as SSE: one "token" event per chunk, then a
+    "done" event carrying the full text under final_key (e.g. "jd", "reply"),
+    or an "error" event if the provider fails.
+    """
+    parts = []
+    try:
+        async for token in tokens:
+            parts.append(token)
+            yield sse_event({"token": token}, event="token")
+    except LLMError as e:
+        # Headers are already sent, so the failure travels as its own event
+        yield sse_event({"error": str(e), "status": e.http_status}, event="error")
+        return
+    yield sse_event({final_key: "".join(parts)}, event="done")
 
 
-def extract_text_from_pdf(file_path):
-    reader = PdfReader(file_path)
-    text = ""
-    for page in reader.pages:
-        text += page.extract_text()
-    return text
\ No newline at end of file
+async def close_clients():
+    # Called on shutdown so pooled connections are released cleanly
+    if _clients.get("groq"):
+        await _clients["groq"].close()
+    if _clients.get("gemini"):
+        await _clients["gemini"].aio.aclose()
+    if _clients.get("ollama"):
+        await _clients["ollama"].aclose()
+    _clients.clear()
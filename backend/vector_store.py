@@ -0,0 +1,317 @@
+# backend/vector_store.py
+
+import os
+import sqlite3
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+import numpy as np
+import faiss
+from config import (
+    RESUME_INDEX_PATH, RESUME_DB_PATH,
+    HNSW_M, HNSW_EF_CONSTRUCTION, HNSW_EF_SEARCH,
+    INDEX_REBUILD_RATIO, MAX_CHUNKS_PER_RESUME
+)
+from chunking import pool_scores
+from logger import logger
+
+
+def make_resume_id(text: str) -> str:
+    """Stable ID for a resume: hash of its whitespace-normalized text."""
+    normalized = " ".join(text.split()).lower()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+class ResumeIndex:
+    """
+    Persistent candidate pool.
+    Chunk vectors live in a FAISS HNSW index on disk, metadata (and a copy of each
+    vector, so we can rebuild without re-embedding) lives in SQLite.
+    A resume is scored by pooling the similarities of its chunks.
+    HNSW cannot remove vectors, so deletes are tombstoned and filtered out at
+    search time until enough pile up to justify a rebuild.
+
+    Every API and job worker process holds its own copy of the index. SQLite is the
+    source of truth: each write bumps a generation counter, and a process whose copy
+    is older reloads it before its next search or write. Writes run inside BEGIN IMMEDIATE,
+    which serializes them across processes, so the index file is only ever saved by a
+    writer that holds the latest pool and never drops another process's vectors.
+    """
+
+    def __init__(self, index_path: str = RESUME_INDEX_PATH, db_path: str = RESUME_DB_PATH):
+        self.index_path = index_path
+        self.db_path = db_path
+        self._lock = threading.RLock()
+
+        for path in (index_path, db_path):
+            folder = os.path.dirname(path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+
+        self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA busy_timeout=30000")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS candidates (
+                resume_id TEXT PRIMARY KEY,
+                filename TEXT,
+                text TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                deleted INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS candidate_chunks (
+                vector_id INTEGER PRIMARY KEY,
+                resume_id TEXT NOT NULL,
+                vector BLOB NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_chunks_resume ON candidate_chunks (resume_id)")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS index_state (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                generation INTEGER NOT NULL
+            )
+        """)
+        self._db.execute("INSERT OR IGNORE INTO index_state (id, generation) VALUES (0, 0)")
+
+        self._index = None
+        self._generation = None # Generation the in-memory index reflects; None = reload
+        with self._lock:
+            self._sync()
+
+    # --- INDEX LIFECYCLE ---
+    def _new_index(self, d: int):
+        hnsw = faiss.IndexHNSWFlat(d, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        hnsw.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        hnsw.hnsw.efSearch = HNSW_EF_SEARCH
+        return faiss.IndexIDMap2(hnsw)
+
+    def _sync(self):
+        # Caller holds self._lock. One indexed read when nothing changed.
+        generation = self._db.execute("SELECT generation FROM index_state WHERE id = 0").fetchone()[0]
+        if generation != self._generation:
+            self._index = self._load_index()
+            self._generation = generation
+
+    def _load_index(self):
+        rows = self._db.execute("SELECT COUNT(*) FROM candidate_chunks").fetchone()[0]
+
+        if os.path.exists(self.index_path):
+            index = faiss.read_index(self.index_path)
+            faiss.downcast_index(index.index).hnsw.efSearch = HNSW_EF_SEARCH
+            if index.ntotal == rows:
+                logger.info(f"Resume index loaded: {rows} chunk vectors.")
+                return index
+            # A writer crashed (or is still committing) between the index write and the SQLite commit
+            logger.warning(f"Resume index out of sync ({index.ntotal} vectors, {rows} rows). Rebuilding in memory.")
+
+        if rows == 0:
+            return None
+        # Read-only here; the next write saves it
+        return self._build_from_rows()
+
+    def _build_from_rows(self):
+        rows = self._db.execute("SELECT vector_id, vector FROM candidate_chunks").fetchall()
+        if not rows:
+            return None
+        ids = np.array([r[0] for r in rows], dtype="int64")
+        vectors = np.vstack([np.frombuffer(r[1], dtype="float32") for r in rows])
+
+        start = time.perf_counter()
+        index = self._new_index(vectors.shape[1])
+        index.add_with_ids(vectors, ids)
+        logger.info(f"Resume index built: {len(rows)} chunk vectors in {time.perf_counter() - start:.2f}s.")
+        return index
+
+    def _rebuild(self):
+        # Inside _write(): re-creates the index from the live rows only, dropping tombstones for good
+        self._db.execute(
+            "DELETE FROM candidate_chunks WHERE resume_id IN (SELECT resume_id FROM candidates WHERE deleted = 1)"
+        )
+        self._db.execute("DELETE FROM candidates WHERE deleted = 1")
+        self._index = self._build_from_rows()
+
+    @contextmanager
+    def _write(self):
+        """One cross-process write: starts from the latest pool, saves the index, bumps the generation."""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._sync()
+                yield
+                self._save()
+                self._generation += 1
+                self._db.execute("UPDATE index_state SET generation = ? WHERE id = 0", (self._generation,))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                self._generation = None # The in-memory index may hold rolled-back vectors
+                raise
+
+    def _save(self):
+        if self._index is None:
+            if os.path.exists(self.index_path):
+                os.remove(self.index_path)
+            return
+        # Write-then-rename so a crash never leaves a half-written index behind
+        tmp_path = self.index_path + ".tmp"
+        faiss.write_index(self._index, tmp_path)
+        os.replace(tmp_path, self.index_path)
+
+    def _deleted_chunks(self) -> int:
+        return self._db.execute(
+            "SELECT COUNT(*) FROM candidate_chunks c JOIN candidates r ON r.resume_id = c.resume_id "
+            "WHERE r.deleted = 1"
+        ).fetchone()[0]
+
+    # --- PUBLIC API ---
+    def contains(self, resume_id: str) -> bool:
+        # A hint for skipping work only; add() checks again inside its transaction
+        with self._lock:
+            row = self._db.execute(
+                "SELECT 1 FROM candidates WHERE resume_id = ? AND deleted = 0", (resume_id,)
+            ).fetchone()
+            return row is not None
+
+    def add(self, items: list) -> list:
+        """
+        items: [{"resume_id", "filename", "text", "vectors"}] where "vectors" holds
+        the resume's L2-normalized chunk vectors (one row per chunk).
+        Returns the resume_ids that were newly indexed. The check and the insert share one
+        transaction, so of two concurrent adds of the same resume (in any process) only one counts.
+        """
+        if not items:
+            return []
+        with self._write():
+            fresh, revived = [], []
+            for item in items:
+                row = self._db.execute(
+                    "SELECT deleted FROM candidates WHERE resume_id = ?", (item["resume_id"],)
+                ).fetchone()
+                if row is None:
+                    fresh.append(item)
+                elif row[0] == 1:
+                    revived.append(item)
+
+            # A deleted resume that comes back still has its chunks in the index (same text, same vectors)
+            if revived:
+                self._db.executemany(
+                    "UPDATE candidates SET deleted = 0, filename = ? WHERE resume_id = ?",
+                    [(item.get("filename"), item["resume_id"]) for item in revived]
+                )
+
+            if not fresh:
+                return [item["resume_id"] for item in revived]
+
+            next_id = self._db.execute("SELECT COALESCE(MAX(vector_id), -1) + 1 FROM candidate_chunks").fetchone()[0]
+
+            now = time.time()
+            chunk_rows, all_vectors, all_ids = [], [], []
+            for item in fresh:
+                vectors = np.atleast_2d(np.asarray(item["vectors"], dtype="float32"))[:MAX_CHUNKS_PER_RESUME]
+                ids = np.arange(next_id, next_id + len(vectors), dtype="int64")
+                next_id += len(vectors)
+                chunk_rows.extend(
+                    (int(vid), item["resume_id"], vec.tobytes()) for vid, vec in zip(ids, vectors)
+                )
+                all_vectors.append(vectors)
+                all_ids.append(ids)
+
+            self._db.executemany(
+                "INSERT INTO candidates (resume_id, filename, text, created_at) VALUES (?, ?, ?, ?)",
+                [(item["resume_id"], item.get("filename"), item["text"], now) for item in fresh]
+            )
+            self._db.executemany(
+                "INSERT INTO candidate_chunks (vector_id, resume_id, vector) VALUES (?, ?, ?)",
+                chunk_rows
+            )
+
+            vectors = np.vstack(all_vectors)
+            if self._index is None:
+                self._index = self._new_index(vectors.shape[1])
+            self._index.add_with_ids(vectors, np.concatenate(all_ids))
+
+            return [item["resume_id"] for item in revived + fresh]
+
+    def delete(self, resume_id: str) -> bool:
+        with self._write():
+            cur = self._db.execute(
+                "UPDATE candidates SET deleted = 1 WHERE resume_id = ? AND deleted = 0", (resume_id,)
+            )
+            if cur.rowcount == 0:
+                return False
+
+            total = self._db.execute("SELECT COUNT(*) FROM candidate_chunks").fetchone()[0]
+            if total and self._deleted_chunks() / total >= INDEX_REBUILD_RATIO:
+                self._rebuild()
+            return True
+
+    def search(self, query_vector, top_k: int = 10) -> list:
+        """Returns [{"resume_id", "filename", "text", "score"}] best-first."""
+        with self._lock:
+            self._sync() # Picks up other processes' ingests and deletes
+            if self._index is None or self._index.ntotal == 0:
+                return []
+
+            # Over-fetch chunks: several may belong to the same resume, and
+            # tombstoned hits must not eat into top_k
+            k = min(top_k * MAX_CHUNKS_PER_RESUME + self._deleted_chunks(), self._index.ntotal)
+
+            query = np.asarray(query_vector, dtype="float32").reshape(1, -1)
+            distances, ids = self._index.search(query, k)
+
+            hits = [(int(vid), float(score)) for vid, score in zip(ids[0], distances[0]) if vid != -1]
+            if not hits:
+                return []
+
+            owners_by_vector = {}
+            for start in range(0, len(hits), 500): # Stay under SQLite's variable limit
+                batch = [vid for vid, _ in hits[start:start + 500]]
+                placeholders = ",".join("?" * len(batch))
+                owners_by_vector.update(self._db.execute(
+                    f"SELECT c.vector_id, c.resume_id FROM candidate_chunks c "
+                    f"JOIN candidates r ON r.resume_id = c.resume_id "
+                    f"WHERE r.deleted = 0 AND c.vector_id IN ({placeholders})",
+                    batch
+                ).fetchall())
+
+            live = [(owners_by_vector[vid], score) for vid, score in hits if vid in owners_by_vector]
+            if not live:
+                return []
+
+            resume_ids = list(dict.fromkeys(rid for rid, _ in live))
+            position = {rid: i for i, rid in enumerate(resume_ids)}
+            owners = np.array([position[rid] for rid, _ in live], dtype="int64")
+            scores = pool_scores([score for _, score in live], owners, len(resume_ids))
+
+            best = np.argsort(-scores)[:top_k]
+            chosen = [resume_ids[i] for i in best]
+            placeholders = ",".join("?" * len(chosen))
+            meta = {r[0]: r for r in self._db.execute(
+                f"SELECT resume_id, filename, text FROM candidates WHERE resume_id IN ({placeholders})",
+                chosen
+            ).fetchall()}
+
+            return [
+                {"resume_id": rid, "filename": meta[rid][1], "text": meta[rid][2], "score": float(scores[i])}
+                for i, rid in zip(best, chosen)
+            ]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM candidates WHERE deleted = 0").fetchone()[0]
+
+
+# Singleton Pattern: one index per process, opened on first use
+_resume_index = None
+_resume_index_lock = threading.Lock()
+
+def get_resume_index() -> ResumeIndex:
+    global _resume_index
+    with _resume_index_lock:
+        if _resume_index is None:
+            _resume_index = ResumeIndex()
+        return _resume_index
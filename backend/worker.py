@@ -0,0 +1,224 @@
+# backend/worker.py
+#
+# Background screening worker. Started automatically by the API (JOB_WORKERS),
+# or by hand on the same host as the queue file (SQLite WAL is single-host):
+#
+#   cd backend
+#   python worker.py --processes 4
+
+import os
+import sys
+import socket
+import signal
+import asyncio
+import argparse
+import threading
+import multiprocessing
+from config import JOB_WORKERS, JOB_POLL_INTERVAL, JOB_LEASE_SECONDS, JOB_QUEUE_PATH, PDF_WORKERS
+from logger import logger
+
+# How many files to parse between progress updates
+PROGRESS_EVERY = 10
+# Files read from the queue ahead of the PDF pool; bounds memory on a big batch
+PARSE_WINDOW = PDF_WORKERS * 2
+
+
+class Heartbeat:
+    """
+    Renews a job's lease from a timer thread for as long as the job runs, so a slow parse
+    or a big ranking step (which block this worker's loop) can never outlive the lease.
+    """
+
+    def __init__(self, queue, job_id: str, worker_id: str, interval: float = JOB_LEASE_SECONDS / 3):
+        self.queue = queue
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.interval = interval
+        self.stage = "starting"
+        self.processed = None
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"heartbeat-{job_id[:8]}", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def update(self, stage: str, processed: int = None):
+        # Progress shows up right away; the timer only keeps the lease alive in between
+        self.stage, self.processed = stage, processed
+        self._beat()
+
+    def _beat(self):
+        if not self.queue.heartbeat(self.job_id, self.worker_id, self.stage, self.processed) and not self.lost:
+            self.lost = True
+            logger.warning(f"Worker {self.worker_id} lost its lease on job {self.job_id}; another worker may be running it.")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self._beat()
+            except Exception as e:
+                logger.warning(f"Heartbeat for job {self.job_id} failed: {e}")
+
+
+async def process_job(queue, job: dict, worker_id: str):
+    from tracing import trace
+
+    # One trace per job, keyed by the job ID. Jobs are long by design, so no slow-request dump.
+    with trace("screen_job", trace_id=job["job_id"], slow_ms=None, worker=worker_id):
+        await _process_job(queue, job, worker_id)
+
+
+async def _process_job(queue, job: dict, worker_id: str):
+    job_id = job["job_id"]
+    jd_text = job["jd_text"]
+    logger.info(f"Worker {worker_id} started job {job_id}.")
+
+    with Heartbeat(queue, job_id, worker_id) as heartbeat:
+        results, file_report, processed = await _run_stages(queue, heartbeat, job_id, jd_text)
+
+    if not queue.complete(job_id, worker_id, {"results": results, "files": file_report}):
+        # The lease ran out anyway (e.g. the host was suspended); whoever holds the job now finishes it
+        logger.error(f"Worker {worker_id} finished job {job_id}, but it was no longer leased to it; result dropped.")
+        return
+    logger.info(f"Worker {worker_id} finished job {job_id}: {len(results)} ranked, {processed} files.")
+
+
+async def _run_stages(queue, heartbeat: Heartbeat, job_id: str, jd_text: str) -> tuple:
+    # Heavy imports stay here so the API process can import this module cheaply
+    from ingest import parse_upload
+    from services import get_embedder
+    from screening import extract_required_skills, rank_resumes
+
+    # --- STEP 1: Smart Keyword Extraction ---
+    heartbeat.update("extracting_skills")
+    required_skills = await extract_required_skills(jd_text)
+
+    # --- STEP 2: Process Resumes (on the PDF process pool, PARSE_WINDOW files in flight) ---
+    tasks, running = [], set()
+    processed = 0
+    for filename, data in queue.files(job_id):
+        task = asyncio.create_task(parse_upload(filename, data))
+        tasks.append(task)
+        running.add(task)
+        while len(running) >= PARSE_WINDOW:
+            done, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            processed = _progress(heartbeat, processed, len(done))
+    while running:
+        done, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+        processed = _progress(heartbeat, processed, len(done))
+
+    parsed = [task.result() for task in tasks] # Upload order
+    resume_data = [resume for resume, _ in parsed if resume is not None]
+    file_report = [entry for _, entry in parsed]
+
+    # --- STEP 3 & 4: Vector Search + Gap Analysis ---
+    heartbeat.update("ranking", processed)
+    results = rank_resumes(get_embedder(), jd_text, resume_data, required_skills)
+    return results, file_report, processed
+
+
+def _progress(heartbeat: Heartbeat, processed: int, finished: int) -> int:
+    if (processed + finished) // PROGRESS_EVERY > processed // PROGRESS_EVERY:
+        heartbeat.update("parsing", processed + finished)
+    return processed + finished
+
+
+async def worker_loop():
+    from job_queue import get_job_queue
+
+    queue = get_job_queue()
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    logger.info(f"Screening worker {worker_id} polling for jobs.")
+
+    while True:
+        job = queue.claim(worker_id)
+        if job is None:
+            await asyncio.sleep(JOB_POLL_INTERVAL)
+            continue
+        try:
+            await process_job(queue, job, worker_id)
+        except Exception as e:
+            logger.error(f"Job {job['job_id']} failed: {e}")
+            queue.fail(job["job_id"], worker_id, str(e))
+
+
+def run_worker():
+    from ingest import shutdown_pdf_pool
+
+    # terminate() sends SIGTERM: exit through the finally below, so the PDF pool's processes go too
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    # One event loop for the worker's whole life, so pooled LLM clients stay bound to it
+    try:
+        asyncio.run(worker_loop())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        shutdown_pdf_pool()
+
+
+# --- LOCAL WORKER PROCESSES (started by main.py) ---
+_owner_lock = None
+
+def owns_local_workers() -> bool:
+    """
+    True for exactly one API process per host, so `uvicorn --workers N` still starts
+    JOB_WORKERS workers in total, not N times as many. Held for the life of the process.
+    """
+    global _owner_lock
+    try:
+        import fcntl
+    except ImportError:
+        return True # No flock on this platform: run a single API worker, or JOB_WORKERS=0 and worker.py
+    if _owner_lock is None:
+        folder = os.path.dirname(JOB_QUEUE_PATH)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        lock = open(JOB_QUEUE_PATH + ".workers.lock", "w")
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock.close()
+            return False
+        _owner_lock = lock
+    return True
+
+
+def start_local_workers(count: int = JOB_WORKERS) -> list:
+    # "spawn" gives each worker a clean interpreter instead of a fork of the API's threads
+    ctx = multiprocessing.get_context("spawn")
+    processes = []
+    for _ in range(count):
+        # Not daemonic: a daemon process may not start the PDF pool's processes
+        process = ctx.Process(target=run_worker)
+        process.start()
+        processes.append(process)
+    if processes:
+        logger.info(f"Started {len(processes)} local screening worker(s).")
+    return processes
+
+
+def stop_local_workers(processes: list):
+    # A job interrupted here is picked up again once its lease expires
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        process.join(timeout=5)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Talentflow AI screening worker")
+    parser.add_argument("--processes", type=int, default=max(JOB_WORKERS, 1), help="Worker processes to run")
+    args = parser.parse_args()
+
+    workers = start_local_workers(args.processes)
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        stop_local_workers(workers)
@@ -0,0 +1,24 @@
+# frontend/streaming.py
+
+import json
+import requests
+
+def stream_tokens(url, payload):
+    """
+    POSTs to one of the backend's /stream endpoints and yields text tokens
+    as the Server-Sent Events arrive. Plug it straight into st.write_stream().
+    """
+    with requests.post(url, json=payload, stream=True, timeout=(5, 120)) as res:
+        res.raise_for_status()
+        event = "message"
+        for line in res.iter_lines(decode_unicode=True):
+            if not line:
+                # Blank line closes the current event
+                event = "message"
+            elif line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:") and event == "token":
+                yield json.loads(line[len("data:"):])["token"]
+            elif line.startswith("data:") and event == "error":
+                # The LLM failed after the response started; surface it like any other HTTP error
+                raise requests.HTTPError(json.loads(line[len("data:"):])["error"])
@@ -2,7 +2,6 @@
 
 import streamlit as st
 import requests
-import json
 from config import API_URL
 
 def render_evaluate():
@@ -105,15 +104,16 @@ def render_evaluate():
                     })
                     
                     if res.status_code == 200:
-                        try:
-                            report = json.loads(res.json().get("report"))
+                        # The backend parses and validates the judge's JSON; scores is None if it couldn't
+                        report = res.json().get("scores")
+                        if report:
                             st.write("### 📝 Report Card")
                             c1, c2, c3 = st.columns(3)
                             c1.metric("Relevance", f"{report.get('relevance_score')}/10")
                             c2.metric("Professionalism", f"{report.get('professionalism_score')}/10")
                             c3.metric("Flow", f"{report.get('flow_score')}/10")
                             st.info(f"**Feedback:** {report.get('feedback')}")
-                        except:
+                        else:
                             st.write(res.json())
         else:
             st.warning("No active interview history to evaluate.")
\ No newline at end of file
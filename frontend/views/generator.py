@@ -3,6 +3,7 @@
 import streamlit as st
 import requests
 from config import API_URL
+from streaming import stream_tokens
 
 def render_generator():
     st.title("📝 Intelligent JD Generator")
@@ -17,17 +18,19 @@ def render_generator():
             skills = st.text_input("Required Skills", "Python, FastAPI, AWS, Docker")
         
         if st.button("Generate JD"):
-            with st.spinner("Consulting AI..."):
-                try:
-                    res = requests.post(f"{API_URL}/generate_jd", json={"role": role, "skills": skills, "experience": str(exp)})
-                    if res.status_code == 200:
-                        jd_data = res.json().get("jd")
-                        st.session_state['generated_jd'] = jd_data
-                        st.success("JD Generated!")
-                    else:
-                        st.error("Error connecting to backend.")
-                except Exception as e:
-                    st.error(f"Connection Failed: {e}")
+            # Tokens are rendered as they stream in instead of behind a spinner
+            st.markdown("### Drafting...")
+            try:
+                jd_data = st.write_stream(stream_tokens(
+                    f"{API_URL}/generate_jd/stream",
+                    {"role": role, "skills": skills, "experience": str(exp)}
+                ))
+                st.session_state['generated_jd'] = jd_data
+                st.success("JD Generated!")
+            except requests.HTTPError:
+                st.error("Error connecting to backend.")
+            except Exception as e:
+                st.error(f"Connection Failed: {e}")
 
     if 'generated_jd' in st.session_state:
         st.markdown("### Preview")
@@ -3,37 +3,44 @@
 import streamlit as st
 import requests
 from config import API_URL
+from streaming import stream_tokens
+
+def reset_interview():
+    st.session_state.messages = []
+    st.session_state.pop("interview_session_id", None)
 
 def render_interview():
     st.title("🤖 AI Preliminary Interview")
-    
-    # Initialize chat history
+
+    # Initialize chat history (kept here for display and evaluation; the backend keeps its own compact copy)
     if "messages" not in st.session_state:
         st.session_state.messages = []
-    
+
     # Context Input
     context = st.text_area("1. Paste Job Description Here:", height=100, key="interview_context", placeholder="Paste the JD here to give the AI context...")
-    
+
     # START BUTTON LOGIC
     if len(st.session_state.messages) == 0:
         if st.button("Start Interview"):
             if not context:
                 st.error("Please paste a Job Description first.")
             else:
-                with st.spinner("AI is preparing the first question..."):
+                with st.chat_message("assistant"):
                     try:
-                        res = requests.post(f"{API_URL}/interview_bot", json={
-                            "history": "", 
-                            "message": "START_INTERVIEW", # Hidden trigger
-                            "context": context
-                        })
-                        
-                        if res.status_code == 200:
-                            bot_reply = res.json().get("reply")
-                            st.session_state.messages.append({"role": "assistant", "content": bot_reply})
-                            st.rerun()
-                        else:
-                            st.error("Error: Could not start interview.")
+                        # The JD is sent once; every later turn only carries the new message
+                        res = requests.post(f"{API_URL}/interview/sessions", json={"jd_text": context}, timeout=10)
+                        res.raise_for_status()
+                        session_id = res.json()["session_id"]
+
+                        # Stream the opening question as it is generated
+                        bot_reply = st.write_stream(stream_tokens(f"{API_URL}/interview/sessions/{session_id}/turn/stream", {
+                            "message": "START_INTERVIEW" # Hidden trigger
+                        }))
+                        st.session_state.interview_session_id = session_id
+                        st.session_state.messages.append({"role": "assistant", "content": bot_reply})
+                        st.rerun()
+                    except requests.HTTPError:
+                        st.error("Error: Could not start interview.")
                     except Exception as e:
                         st.error(f"Connection Error: {e}")
 
@@ -49,19 +56,20 @@ def render_interview():
             with st.chat_message("user"):
                 st.markdown(prompt)
 
-            with st.spinner("Interviewer is thinking..."):
-                history_str = "\n".join([f"{m['role']}: {m['content']}" for m in st.session_state.messages])
+            session_id = st.session_state.get("interview_session_id")
+            with st.chat_message("assistant"):
                 try:
-                    res = requests.post(f"{API_URL}/interview_bot", json={
-                        "history": history_str, 
-                        "message": prompt,
-                        "context": context
-                    })
-                    bot_reply = res.json().get("reply")
-                    
-                    with st.chat_message("assistant"):
-                        st.markdown(bot_reply)
-                    
+                    # First tokens show up while the rest of the reply is still being generated
+                    bot_reply = st.write_stream(stream_tokens(f"{API_URL}/interview/sessions/{session_id}/turn/stream", {
+                        "message": prompt
+                    }))
                     st.session_state.messages.append({"role": "assistant", "content": bot_reply})
+                except requests.HTTPError as e:
+                    if e.response is not None and e.response.status_code == 404:
+                        # Idle too long (or the backend restarted): the server-side session is gone
+                        reset_interview()
+                        st.warning("This interview session expired. Please start a new interview.")
+                    else:
+                        st.error(f"Error: {e}")
                 except Exception as e:
                     st.error(f"Error: {e}")
@@ -1,10 +1,54 @@
 # frontend/views/screener.py
 
+import time
 import streamlit as st
 import requests
 import pandas as pd
 from config import API_URL
 
+# Batches larger than this are submitted as background jobs
+JOB_THRESHOLD = 20
+# Give up polling after this long, or after this many failed polls in a row
+JOB_POLL_TIMEOUT = 30 * 60
+JOB_POLL_MAX_ERRORS = 5
+
+def run_screening_job(jd_input, files):
+    submit = requests.post(f"{API_URL}/screen_jobs", data={"jd_text": jd_input}, files=files)
+    if submit.status_code != 200:
+        return submit
+
+    job_id = submit.json()["job_id"]
+    # Shown up front so the result can still be fetched if this page gives up
+    st.caption(f"Screening job `{job_id}`")
+    progress = st.progress(0.0, text="Queued...")
+    deadline = time.monotonic() + JOB_POLL_TIMEOUT
+    errors = 0
+    while True:
+        if time.monotonic() > deadline:
+            progress.empty()
+            st.error(f"Job {job_id} is still running. Fetch it later from /screen_jobs/{job_id}/result.")
+            return None
+        try:
+            poll = requests.get(f"{API_URL}/screen_jobs/{job_id}", timeout=10)
+            poll.raise_for_status()
+            job = poll.json()
+            errors = 0
+        except requests.RequestException as e:
+            errors += 1
+            if errors >= JOB_POLL_MAX_ERRORS:
+                progress.empty()
+                st.error(f"Lost track of job {job_id}: {e}")
+                return None
+            time.sleep(1)
+            continue
+        progress.progress(min(job["progress"], 1.0), text=f"{job['stage'].replace('_', ' ').title()} ({job['processed_files']}/{job['total_files']} files)")
+        if job["status"] in ("done", "failed"):
+            break
+        time.sleep(1)
+
+    progress.empty()
+    return requests.get(f"{API_URL}/screen_jobs/{job_id}/result")
+
 def render_screener():
     st.header("🏆 Resume Ranking Board")
     
@@ -34,7 +78,13 @@ def render_screener():
         with st.spinner("Analyzing skills & calculating scores..."):
             files = [('files', (f.name, f, 'application/pdf')) for f in uploaded_files]
             try:
-                res = requests.post(f"{API_URL}/screen_resumes", data={"jd_text": jd_input}, files=files)
+                if len(uploaded_files) > JOB_THRESHOLD:
+                    # Big batches go through the background job queue instead of one long request
+                    res = run_screening_job(jd_input, files)
+                    if res is None:
+                        return
+                else:
+                    res = requests.post(f"{API_URL}/screen_resumes", data={"jd_text": jd_input}, files=files)
                 
                 if res.status_code == 200:
                     results = res.json().get("results")